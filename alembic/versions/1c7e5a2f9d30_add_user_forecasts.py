@@ -0,0 +1,36 @@
+"""Add user forecasts
+
+Revision ID: 1c7e5a2f9d30
+Revises: 4ebabe6f7752
+Create Date: 2026-10-19 09:12:44.201833
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c7e5a2f9d30'
+down_revision = '4ebabe6f7752'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_forecasts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.String(), nullable=False),
+    sa.Column('month_to_date', sa.Float(), nullable=False),
+    sa.Column('projected_monthly_total', sa.Float(), nullable=False),
+    sa.Column('goal_kg', sa.Float(), nullable=False),
+    sa.Column('goal_probability', sa.Float(), nullable=False),
+    sa.Column('daily_trend', sa.Float(), nullable=False),
+    sa.Column('daily_level', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_forecasts')
@@ -0,0 +1,24 @@
+"""Add user data version
+
+Revision ID: 5d3a9c7e2b14
+Revises: 8b2d4f6a1e57
+Create Date: 2026-10-19 18:52:37.104512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d3a9c7e2b14'
+down_revision = '8b2d4f6a1e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'data_version')
@@ -0,0 +1,38 @@
+"""Add savings totals and sketches
+
+Revision ID: 8b2d4f6a1e57
+Revises: 1c7e5a2f9d30
+Create Date: 2026-10-19 11:40:03.518240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2d4f6a1e57'
+down_revision = '1c7e5a2f9d30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_savings_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(), nullable=False),
+    sa.Column('activity_type', sa.String(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'activity_type')
+    )
+    op.create_table('savings_sketches',
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('savings_sketches')
+    op.drop_table('user_savings_totals')
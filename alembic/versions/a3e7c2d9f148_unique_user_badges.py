@@ -0,0 +1,29 @@
+"""Unique user badges
+
+Revision ID: a3e7c2d9f148
+Revises: e8c1f4a7b530
+Create Date: 2026-10-20 09:31:18.642077
+
+Concurrent badge evaluations could award a badge twice; duplicates are
+removed, keeping the first award, before the index is created.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e7c2d9f148'
+down_revision = 'e8c1f4a7b530'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(
+        "DELETE FROM user_badges WHERE id NOT IN (SELECT MIN(id) FROM user_badges GROUP BY user_id, badge_id)"
+    ))
+    op.create_index('uq_user_badges_user_badge', 'user_badges', ['user_id', 'badge_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_user_badges_user_badge', table_name='user_badges')
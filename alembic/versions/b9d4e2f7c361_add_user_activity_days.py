@@ -0,0 +1,25 @@
+"""Add user activity days
+
+Revision ID: b9d4e2f7c361
+Revises: f1a6c3e9b258
+Create Date: 2026-10-19 23:04:51.220418
+
+Existing users' bitmaps are filled in by `python -m app.jobs.rebuild_activity_days`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4e2f7c361'
+down_revision = 'f1a6c3e9b258'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('activity_days', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'activity_days')
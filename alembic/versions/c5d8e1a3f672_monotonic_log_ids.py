@@ -0,0 +1,56 @@
+"""Monotonic log ids
+
+Revision ID: c5d8e1a3f672
+Revises: a3e7c2d9f148
+Create Date: 2026-10-20 14:12:47.305918
+
+On SQLite eco_logs becomes an AUTOINCREMENT table, so a deleted log's id is
+never handed out again. The table is rebuilt, which drops its search index
+triggers; they are created again and the index rebuilt. The sequence starts
+past every id a tombstone remembers, not only the live ones. PostgreSQL
+sequences never go back, so nothing changes there.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d8e1a3f672'
+down_revision = 'a3e7c2d9f148'
+branch_labels = None
+depends_on = None
+
+SEARCH_TRIGGERS = (
+    "CREATE TRIGGER eco_logs_fts_insert AFTER INSERT ON eco_logs BEGIN "
+    "INSERT INTO eco_logs_fts(rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER eco_logs_fts_delete AFTER DELETE ON eco_logs BEGIN "
+    "INSERT INTO eco_logs_fts(eco_logs_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER eco_logs_fts_update AFTER UPDATE OF description ON eco_logs BEGIN "
+    "INSERT INTO eco_logs_fts(eco_logs_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO eco_logs_fts(rowid, description) VALUES (new.id, new.description); END",
+)
+
+
+def _rebuild(autoincrement: bool):
+    with op.batch_alter_table('eco_logs', recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    for trigger in SEARCH_TRIGGERS:
+        op.execute(trigger)
+    op.execute("INSERT INTO eco_logs_fts(eco_logs_fts) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(autoincrement=True)
+    op.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = 'eco_logs'"))
+    op.execute(sa.text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'eco_logs', MAX(COALESCE(MAX(id), 0), "
+        "(SELECT COALESCE(MAX(log_id), 0) FROM eco_log_tombstones)) FROM eco_logs"
+    ))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(autoincrement=False)
@@ -0,0 +1,52 @@
+"""Add log archive and summary rows
+
+Revision ID: c7e2a9d4f613
+Revises: a4f1c8e3d927
+Create Date: 2026-10-19 20:41:05.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9d4f613'
+down_revision = 'a4f1c8e3d927'
+branch_labels = None
+depends_on = None
+
+ACTIVITY_TYPES = ('TRANSPORT', 'ENERGY', 'WASTE', 'FOOD', 'WATER')
+
+
+def upgrade() -> None:
+    op.add_column('eco_logs', sa.Column('is_archived', sa.Boolean(), server_default='0', nullable=False))
+    op.add_column('eco_logs', sa.Column('entry_count', sa.Integer(), server_default='1', nullable=False))
+    op.create_index('ix_eco_logs_user_date', 'eco_logs', ['user_id', 'activity_date'], unique=False)
+    op.add_column('users', sa.Column('archived_before', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table('eco_logs_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('activity_type', sa.Enum(*ACTIVITY_TYPES, name='activitytype').with_variant(
+        postgresql.ENUM(*ACTIVITY_TYPES, name='activitytype', create_type=False), 'postgresql'
+    ), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('emissions_saved', sa.Float(), nullable=False),
+    sa.Column('points_earned', sa.Integer(), nullable=False),
+    sa.Column('activity_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', 'activity_date'),
+    postgresql_partition_by='RANGE (activity_date)'
+    )
+    op.create_index('ix_eco_logs_archive_user_date', 'eco_logs_archive', ['user_id', 'activity_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_eco_logs_archive_user_date', table_name='eco_logs_archive')
+    op.drop_table('eco_logs_archive')
+    op.drop_column('users', 'archived_before')
+    op.drop_index('ix_eco_logs_user_date', table_name='eco_logs')
+    op.drop_column('eco_logs', 'entry_count')
+    op.drop_column('eco_logs', 'is_archived')
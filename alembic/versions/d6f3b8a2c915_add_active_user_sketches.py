@@ -0,0 +1,33 @@
+"""Add active user sketches
+
+Revision ID: d6f3b8a2c915
+Revises: b9d4e2f7c361
+Create Date: 2026-10-19 23:41:07.518203
+
+Past days are filled in by `python -m app.jobs.rebuild_active_users`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6f3b8a2c915'
+down_revision = 'b9d4e2f7c361'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('is_admin', sa.Boolean(), server_default='0', nullable=False))
+    op.create_table('active_user_sketches',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('activity_type', sa.String(), nullable=False),
+    sa.Column('registers', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('day', 'activity_type')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('active_user_sketches')
+    op.drop_column('users', 'is_admin')
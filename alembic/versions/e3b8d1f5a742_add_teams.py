@@ -0,0 +1,45 @@
+"""Add teams
+
+Revision ID: e3b8d1f5a742
+Revises: c7e2a9d4f613
+Create Date: 2026-10-19 21:17:42.605931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8d1f5a742'
+down_revision = 'c7e2a9d4f613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('teams',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('member_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('eco_score', sa.Float(), server_default='0', nullable=False),
+    sa.Column('total_emissions_saved', sa.Float(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_teams_id'), 'teams', ['id'], unique=False)
+    op.create_index(op.f('ix_teams_eco_score'), 'teams', ['eco_score'], unique=False)
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('team_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_users_team_id_teams', 'teams', ['team_id'], ['id'])
+    op.create_index('ix_users_team_score', 'users', ['team_id', 'eco_score'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_team_score', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_constraint('fk_users_team_id_teams', type_='foreignkey')
+        batch_op.drop_column('team_id')
+    op.drop_index(op.f('ix_teams_eco_score'), table_name='teams')
+    op.drop_index(op.f('ix_teams_id'), table_name='teams')
+    op.drop_table('teams')
@@ -0,0 +1,37 @@
+"""Add log change sequence and tombstones
+
+Revision ID: e8c1f4a7b530
+Revises: d6f3b8a2c915
+Create Date: 2026-10-20 00:12:44.903617
+
+Existing logs start at change_seq 0: clients take their first token and then
+load the full listing once.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c1f4a7b530'
+down_revision = 'd6f3b8a2c915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('eco_logs', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_eco_logs_user_change_seq', 'eco_logs', ['user_id', 'change_seq'], unique=False)
+    op.create_table('eco_log_tombstones',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.Integer(), nullable=False),
+    sa.Column('log_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'change_seq')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('eco_log_tombstones')
+    op.drop_index('ix_eco_logs_user_change_seq', table_name='eco_logs')
+    op.drop_column('eco_logs', 'change_seq')
@@ -0,0 +1,56 @@
+"""Add log description search index
+
+Revision ID: f1a6c3e9b258
+Revises: e3b8d1f5a742
+Create Date: 2026-10-19 21:58:20.774103
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a6c3e9b258'
+down_revision = 'e3b8d1f5a742'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE eco_logs ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('english', description)) STORED"
+        )
+        op.execute("CREATE INDEX ix_eco_logs_search_vector ON eco_logs USING GIN (search_vector)")
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE eco_logs_fts USING fts5("
+        "description, content='eco_logs', content_rowid='id', tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER eco_logs_fts_insert AFTER INSERT ON eco_logs BEGIN "
+        "INSERT INTO eco_logs_fts(rowid, description) VALUES (new.id, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER eco_logs_fts_delete AFTER DELETE ON eco_logs BEGIN "
+        "INSERT INTO eco_logs_fts(eco_logs_fts, rowid, description) VALUES ('delete', old.id, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER eco_logs_fts_update AFTER UPDATE OF description ON eco_logs BEGIN "
+        "INSERT INTO eco_logs_fts(eco_logs_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+        "INSERT INTO eco_logs_fts(rowid, description) VALUES (new.id, new.description); END"
+    )
+    # Index the logs that already exist
+    op.execute("INSERT INTO eco_logs_fts(eco_logs_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX ix_eco_logs_search_vector")
+        op.execute("ALTER TABLE eco_logs DROP COLUMN search_vector")
+        return
+
+    for trigger in ('eco_logs_fts_insert', 'eco_logs_fts_delete', 'eco_logs_fts_update'):
+        op.execute(f"DROP TRIGGER {trigger}")
+    op.execute("DROP TABLE eco_logs_fts")
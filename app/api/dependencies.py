@@ -1,15 +1,20 @@
-from fastapi import Depends, HTTPException, status
+from typing import Iterable, Optional
+from fastapi import Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from ..core.database import get_db
+from pydantic_core import to_json
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.database import get_db, get_read_db
 from ..core.security import verify_token
+from ..core.config import settings
 from ..models.user import User
+from ..services.data_version import version_key, etag_for, etag_matches
 
 security = HTTPBearer()
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
 ) -> User:
     token = credentials.credentials
     user_id = verify_token(token)
@@ -20,11 +25,83 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await db.get(User, int(user_id))
+    if user is None and db is not primary_db:
+        # Just signed up: the replica may not have the account yet
+        user = await primary_db.get(User, int(user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
+
+
+def versioned(windowed: bool = False):
+    """
+    Dependency for GET endpoints whose answer depends only on the current
+    user's data. Sets a strong ETag derived from the user's data_version and
+    answers a matching If-None-Match with 304 before the endpoint runs.
+    Returns the key for data_version.memoize. `windowed` is for answers over
+    a moving time window, which also change as time passes.
+    """
+    window = settings.DATA_VERSION_WINDOW_SECONDS if windowed else None
+
+    async def check(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(get_current_user)
+    ) -> tuple:
+        key = version_key(current_user, request.url.path, request.url.query, window)
+        headers = {"ETag": etag_for(key), "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return key
+
+    return check
+
+
+def sparse_fields(allowed: Iterable[str]):
+    """
+    Dependency for list endpoints that take ?fields=a,b,c. Returns the
+    requested names, in request order, or None when the parameter is absent
+    and the endpoint should answer with its full response model.
+    """
+    allowed = tuple(allowed)
+
+    async def parse(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated subset of: {', '.join(allowed)}. Omit for every field."
+        )
+    ) -> Optional[tuple]:
+        if fields is None:
+            return None
+        wanted = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in wanted if name not in allowed]
+        if not wanted or unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"fields must be a comma-separated subset of {', '.join(allowed)}"
+            )
+        return wanted
+
+    return parse
+
+
+def sparse_response(rows: list) -> Response:
+    """
+    Rows that were selected for ?fields=, serialized as they are. They hold
+    a subset of the response model's fields, so they skip its validation.
+    """
+    return Response(content=to_json(rows), media_type="application/json")
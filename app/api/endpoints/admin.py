@@ -0,0 +1,24 @@
+from datetime import date, datetime
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.database import get_read_db
+from ...models.user import User
+from ...schemas.admin import ActiveUsers
+from ...services.active_users import active_user_counts, flush_active_users
+from ..dependencies import get_current_admin
+
+router = APIRouter()
+
+@router.get("/active-users", response_model=ActiveUsers)
+async def get_active_users(
+    as_of: Optional[date] = None,
+    admin: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Merged from per-day sketches, not COUNT(DISTINCT) over eco_logs.
+    # Other workers' additions show up after their next flush.
+    await run_in_threadpool(flush_active_users)
+    return await db.run_sync(active_user_counts, as_of or datetime.utcnow().date())
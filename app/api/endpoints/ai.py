@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from ...services.ai_service import get_ai_response
 from ...models.user import User
@@ -13,15 +14,16 @@ class ChatResponse(BaseModel):
     response: str
 
 @router.post("/chat", response_model=ChatResponse)
-def chat_with_ai(
+async def chat_with_ai(
     chat_request: ChatRequest,
     current_user: User = Depends(get_current_user)
 ):
     try:
-        response = get_ai_response(chat_request.prompt)
+        # The OpenRouter call uses blocking `requests`
+        response = await run_in_threadpool(get_ai_response, chat_request.prompt)
         return {"response": response}
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail="AI service temporarily unavailable"
-        )
\ No newline at end of file
+        )
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
 from ...core.database import get_db
 from ...core.security import create_access_token
-from ...schemas.user import UserCreate, UserResponse, Token, UserLogin
+from ...schemas.user import UserCreate, UserResponse, Token, UserLogin, UserProfile
+from ...schemas.common import Message
 from ...services.auth import create_user, authenticate_user
 from ...models.user import User
 from ..dependencies import get_current_user
@@ -12,9 +14,9 @@ from ..dependencies import get_current_user
 router = APIRouter()
 
 @router.post("/signup", response_model=UserResponse)
-def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check email uniqueness at application level
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -22,11 +24,11 @@ def signup(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
     try:
-        user = create_user(db, user_data)
+        user = await create_user(db, user_data)
         return {"user": user, "message": "User created successfully"}
     except IntegrityError:
         # Catch DB-level unique constraint failures
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -38,8 +40,8 @@ def signup(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=Token)
-def login(login_data: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, login_data.email, login_data.password)
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, login_data.email, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,10 +51,10 @@ def login(login_data: UserLogin, db: Session = Depends(get_db)):
     access_token = create_access_token(data={"sub": str(user.id)})
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.post("/logout")
-def logout():
+@router.post("/logout", response_model=Message)
+async def logout():
     return {"message": "Successfully logged out"}
 
-@router.get("/me")
-def get_current_user_endpoint(current_user: User = Depends(get_current_user)):
+@router.get("/me", response_model=UserProfile)
+async def get_current_user_endpoint(current_user: User = Depends(get_current_user)):
     return current_user
@@ -1,69 +1,84 @@
+import logging
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from datetime import datetime, timedelta
+from typing import List, Optional
 
-from ...core.database import get_db
+from ...core.database import get_read_db
 from ...models.user import User
 from ...models.log import EcoLog
-from ..dependencies import get_current_user
+from ...schemas.dashboard import DashboardStats
+from ...schemas.log import EcoLog as EcoLogSchema
+from ...services.activity_service import list_user_activities
+from ...services.data_version import memoize
+from ..dependencies import get_current_user, versioned, sparse_response
+from .logs import log_columns, log_fields
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.get("/stats")
-def get_dashboard_stats(
+@router.get("/stats", response_model=DashboardStats)
+async def get_dashboard_stats(
+    version: tuple = Depends(versioned(windowed=True)),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    print(f"🔍 DEBUG: Getting stats for user {current_user.id}")
+    logger.debug("dashboard stats", extra={"user_id": current_user.id})
     
-    # Count total logs for this user
-    total_activities = db.query(EcoLog).filter(
-        EcoLog.user_id == current_user.id
-    ).count()
+    async def compute():
+        # Count total logs for this user
+        total_activities = await db.scalar(
+            select(func.coalesce(func.sum(EcoLog.entry_count), 0)).where(EcoLog.user_id == current_user.id)
+        )
+        
+        # Weekly trend data - last 7 days
+        week_ago = datetime.utcnow() - timedelta(days=7)
+        
+        weekly_emissions, weekly_activity_count = (await db.execute(
+            select(
+                func.coalesce(func.sum(EcoLog.emissions_saved), 0.0), func.coalesce(func.sum(EcoLog.entry_count), 0)
+            ).where(
+                EcoLog.user_id == current_user.id,
+                EcoLog.activity_date >= week_ago
+            )
+        )).one()
+        
+        # Calculate user rank based on eco_score
+        if current_user.eco_score >= 200:
+            user_rank = "Eco Champion"
+        elif current_user.eco_score >= 100:
+            user_rank = "Eco Warrior" 
+        elif current_user.eco_score >= 50:
+            user_rank = "Eco Enthusiast"
+        else:
+            user_rank = "Eco Beginner"
+        
+        return {
+            "total_emissions_saved": current_user.total_emissions_saved or 0,
+            "eco_score": current_user.eco_score or 0,
+            "weekly_emissions_saved": weekly_emissions,
+            "weekly_activity_count": weekly_activity_count,
+            "user_rank": user_rank
+        }
     
-    # Weekly trend data - last 7 days
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    
-    weekly_logs = db.query(EcoLog).filter(
-        EcoLog.user_id == current_user.id,
-        EcoLog.activity_date >= week_ago
-    ).all()
-    
-    weekly_emissions = sum(log.emissions_saved for log in weekly_logs)
-    weekly_activity_count = len(weekly_logs)
-    
-    # Calculate user rank based on eco_score
-    if current_user.eco_score >= 200:
-        user_rank = "Eco Champion"
-    elif current_user.eco_score >= 100:
-        user_rank = "Eco Warrior" 
-    elif current_user.eco_score >= 50:
-        user_rank = "Eco Enthusiast"
-    else:
-        user_rank = "Eco Beginner"
-    
-    return {
-        "total_emissions_saved": current_user.total_emissions_saved or 0,
-        "eco_score": current_user.eco_score or 0,
-        "weekly_emissions_saved": weekly_emissions,
-        "weekly_activity_count": weekly_activity_count,
-        "user_rank": user_rank
-    }
+    return await memoize(version, compute)
 
-@router.get("/activities")
-def get_recent_activities(
+@router.get("/activities", response_model=List[EcoLogSchema])
+async def get_recent_activities(
     skip: int = 0,
     limit: int = 10,
+    fields: Optional[tuple] = Depends(log_fields),
+    version: tuple = Depends(versioned()),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    print(f"🔍 DEBUG: Getting activities for user {current_user.id}")
-    
-    activities = db.query(EcoLog).filter(
-        EcoLog.user_id == current_user.id
-    ).order_by(EcoLog.activity_date.desc()).offset(skip).limit(limit).all()
-    
-    print(f"🔍 DEBUG: Found {len(activities)} activities")
+    async def compute():
+        activities = await list_user_activities(db, current_user, log_columns(fields), skip, limit)
+        
+        logger.debug("recent activities", extra={"user_id": current_user.id, "count": len(activities)})
+        
+        return activities
     
-    return activities
\ No newline at end of file
+    activities = await memoize(version, compute)
+    return sparse_response(activities) if fields else activities
@@ -1,87 +1,152 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from datetime import datetime, timedelta
 from collections import defaultdict
 
-from ...core.database import get_db
+from ...core.config import settings
+from ...core.database import get_read_db
 from ...models.user import User
 from ...models.log import EcoLog, ActivityType
-from ..dependencies import get_current_user
+from ...models.forecast import UserForecast
+from ...services.data_version import memoize
+from ...services import savings_stats
+from ...schemas.insights import (
+    WeeklyInsights, CategoryDistribution, MonthlySummary, SavingsForecast, SavingsPercentiles
+)
+from ..dependencies import get_current_user, versioned
 
 router = APIRouter()
 
-@router.get("/weekly")
-def get_weekly_insights(
+@router.get("/weekly", response_model=WeeklyInsights)
+async def get_weekly_insights(
+    version: tuple = Depends(versioned(windowed=True)),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Get data for the last 4 weeks
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(weeks=4)
+    async def compute():
+        # Get data for the last 4 weeks
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(weeks=4)
     
-    weekly_data = db.query(
-        func.strftime('%Y-%W', EcoLog.activity_date).label('week'),
-        func.sum(EcoLog.emissions_saved).label('emissions'),
-        func.sum(EcoLog.points_earned).label('points')
-    ).filter(
-        EcoLog.user_id == current_user.id,
-        EcoLog.activity_date >= start_date
-    ).group_by('week').all()
+        weekly_data = (await db.execute(
+            select(
+                func.strftime('%Y-%W', EcoLog.activity_date).label('week'),
+                func.sum(EcoLog.emissions_saved).label('emissions'),
+                func.sum(EcoLog.points_earned).label('points')
+            ).where(
+                EcoLog.user_id == current_user.id,
+                EcoLog.activity_date >= start_date
+            ).group_by('week')
+        )).all()
     
-    return {
-        "weekly_progress": [
-            {
-                "week": data.week,
-                "emissions_saved": data.emissions or 0,
-                "points_earned": data.points or 0
-            }
-            for data in weekly_data
-        ]
-    }
+        return {
+            "weekly_progress": [
+                {
+                    "week": data.week,
+                    "emissions_saved": data.emissions or 0,
+                    "points_earned": data.points or 0
+                }
+                for data in weekly_data
+            ]
+        }
+    
+    return await memoize(version, compute)
 
-@router.get("/categories")
-def get_category_distribution(
+@router.get("/categories", response_model=CategoryDistribution)
+async def get_category_distribution(
+    version: tuple = Depends(versioned()),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    category_data = db.query(
-        EcoLog.activity_type,
-        func.count(EcoLog.id).label('count'),
-        func.sum(EcoLog.emissions_saved).label('emissions')
-    ).filter(
-        EcoLog.user_id == current_user.id
-    ).group_by(EcoLog.activity_type).all()
+    async def compute():
+        category_data = (await db.execute(
+            select(
+                EcoLog.activity_type,
+                func.sum(EcoLog.entry_count).label('count'),
+                func.sum(EcoLog.emissions_saved).label('emissions')
+            ).where(
+                EcoLog.user_id == current_user.id
+            ).group_by(EcoLog.activity_type)
+        )).all()
+    
+        return {
+            "categories": [
+                {
+                    "type": data.activity_type,
+                    "count": data.count,
+                    "total_emissions": data.emissions or 0
+                }
+                for data in category_data
+            ]
+        }
     
-    return {
-        "categories": [
-            {
-                "type": data.activity_type,
-                "count": data.count,
-                "total_emissions": data.emissions or 0
-            }
-            for data in category_data
-        ]
-    }
+    return await memoize(version, compute)
 
-@router.get("/summary")
-def get_monthly_summary(
+@router.get("/summary", response_model=MonthlySummary)
+async def get_monthly_summary(
+    version: tuple = Depends(versioned(windowed=True)),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    current_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    async def compute():
+        current_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    
+        monthly_data = (await db.execute(
+            select(
+                func.sum(EcoLog.emissions_saved).label('monthly_emissions'),
+                func.sum(EcoLog.points_earned).label('monthly_points'),
+                func.sum(EcoLog.entry_count).label('activity_count')
+            ).where(
+                EcoLog.user_id == current_user.id,
+                EcoLog.activity_date >= current_month
+            )
+        )).first()
     
-    monthly_data = db.query(
-        func.sum(EcoLog.emissions_saved).label('monthly_emissions'),
-        func.sum(EcoLog.points_earned).label('monthly_points'),
-        func.count(EcoLog.id).label('activity_count')
-    ).filter(
-        EcoLog.user_id == current_user.id,
-        EcoLog.activity_date >= current_month
-    ).first()
+        return {
+            "monthly_emissions_saved": monthly_data.monthly_emissions or 0,
+            "monthly_points_earned": monthly_data.monthly_points or 0,
+            "monthly_activities": monthly_data.activity_count or 0
+        }
     
-    return {
-        "monthly_emissions_saved": monthly_data.monthly_emissions or 0,
-        "monthly_points_earned": monthly_data.monthly_points or 0,
-        "monthly_activities": monthly_data.activity_count or 0
-    }
\ No newline at end of file
+    return await memoize(version, compute)
+
+@router.get("/forecast", response_model=SavingsForecast)
+async def get_savings_forecast(
+    version: tuple = Depends(versioned()),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    async def compute():
+        # Precomputed nightly by app/jobs/forecast.py - a single primary-key lookup
+        forecast = await db.get(UserForecast, current_user.id)
+        if forecast is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Forecast not available yet"
+            )
+    
+        return {
+            "month": forecast.month,
+            "month_to_date": forecast.month_to_date,
+            "projected_monthly_total": forecast.projected_monthly_total,
+            "goal_kg": forecast.goal_kg,
+            "goal_probability": forecast.goal_probability,
+            "daily_trend": forecast.daily_trend,
+            "computed_at": forecast.computed_at
+        }
+    
+    return await memoize(version, compute)
+
+@router.get("/percentiles", response_model=SavingsPercentiles)
+async def get_savings_percentiles(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Ranked against mergeable sketches, not by sorting every user's totals.
+    # Not versioned: ranks move with everyone else's writes, not just this user's.
+    if savings_stats.registry.is_stale(settings.SAVINGS_SKETCH_FLUSH_SECONDS):
+        # A write session of its own, off the event loop: never this request's
+        await run_in_threadpool(savings_stats.flush_sketches)
+    return await db.run_sync(savings_stats.get_user_percentiles, current_user.id)
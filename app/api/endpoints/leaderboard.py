@@ -1,42 +1,52 @@
+import logging
+from typing import List, Optional
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...core.database import get_db
+from ...core.database import get_read_db
 from ...models.user import User
+from ...schemas.leaderboard import LeaderboardEntry
+from ..dependencies import sparse_fields, sparse_response
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.get("/")
-def get_leaderboard(
+# Each entry field: the columns it reads, and how it is built from the row and its rank
+ENTRY_FIELDS = {
+    "rank": ((), lambda user, rank: rank),
+    "username": ((User.username,), lambda user, rank: user.username),
+    "full_name": ((User.full_name, User.username), lambda user, rank: user.full_name or user.username),
+    "eco_score": ((User.eco_score,), lambda user, rank: float(user.eco_score or 0)),
+    "emissions_saved": ((User.total_emissions_saved,), lambda user, rank: float(user.total_emissions_saved or 0)),
+}
+
+@router.get("/", response_model=List[LeaderboardEntry])
+async def get_leaderboard(
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    fields: Optional[tuple] = Depends(sparse_fields(ENTRY_FIELDS)),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    print("🔍 DEBUG: Getting leaderboard - simple version")
-    
     try:
+        entry_fields = fields or tuple(ENTRY_FIELDS)
+        columns = dict.fromkeys(column for field in entry_fields for column in ENTRY_FIELDS[field][0])
         # Simple query - just get users ordered by eco_score
-        users = db.query(User).order_by(
-            User.eco_score.desc()
-        ).offset(skip).limit(limit).all()
-        
-        print(f"🔍 DEBUG: Found {len(users)} total users")
+        users = (await db.execute(
+            select(*(columns or (User.id,))).order_by(
+                User.eco_score.desc()
+            ).offset(skip).limit(limit)
+        )).all()
         
+        builders = [(field, ENTRY_FIELDS[field][1]) for field in entry_fields]
         leaderboard_data = []
         for idx, user in enumerate(users):
-            leaderboard_data.append({
-                "rank": idx + 1 + skip,
-                "username": user.username,
-                "full_name": user.full_name or user.username,
-                "eco_score": float(user.eco_score or 0),
-                "emissions_saved": float(user.total_emissions_saved or 0),
-            })
+            rank = idx + 1 + skip
+            leaderboard_data.append({field: build(user, rank) for field, build in builders})
         
-        print(f"🔍 DEBUG: Returning {len(leaderboard_data)} leaderboard entries")
-        return leaderboard_data
+        logger.debug("leaderboard", extra={"skip": skip, "entries": len(leaderboard_data)})
+        return sparse_response(leaderboard_data) if fields else leaderboard_data
         
-    except Exception as e:
-        print(f"❌ ERROR in leaderboard: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
\ No newline at end of file
+    except Exception:
+        logger.exception("leaderboard query failed")
+        return []
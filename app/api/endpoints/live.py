@@ -0,0 +1,93 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+from ...core.config import settings
+from ...core.security import verify_token
+from ...services.live import hub, HubFull, dashboard_topic
+
+router = APIRouter()
+
+TOPICS = ("leaderboard", "dashboard")
+
+
+class EventSourceResponse(StreamingResponse):
+    media_type = "text/event-stream"
+
+
+async def _stream(subscriber):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_MAX_CONNECTION_SECONDS
+    yield f"retry: {settings.LIVE_RETRY_MS}\n\n".encode()
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return  # the client reconnects, possibly to a less busy worker
+        event = await subscriber.next(min(settings.LIVE_HEARTBEAT_SECONDS, remaining))
+        if event is None:
+            yield b": ping\n\n"
+            continue
+        yield event
+        if subscriber.evicted:
+            return
+
+
+class SubscriptionResponse(EventSourceResponse):
+    """Streams a hub subscription, and unsubscribes however the response ends."""
+
+    def __init__(self, subscriber, **kwargs):
+        super().__init__(_stream(subscriber), **kwargs)
+        self.subscriber = subscriber
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            hub.unsubscribe(self.subscriber)
+
+
+@router.get(
+    "/",
+    response_class=EventSourceResponse,
+    responses={200: {
+        "description": "Server-sent events: `leaderboard` and `dashboard`, each with a JSON `data` line",
+        "content": {"text/event-stream": {"schema": {"type": "string"}}},
+    }},
+)
+async def stream_updates(
+    topics: str = ",".join(TOPICS),
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+):
+    # EventSource cannot send headers, so browsers pass the token as ?token=.
+    # Authenticated from the token alone: a stream must not hold a DB session open.
+    user_id = verify_token(credentials.credentials if credentials else token or "")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    wanted = {topic.strip() for topic in topics.split(",") if topic.strip()}
+    if not wanted or not wanted <= set(TOPICS):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"topics must be a comma-separated subset of {', '.join(TOPICS)}"
+        )
+    channels = [dashboard_topic(user_id) if topic == "dashboard" else topic for topic in wanted]
+
+    try:
+        subscriber = hub.subscribe(channels)
+    except HubFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live connections on this server",
+            headers={"Retry-After": str(settings.LIVE_RETRY_MS // 1000 or 1)},
+        )
+    return SubscriptionResponse(subscriber, headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # no proxy buffering of the stream
+    })
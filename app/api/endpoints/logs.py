@@ -1,32 +1,136 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ...core.database import get_db
-from ...schemas.log import EcoLog, EcoLogCreate, EcoLogUpdate, EcoLogResponse
-from ...models.log import EcoLog as EcoLogModel
+from ...core.database import get_db, get_read_db, run_write, as_dicts, call_after_commit
+from ...schemas.log import EcoLog, EcoLogCreate, EcoLogUpdate, EcoLogResponse, EcoLogSearchResults, EcoLogChanges
+from ...schemas.common import Message
+from ...models.log import EcoLog as EcoLogModel, EcoLogTombstone
 from ...models.user import User
-from ..dependencies import get_current_user
+from ...services.activity_days import mark_day, unmark_day_if_empty
+from ...services.active_users import record_activity
+from ...services.activity_service import list_user_activities
+from ...services.live import publish_score
+from ...services.outbox import enqueue
+from ...services.search import match_terms, search_query, encode_cursor, decode_cursor
+from ...services.sync import changed_logs_query, tombstones_query, merge_changes, encode_token, decode_token
+from ...services.teams import add_to_team
+from ..dependencies import get_current_user, sparse_fields, sparse_response, versioned
 
 router = APIRouter()
 
+# Just the columns the EcoLog response carries: list endpoints select these
+# as plain rows instead of hydrating ORM entities
+LOG_COLUMNS = tuple(getattr(EcoLogModel, field) for field in EcoLog.model_fields)
+_COLUMN_BY_FIELD = {column.key: column for column in LOG_COLUMNS}
+
+log_fields = sparse_fields(_COLUMN_BY_FIELD)
+
+def log_columns(fields: Optional[tuple] = None) -> tuple:
+    """The columns to select for ?fields=, or all of LOG_COLUMNS."""
+    return tuple(_COLUMN_BY_FIELD[field] for field in fields) if fields else LOG_COLUMNS
+
+def _isoformat(moment):
+    return moment.isoformat() if moment else None
+
+def _publish_after_commit(session, user: User, totals, points_earned, emissions_saved):
+    # Live leaderboard and dashboard streams hear about the write once it is durable
+    eco_score, total_emissions_saved, data_version = totals[:3]
+    call_after_commit(
+        session, publish_score, user.id, user.username, user.full_name,
+        eco_score, total_emissions_saved, data_version, points_earned, emissions_saved
+    )
+
+async def _get_own_log(db: AsyncSession, log_id: int, user_id: int) -> EcoLogModel:
+    log = await db.scalar(
+        select(EcoLogModel).where(
+            EcoLogModel.id == log_id,
+            EcoLogModel.user_id == user_id,
+            # Summary rows of archived days are not logs anyone can edit
+            EcoLogModel.is_archived.is_(False)
+        )
+    )
+    
+    if not log:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Log not found"
+        )
+    return log
+
 @router.get("/", response_model=List[EcoLog])
-def get_user_logs(
+async def get_user_logs(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[tuple] = Depends(log_fields),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    logs = await list_user_activities(db, current_user, log_columns(fields), skip, limit)
+    return sparse_response(logs) if fields else logs
+
+@router.get("/search", response_model=EcoLogSearchResults)
+async def search_logs(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if not match_terms(q):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="q must contain at least one word"
+        )
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor"
+        )
+
+    # One extra row tells whether there is a next page
+    hits = as_dicts(await db.execute(search_query(LOG_COLUMNS, current_user.id, q, after, limit + 1)))
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1]["score"], hits[-1]["id"])
+    return {"results": hits, "next_cursor": next_cursor}
+
+@router.get("/changes", response_model=EcoLogChanges)
+async def get_log_changes(
+    since: Optional[str] = Query(None, description="next_since of the last sync. Omit to get a starting token."),
+    limit: int = Query(500, ge=1, le=1000),
+    version: tuple = Depends(versioned()),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    logs = db.query(EcoLogModel).filter(
-        EcoLogModel.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
-    return logs
+    if since is None:
+        # Read with the listing's session: a client that takes this token and
+        # then loads GET /api/logs/ has everything up to it
+        start = await db.scalar(select(User.data_version).where(User.id == current_user.id))
+        return {"logs": [], "deleted": [], "next_since": encode_token(start or 0), "has_more": False}
+    try:
+        after = decode_token(since)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid sync token"
+        )
+
+    # One extra row of each tells whether there is a next page
+    logs = as_dicts(await db.execute(changed_logs_query(LOG_COLUMNS, current_user.id, after, limit + 1)))
+    tombstones = (await db.execute(tombstones_query(current_user.id, after, limit + 1))).all()
+    return merge_changes(logs, tombstones, after, limit)
 
 @router.post("/", response_model=EcoLogResponse)
-def create_log(
+async def create_log(
     log_data: EcoLogCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Use AI service to calculate emissions and points
     from ...services.ai_service import calculate_co2_saved
@@ -37,70 +141,108 @@ def create_log(
         quantity=1.0
     )
     
-    # Update user's eco score and total emissions
-    current_user.eco_score += calculation["points_earned"]
-    current_user.total_emissions_saved += calculation["emissions_saved"]
-    
-    # Create the log with calculated values (ignore any provided values)
-    db_log = EcoLogModel(
-        activity_type=log_data.activity_type,
-        description=log_data.description,
-        user_id=current_user.id,
-        emissions_saved=calculation["emissions_saved"],
-        points_earned=calculation["points_earned"]
-    )
-    db.add(db_log)
-    db.commit()
-    db.refresh(db_log)
+    async def write(session):
+        # Update user's eco score and total emissions
+        totals = (await session.execute(
+            update(User).where(User.id == current_user.id).values(
+                eco_score=User.eco_score + calculation["points_earned"],
+                total_emissions_saved=User.total_emissions_saved + calculation["emissions_saved"],
+                data_version=User.data_version + 1
+            ).returning(User.eco_score, User.total_emissions_saved, User.data_version, User.team_id, User.activity_days)
+        )).one()
+        await add_to_team(session, totals.team_id, calculation["points_earned"], calculation["emissions_saved"])
+        await mark_day(session, current_user.id, totals.activity_days, datetime.utcnow().date())
+        _publish_after_commit(session, current_user, totals, calculation["points_earned"], calculation["emissions_saved"])
+        record_activity(session, current_user.id, log_data.activity_type, datetime.utcnow().date())
+        
+        # Create the log with calculated values (ignore any provided values)
+        db_log = EcoLogModel(
+            activity_type=log_data.activity_type,
+            description=log_data.description,
+            user_id=current_user.id,
+            emissions_saved=calculation["emissions_saved"],
+            points_earned=calculation["points_earned"],
+            change_seq=totals.data_version
+        )
+        session.add(db_log)
+        # Rollups and badges are delivered after the commit, off the request path
+        enqueue(
+            session, "savings.delta", user_id=current_user.id, activity_type=log_data.activity_type.value,
+            activity_date=datetime.utcnow().isoformat(), delta=calculation["emissions_saved"]
+        )
+        enqueue(session, "badges.evaluate", user_id=current_user.id)
+        await session.flush()
+        await session.refresh(db_log)
+        return db_log
     
+    db_log = await run_write(db, write, user_id=current_user.id)
     return {"log": db_log, "message": "Log created successfully"}
 
 @router.put("/{log_id}", response_model=EcoLogResponse)
-def update_log(
+async def update_log(
     log_id: int,
     log_data: EcoLogUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    log = db.query(EcoLogModel).filter(
-        EcoLogModel.id == log_id,
-        EcoLogModel.user_id == current_user.id
-    ).first()
+    updates = log_data.model_dump(exclude_unset=True)
     
-    if not log:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Log not found"
+    async def write(session):
+        log = await _get_own_log(session, log_id, current_user.id)
+        
+        # Moving a log to another category moves its savings with it
+        new_type = updates.get("activity_type")
+        if new_type is not None and new_type != log.activity_type:
+            for activity_type, delta in ((log.activity_type, -log.emissions_saved), (new_type, log.emissions_saved)):
+                enqueue(
+                    session, "savings.delta", user_id=current_user.id, activity_type=activity_type.value,
+                    activity_date=_isoformat(log.activity_date), delta=delta
+                )
+        
+        data_version = await session.scalar(
+            update(User).where(User.id == current_user.id).values(
+                data_version=User.data_version + 1
+            ).returning(User.data_version)
         )
+        for field, value in updates.items():
+            setattr(log, field, value)
+        log.change_seq = data_version
+        
+        await session.flush()
+        await session.refresh(log)
+        return log
     
-    for field, value in log_data.dict(exclude_unset=True).items():
-        setattr(log, field, value)
-    
-    db.commit()
-    db.refresh(log)
+    log = await run_write(db, write, user_id=current_user.id)
     return {"log": log, "message": "Log updated successfully"}
 
-@router.delete("/{log_id}")
-def delete_log(
+@router.delete("/{log_id}", response_model=Message)
+async def delete_log(
     log_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    log = db.query(EcoLogModel).filter(
-        EcoLogModel.id == log_id,
-        EcoLogModel.user_id == current_user.id
-    ).first()
-    
-    if not log:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Log not found"
+    async def write(session):
+        log = await _get_own_log(session, log_id, current_user.id)
+        
+        # Update user stats
+        totals = (await session.execute(
+            update(User).where(User.id == current_user.id).values(
+                eco_score=User.eco_score - log.points_earned,
+                total_emissions_saved=User.total_emissions_saved - log.emissions_saved,
+                data_version=User.data_version + 1
+            ).returning(User.eco_score, User.total_emissions_saved, User.data_version, User.team_id, User.activity_days)
+        )).one()
+        await add_to_team(session, totals.team_id, -log.points_earned, -log.emissions_saved)
+        await unmark_day_if_empty(session, current_user.id, totals.activity_days, log.activity_date.date(), log.id)
+        _publish_after_commit(session, current_user, totals, -log.points_earned, -log.emissions_saved)
+        enqueue(
+            session, "savings.delta", user_id=current_user.id, activity_type=log.activity_type.value,
+            activity_date=_isoformat(log.activity_date), delta=-log.emissions_saved
         )
+        
+        # Sync clients hear about the deletion from the tombstone
+        session.add(EcoLogTombstone(user_id=current_user.id, change_seq=totals.data_version, log_id=log.id))
+        await session.delete(log)
     
-    # Update user stats
-    current_user.eco_score -= log.points_earned
-    current_user.total_emissions_saved -= log.emissions_saved
-    
-    db.delete(log)
-    db.commit()
-    return {"message": "Log deleted successfully"}
\ No newline at end of file
+    await run_write(db, write, user_id=current_user.id)
+    return {"message": "Log deleted successfully"}
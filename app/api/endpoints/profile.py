@@ -1,127 +1,147 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+import base64
+import logging
+from datetime import date, datetime, timedelta
 from typing import Optional
-from sqlalchemy.orm import joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...core.database import get_db
+from ...core.database import get_db, get_read_db, run_write
 from ...models.user import User
 from ...models.log import EcoLog
 from ...models.badge import UserBadge, Badge
-from ..dependencies import get_current_user
+from ...schemas.user import UserProfile, ProfileUpdateResponse
+from ...schemas.profile import ProfileUpdate, BadgeList, AchievementList, Streaks, ActivityCalendar
+from ...services.activity_days import DayBitmap
+from ...services.data_version import memoize
+from ..dependencies import get_current_user, versioned
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-class ProfileUpdate(BaseModel):
-    full_name: Optional[str] = None
-    bio: Optional[str] = None
-    avatar: Optional[str] = None
-
-@router.get("/")
-def get_profile(current_user: User = Depends(get_current_user)):
-    print(f"🔍 DEBUG: Getting profile for user {current_user.id}")
+@router.get("/", response_model=UserProfile, dependencies=[Depends(versioned())])
+async def get_profile(current_user: User = Depends(get_current_user)):
+    logger.debug("profile", extra={"user_id": current_user.id})
     return current_user
 
-@router.put("/")
-def update_profile(
+@router.put("/", response_model=ProfileUpdateResponse)
+async def update_profile(
     profile_data: ProfileUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    for field, value in profile_data.dict(exclude_unset=True).items():
-        setattr(current_user, field, value)
+    updates = profile_data.model_dump(exclude_unset=True)
+    
+    async def write(session):
+        user = await session.get(User, current_user.id)
+        for field, value in updates.items():
+            setattr(user, field, value)
+        user.data_version = User.data_version + 1
+        await session.flush()
+        await session.refresh(user)
+        return user
     
-    db.commit()
-    db.refresh(current_user)
-    return {"message": "Profile updated successfully", "user": current_user}
+    user = await run_write(db, write, user_id=current_user.id)
+    return {"message": "Profile updated successfully", "user": user}
 
-@router.get("/badges")
-def get_user_badges(
+@router.get("/badges", response_model=BadgeList)
+async def get_user_badges(
+    version: tuple = Depends(versioned()),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    print(f"🔍 DEBUG: Getting badges for user {current_user.id}")
-    
-    # Get user badges with badge details
-    user_badges = db.query(UserBadge).options(
-        joinedload(UserBadge.badge)
-    ).filter(
-        UserBadge.user_id == current_user.id
-    ).all()
-    
-    print(f"🔍 DEBUG: Found {len(user_badges)} badges")
+    async def compute():
+        # Whole catalog in one query, with the user's earned_at where they have the badge
+        rows = (await db.execute(
+            select(Badge.name, Badge.description, Badge.icon, UserBadge.earned_at, UserBadge.id.is_not(None))
+            .outerjoin(UserBadge, (UserBadge.badge_id == Badge.id) & (UserBadge.user_id == current_user.id))
+            .order_by(UserBadge.id.is_(None), UserBadge.id, Badge.id)
+        )).all()
     
-    # Format response
-    badges_data = []
-    for user_badge in user_badges:
-        badges_data.append({
-            "name": user_badge.badge.name,
-            "description": user_badge.badge.description,
-            "icon": user_badge.badge.icon,
-            "earned_at": user_badge.earned_at,
-            "earned": True
-        })
-    
-    # Also include potential badges user hasn't earned yet
-    all_badges = db.query(Badge).all()
-    earned_badge_ids = [ub.badge_id for ub in user_badges]
+        badges_data = [
+            {
+                "name": name,
+                "description": description,
+                "icon": icon,
+                "earned_at": earned_at,
+                "earned": earned
+            }
+            for name, description, icon, earned_at, earned in rows
+        ]
+        logger.debug("badges", extra={"user_id": current_user.id, "earned": sum(b["earned"] for b in badges_data)})
     
-    for badge in all_badges:
-        if badge.id not in earned_badge_ids:
-            badges_data.append({
-                "name": badge.name,
-                "description": badge.description,
-                "icon": badge.icon,
-                "earned_at": None,
-                "earned": False
-            })
+        return {"badges": badges_data}
     
-    return {"badges": badges_data}
+    return await memoize(version, compute)
 
-@router.get("/achievements")
-def get_user_achievements(
+@router.get("/achievements", response_model=AchievementList)
+async def get_user_achievements(
+    version: tuple = Depends(versioned()),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    print(f"🔍 DEBUG: Getting achievements for user {current_user.id}")
-    
-    # Count user logs by category
-    transport_count = db.query(EcoLog).filter(
-        EcoLog.user_id == current_user.id,
-        EcoLog.activity_type == "transport"
-    ).count()
+    logger.debug("achievements", extra={"user_id": current_user.id})
     
-    energy_count = db.query(EcoLog).filter(
-        EcoLog.user_id == current_user.id,
-        EcoLog.activity_type == "energy"
-    ).count()
+    async def compute():
+        # Count user logs by category, in one grouped query
+        counts = {
+            getattr(activity_type, "value", activity_type): count
+            for activity_type, count in (await db.execute(
+                select(EcoLog.activity_type, func.sum(EcoLog.entry_count))
+                .where(EcoLog.user_id == current_user.id)
+                .group_by(EcoLog.activity_type)
+            )).all()
+        }
+        transport_count = counts.get("transport", 0)
+        energy_count = counts.get("energy", 0)
+        waste_count = counts.get("waste", 0)
+        food_count = counts.get("food", 0)
+        water_count = counts.get("water", 0)
     
-    waste_count = db.query(EcoLog).filter(
-        EcoLog.user_id == current_user.id,
-        EcoLog.activity_type == "waste"
-    ).count()
+        total_logs = transport_count + energy_count + waste_count + food_count + water_count
     
-    food_count = db.query(EcoLog).filter(
-        EcoLog.user_id == current_user.id,
-        EcoLog.activity_type == "food"
-    ).count()
-    
-    water_count = db.query(EcoLog).filter(
-        EcoLog.user_id == current_user.id,
-        EcoLog.activity_type == "water"
-    ).count()
-    
-    total_logs = transport_count + energy_count + waste_count + food_count + water_count
+        return {
+            "achievements": [
+                {"title": "Total Emissions Saved", "value": f"{current_user.total_emissions_saved:.1f} kg"},
+                {"title": "Eco Score", "value": f"{current_user.eco_score} points"},
+                {"title": "Total Activities", "value": total_logs},
+                {"title": "Transport Activities", "value": transport_count},
+                {"title": "Energy Activities", "value": energy_count},
+                {"title": "Waste Activities", "value": waste_count},
+                {"title": "Food Activities", "value": food_count},
+                {"title": "Water Activities", "value": water_count},
+            ]
+        }
     
+    return await memoize(version, compute)
+
+# Read straight off the bitmap get_current_user loaded with the user: no queries.
+# Windowed, since "today" moves without a write.
+@router.get("/streaks", response_model=Streaks, dependencies=[Depends(versioned(windowed=True))])
+async def get_streaks(current_user: User = Depends(get_current_user)):
+    bitmap = DayBitmap.from_bytes(current_user.activity_days)
     return {
-        "achievements": [
-            {"title": "Total Emissions Saved", "value": f"{current_user.total_emissions_saved:.1f} kg"},
-            {"title": "Eco Score", "value": f"{current_user.eco_score} points"},
-            {"title": "Total Activities", "value": total_logs},
-            {"title": "Transport Activities", "value": transport_count},
-            {"title": "Energy Activities", "value": energy_count},
-            {"title": "Waste Activities", "value": waste_count},
-            {"title": "Food Activities", "value": food_count},
-            {"title": "Water Activities", "value": water_count},
-        ]
-    }
\ No newline at end of file
+        "current_streak": bitmap.current_streak(datetime.utcnow().date()),
+        "longest_streak": bitmap.longest_streak(),
+        "active_days": len(bitmap),
+        "last_active": bitmap.last_active,
+    }
+
+@router.get("/calendar", response_model=ActivityCalendar, dependencies=[Depends(versioned(windowed=True))])
+async def get_activity_calendar(
+    year: Optional[int] = Query(None, ge=1970, le=9999, description="A calendar year; omit for the 365 days up to today"),
+    current_user: User = Depends(get_current_user)
+):
+    if year is None:
+        start = datetime.utcnow().date() - timedelta(days=364)
+        days = 365
+    else:
+        start = date(year, 1, 1)
+        days = (date(year, 12, 31) - start).days + 1
+    bits = DayBitmap.from_bytes(current_user.activity_days).window(start, days)
+    return {
+        "start": start,
+        "days": days,
+        "bitmap": base64.b64encode(bits.to_bytes((days + 7) // 8, "little")).decode(),
+        "active_days": bits.bit_count(),
+    }
@@ -0,0 +1,128 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+
+from ...core.database import get_db, get_read_db, run_write, as_dicts
+from ...models.team import Team as TeamModel
+from ...models.user import User
+from ...schemas.common import Message
+from ...schemas.leaderboard import LeaderboardEntry
+from ...schemas.team import Team, TeamCreate, TeamLeaderboardEntry
+from ...services.teams import move_member
+from ..dependencies import get_current_user
+
+router = APIRouter()
+
+TEAM_COLUMNS = tuple(getattr(TeamModel, field) for field in Team.model_fields)
+
+async def _get_team(db: AsyncSession, team_id: int) -> dict:
+    team = as_dicts(await db.execute(select(*TEAM_COLUMNS).where(TeamModel.id == team_id)))
+    if not team:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found"
+        )
+    return team[0]
+
+@router.post("/", response_model=Team)
+async def create_team(
+    team_data: TeamCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    if await db.scalar(select(TeamModel.id).where(TeamModel.name == team_data.name)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Team name already taken"
+        )
+
+    async def write(session):
+        team = TeamModel(name=team_data.name)
+        session.add(team)
+        await session.flush()  # RETURNING fills in id and created_at
+        return team
+
+    try:
+        return await run_write(db, write)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Team name already taken"
+        )
+
+@router.get("/leaderboard", response_model=List[TeamLeaderboardEntry])
+async def get_team_leaderboard(
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Reads the maintained counters: no member rows are touched
+    teams = (await db.execute(
+        select(TeamModel.id, TeamModel.name, TeamModel.member_count, TeamModel.eco_score, TeamModel.total_emissions_saved)
+        .order_by(TeamModel.eco_score.desc(), TeamModel.id).offset(skip).limit(limit)
+    )).all()
+    return [
+        {
+            "rank": idx + 1 + skip,
+            "id": team.id,
+            "name": team.name,
+            "member_count": team.member_count,
+            "eco_score": team.eco_score,
+            "emissions_saved": team.total_emissions_saved,
+        }
+        for idx, team in enumerate(teams)
+    ]
+
+@router.post("/leave", response_model=Message)
+async def leave_team(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    async def write(session):
+        return await move_member(session, current_user.id, None)
+
+    left = await run_write(db, write, user_id=current_user.id)
+    return {"message": "Left team" if left is not None else "Not in a team"}
+
+@router.get("/{team_id}", response_model=Team)
+async def get_team(team_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await _get_team(db, team_id)
+
+@router.get("/{team_id}/leaderboard", response_model=List[LeaderboardEntry])
+async def get_team_members_leaderboard(
+    team_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_read_db)
+):
+    members = (await db.execute(
+        select(User.username, User.full_name, User.eco_score, User.total_emissions_saved)
+        .where(User.team_id == team_id)
+        .order_by(User.eco_score.desc()).offset(skip).limit(limit)
+    )).all()
+    return [
+        {
+            "rank": idx + 1 + skip,
+            "username": member.username,
+            "full_name": member.full_name or member.username,
+            "eco_score": float(member.eco_score or 0),
+            "emissions_saved": float(member.total_emissions_saved or 0),
+        }
+        for idx, member in enumerate(members)
+    ]
+
+@router.post("/{team_id}/join", response_model=Team)
+async def join_team(
+    team_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    async def write(session):
+        await _get_team(session, team_id)
+        await move_member(session, current_user.id, team_id)
+        return await _get_team(session, team_id)
+
+    return await run_write(db, write, user_id=current_user.id)
@@ -0,0 +1,196 @@
+"""
+Response compression: gzip, and Brotli when the `brotli` package is installed.
+
+CompressionMiddleware is plain ASGI like the rate limiter. A response is
+compressed when the client accepts an encoding we have, its content type is
+on the allowlist, and it is at least `minimum_size` bytes. Small JSON
+responses go out as they are: on a few hundred bytes compression costs more
+CPU than it saves in transfer.
+
+Single-message responses are compressed in one go. Streaming responses
+(StreamingResponse, anything sent with more_body) are compressed chunk by
+chunk and each chunk is flushed, so the client receives data as it is
+produced instead of after the whole body has been buffered.
+"""
+import zlib
+from typing import Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+def _parse_accept_encoding(value: str) -> dict:
+    """"gzip, br;q=0.8, *;q=0" -> {"gzip": 1.0, "br": 0.8, "*": 0.0}"""
+    codings = {}
+    for item in value.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, number = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = True) -> Optional[str]:
+    """The encoding to use for a request's Accept-Encoding header, or None."""
+    codings = _parse_accept_encoding(accept_encoding)
+    candidates = ("br", "gzip") if brotli_available else ("gzip",)
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = codings.get(coding, codings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        # wbits=31: gzip container rather than a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        content_types: Iterable[str] = ("application/json",),
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = frozenset(content_type.strip().lower() for content_type in content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _stream(self, encoding: str):
+        if encoding == "br":
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding, brotli is not None) if accept_encoding else None
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        stream = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, stream, passthrough
+            if passthrough:
+                return await send(message)
+
+            if message["type"] == "http.response.start":
+                if not self._eligible(message):
+                    passthrough = True
+                    return await send(message)
+                start = message  # held until the first body chunk shows the size
+                return
+
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is None:
+                if not more_body:
+                    # The whole body in one message: compress it only if it is worth it
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(start)
+                        return await send(message)
+                    compressed = self._stream(encoding).finish(body)
+                    await send(self._compressed_start(start, encoding, len(compressed)))
+                    return await send({"type": "http.response.body", "body": compressed})
+                stream = self._stream(encoding)
+                await send(self._compressed_start(start, encoding, None))
+
+            if more_body:
+                chunk = stream.compress(body)
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                return
+            await send({"type": "http.response.body", "body": stream.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressed_start(start, encoding: str, length: Optional[int]):
+        headers = []
+        vary = None
+        for name, value in start.get("headers", []):
+            lowered = name.lower()
+            if lowered == b"content-length":
+                continue
+            if lowered == b"vary":
+                vary = value
+                continue
+            if lowered == b"etag" and not value.startswith(b"W/"):
+                # A strong validator names exact bytes; the encoded body is different bytes
+                value = b"W/" + value
+            headers.append((name, value))
+        headers.append((b"content-encoding", encoding.encode("latin-1")))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower() and vary.strip() != b"*":
+            vary += b", Accept-Encoding"
+        headers.append((b"vary", vary))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode("latin-1")))
+        return {**start, "headers": headers}
+
+    def _eligible(self, start) -> bool:
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        content_type = b""
+        for name, value in start.get("headers", []):
+            name = name.lower()
+            if name == b"content-encoding":
+                return False  # already encoded
+            if name == b"cache-control" and b"no-transform" in value.lower():
+                return False
+            if name == b"content-type":
+                content_type = value
+            elif name == b"content-length" and int(value) < self.minimum_size:
+                return False
+        media_type = content_type.split(b";", 1)[0].strip().decode("latin-1").lower()
+        return media_type in self.content_types
@@ -10,18 +10,121 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./ecopulse.db"
+    DB_ASYNC: bool = True  # False runs the sync driver on the threadpool instead
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DATABASE_READ_URL: Optional[str] = None  # read replica for GET endpoints
+    READ_YOUR_WRITES_SECONDS: float = 0.0  # >0 reads a user's requests from the primary this long after they write
+    
+    # SQLite production mode: WAL, read-only request pool, single batching writer
+    SQLITE_PRODUCTION_MODE: bool = False
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_WRITE_BATCH_SIZE: int = 64
+    SQLITE_WRITE_BATCH_DELAY_MS: float = 2.0  # wait this long for more writes to join a batch
     
     # AI Service
     OPENROUTER_API_KEY: Optional[str] = None
     
+    # Savings forecasts (nightly job)
+    MONTHLY_SAVINGS_GOAL_KG: float = 30.0
+    FORECAST_WINDOW_DAYS: int = 56
+    FORECAST_EWMA_ALPHA: float = 0.3
+    FORECAST_CHUNK_SIZE: int = 5000
+    
+    # Log archival (nightly job): older logs move to eco_logs_archive
+    ARCHIVE_AFTER_DAYS: int = 365
+    ARCHIVE_CHUNK_SIZE: int = 500  # users per transaction
+    
+    # Parquet export for analytics (`python -m app.jobs.export_parquet`)
+    EXPORT_DIR: str = "./exports"
+    EXPORT_CHUNK_SIZE: int = 10000  # rows per read and per Parquet row group
+    EXPORT_SETTLE_SECONDS: int = 300  # rows younger than this wait for the next run, so in-flight writes aren't skipped
+    
+    # Outbox: side effects of writes, delivered after the request commits
+    OUTBOX_WORKER_IN_PROCESS: bool = True  # False when `python -m app.jobs.outbox_worker` runs separately
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10  # failing events are retried this often, then left for inspection
+    
+    # Savings percentile sketches
+    SAVINGS_SKETCH_ACCURACY: float = 0.01
+    SAVINGS_SKETCH_FLUSH_SECONDS: float = 30.0
+    
+    # Active-user counts (HyperLogLog sketches per day and activity type)
+    ACTIVE_USERS_HLL_PRECISION: int = 12  # 2**12 registers: 4 KiB per sketch, about 1.6% standard error
+    ACTIVE_USERS_FLUSH_SECONDS: float = 30.0
+    
+    # Rate limiting (token bucket per user and route group)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOG_WRITES_PER_MINUTE: float = 30.0
+    RATE_LIMIT_LOG_WRITES_BURST: int = 10
+    RATE_LIMIT_AI_PER_MINUTE: float = 6.0
+    RATE_LIMIT_AI_BURST: int = 3
+    RATE_LIMIT_REDIS_URL: Optional[str] = None  # shared buckets across workers (needs `redis`)
+    
+    # Observability
+    METRICS_ENABLED: bool = True  # request/DB metrics served at /metrics
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # per-logger overrides, e.g. "app.api=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_FORMAT: str = "json"  # or "text"
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01  # fraction of DEBUG records kept
+    
+    # Live updates (server-sent events)
+    LIVE_MAX_SUBSCRIBERS: int = 10000  # open streams per worker; more get 503
+    LIVE_SUBSCRIBER_BUFFER: int = 64  # events queued per stream before the client is evicted as too slow
+    LIVE_HEARTBEAT_SECONDS: float = 15.0  # comment line sent on idle streams, so proxies keep them open
+    LIVE_MAX_CONNECTION_SECONDS: float = 600.0  # streams are closed after this and the client reconnects
+    LIVE_RETRY_MS: int = 3000  # reconnect delay suggested to EventSource clients
+    
+    # Response compression (gzip, plus Brotli if the `brotli` package is installed)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller responses are sent as they are
+    COMPRESSION_CONTENT_TYPES: str = "application/json,application/x-ndjson,text/csv,text/plain,text/html"
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    
+    # Conditional GETs and memoized reads keyed by users.data_version
+    DATA_VERSION_MEMO_SIZE: int = 10000  # results kept per process; 0 turns memoization off
+    DATA_VERSION_WINDOW_SECONDS: float = 300.0  # how long a moving-window answer (last 7 days, this month) may be reused
+    
+    # Startup
+    WARMUP_ON_STARTUP: bool = False  # load lazy modules and open DB connections in the background after boot
+
+    # Server (`python -m app.server`)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None  # worker processes; one per available CPU when unset
+    DB_MAX_CONNECTIONS: Optional[int] = None  # database connection limit; caps workers so every pool fits
+    SERVER_PRELOAD: bool = True  # import the app once before forking, so workers share its memory
+    SERVER_BACKLOG: int = 2048  # connections queued by the kernel before accept
+    SERVER_KEEPALIVE_SECONDS: int = 65  # longer than the proxy's idle timeout, so the proxy closes first
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30  # in-flight requests get this long after SIGTERM
+    THREADPOOL_SIZE: int = 40  # AnyIO worker threads per process: sync endpoints, sync DB sessions, hashing
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
 
-def get_database_url():
-    database_url = Settings().DATABASE_URL
+# Parsed once; everything else reads this instance
+settings = Settings()
+
+def _normalize_database_url(database_url):
     if database_url.startswith("postgres://"):
         database_url = database_url.replace("postgres://", "postgresql://", 1)
     return database_url
 
-settings = Settings()
\ No newline at end of file
+def get_database_url():
+    return _normalize_database_url(settings.DATABASE_URL)
+
+def get_read_database_url():
+    read_url = settings.DATABASE_READ_URL
+    return _normalize_database_url(read_url) if read_url else None
+
+def get_async_database_url(database_url=None):
+    database_url = database_url or get_database_url()
+    if database_url.startswith("sqlite://"):
+        return database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if database_url.startswith("postgresql://"):
+        return database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return database_url
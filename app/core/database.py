@@ -1,22 +1,399 @@
-from sqlalchemy import create_engine
+import asyncio
+import time
+from typing import Optional
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from .config import get_database_url
+from sqlalchemy.orm import sessionmaker, Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from .config import settings, get_database_url, get_async_database_url, get_read_database_url
+from .metrics import instrument_engine, register_pool_gauges
+from .security import peek_user_id
+from .write_queue import WriteQueue
+
+DATABASE_URL = get_database_url()
+
+# Opt-in tuned SQLite: WAL, read-only request sessions and a single group-committing writer
+SQLITE_PRODUCTION_MODE = settings.SQLITE_PRODUCTION_MODE and DATABASE_URL.startswith("sqlite")
+
+def _sqlite_read_only_url(url: str) -> str:
+    prefix, path = url.split(":///", 1)
+    return f"{prefix}:///file:{path}?mode=ro&uri=true"
+
+def _configure_sqlite(sync_engine, read_only: bool):
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if not read_only:
+            # Let SQLAlchemy emit BEGIN itself so SAVEPOINT works with pysqlite/aiosqlite
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=1")
+        cursor.close()
+
+    if not read_only:
+        @event.listens_for(sync_engine, "begin")
+        def _on_begin(conn):
+            # Take the write lock up front instead of failing on lock upgrade
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+def _sqlite_connect_args(url: str) -> dict:
+    return {"check_same_thread": False} if "sqlite" in url else {}
 
 # Create SQLAlchemy engine
 engine = create_engine(
-    get_database_url(),
-    connect_args={"check_same_thread": False} if "sqlite" in get_database_url() else {}
+    DATABASE_URL,
+    connect_args=_sqlite_connect_args(DATABASE_URL),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
 )
 
+# Sync sessions for scripts, jobs and background threads
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_hooks(session):
+    for fn, args in session.info.pop("after_commit", ()):
+        fn(*args)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit_hooks(session):
+    session.info.pop("after_commit", None)
+
+def call_after_commit(session, fn, *args):
+    """
+    Run fn(*args) once the session's transaction commits, for in-process side
+    effects that must not happen if the write is rolled back.
+    """
+    session.info.setdefault("after_commit", []).append((fn, args))
+
+def as_dicts(result) -> list:
+    """
+    Rows of a column select as plain dicts. Response models validate dicts
+    several times faster than Row objects, which go through attribute lookup.
+    """
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+class _ThreadedNestedTransaction:
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+        self.transaction = None
+
+    async def __aenter__(self):
+        self.transaction = await run_in_threadpool(self.sync_session.begin_nested)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await run_in_threadpool(self.transaction.commit)
+        else:
+            await run_in_threadpool(self.transaction.rollback)
+
+
+class ThreadedSession:
+    """
+    AsyncSession-compatible wrapper around a sync Session, used when
+    DB_ASYNC is off. Every database call runs on the threadpool, so endpoints
+    are written once against the AsyncSession API and work in both modes.
+    """
+
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def info(self):
+        return self.sync_session.info
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def begin_nested(self):
+        return _ThreadedNestedTransaction(self.sync_session)
+
+    async def execute(self, statement, *args, **kwargs):
+        def execute():
+            result = self.sync_session.execute(statement, *args, **kwargs)
+            # Buffer rows on the worker thread, like AsyncSession does
+            return result.freeze() if getattr(result, "returns_rows", True) else result
+
+        result = await run_in_threadpool(execute)
+        return result() if callable(result) else result
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return (await self.execute(statement, *args, **kwargs)).scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def refresh(self, instance, *args, **kwargs):
+        await run_in_threadpool(self.sync_session.refresh, instance, *args, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+# Engine behind request sessions. In SQLite production mode requests only read,
+# through a pool of read-only connections; writes go through the write queue.
+request_engine = engine
+if SQLITE_PRODUCTION_MODE:
+    _configure_sqlite(engine, read_only=False)
+    request_engine = create_engine(
+        _sqlite_read_only_url(DATABASE_URL),
+        connect_args=_sqlite_connect_args(DATABASE_URL),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW
+    )
+    _configure_sqlite(request_engine, read_only=True)
+
+# Marks sessions that cannot write, for code that writes opportunistically
+_request_session_info = {"read_only": True} if SQLITE_PRODUCTION_MODE else None
+
+# Request sessions keep loaded attributes after commit, as AsyncSession requires
+ThreadedSessionLocal = sessionmaker(
+    autoflush=False, expire_on_commit=False, bind=request_engine, info=_request_session_info
+)
+ThreadedWriteSessionLocal = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+
+# A threaded request holds its connection while it waits for a worker thread.
+# Allowing more such sessions than pooled connections lets every worker thread
+# block on pool checkout while the connection holders wait for a thread, so
+# extra requests wait here, on the event loop, instead.
+_threaded_session_slots = asyncio.Semaphore(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+
+async_engine = None
+async_request_engine = None
+AsyncSessionLocal = None
+AsyncWriteSessionLocal = None
+if settings.DB_ASYNC:
+    # aiosqlite locally, asyncpg on Postgres
+    async_engine = create_async_engine(
+        get_async_database_url(),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW
+    )
+    async_request_engine = async_engine
+    if SQLITE_PRODUCTION_MODE:
+        _configure_sqlite(async_engine.sync_engine, read_only=False)
+        async_request_engine = create_async_engine(
+            _sqlite_read_only_url(get_async_database_url()),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW
+        )
+        _configure_sqlite(async_request_engine.sync_engine, read_only=True)
+
+    AsyncSessionLocal = async_sessionmaker(
+        async_request_engine, autoflush=False, expire_on_commit=False, info=_request_session_info
+    )
+    AsyncWriteSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Optional read replica. GET endpoints read through get_read_db, which uses it
+# when configured; everything else stays on the primary.
+DATABASE_READ_URL = get_read_database_url()
+_replica_session_info = {"read_only": True, "replica": True}
+
+read_engine = None
+ThreadedReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+if DATABASE_READ_URL:
+    _replica_read_only = SQLITE_PRODUCTION_MODE and DATABASE_READ_URL.startswith("sqlite")
+    read_engine = create_engine(
+        _sqlite_read_only_url(DATABASE_READ_URL) if _replica_read_only else DATABASE_READ_URL,
+        connect_args=_sqlite_connect_args(DATABASE_READ_URL),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW
+    )
+    if _replica_read_only:
+        _configure_sqlite(read_engine, read_only=True)
+    ThreadedReadSessionLocal = sessionmaker(
+        autoflush=False, expire_on_commit=False, bind=read_engine, info=_replica_session_info
+    )
+
+    if settings.DB_ASYNC:
+        async_read_url = get_async_database_url(DATABASE_READ_URL)
+        async_read_engine = create_async_engine(
+            _sqlite_read_only_url(async_read_url) if _replica_read_only else async_read_url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW
+        )
+        if _replica_read_only:
+            _configure_sqlite(async_read_engine.sync_engine, read_only=True)
+        AsyncReadSessionLocal = async_sessionmaker(
+            async_read_engine, autoflush=False, expire_on_commit=False, info=_replica_session_info
+        )
+
+
+class RecentWriters:
+    """
+    Users who wrote within the last `window` seconds, so their reads can go to
+    the primary until the replica has caught up. Kept per process: with
+    several workers it only covers reads that land on the worker that took
+    the write.
+    """
+
+    def __init__(self, window: float, max_users: int = 100_000, clock=time.monotonic):
+        self.window = window
+        self.max_users = max_users
+        self._clock = clock
+        self._until = {}  # user_id -> monotonic deadline
+
+    def record(self, user_id: int):
+        now = self._clock()
+        if len(self._until) >= self.max_users:
+            self._until = {uid: until for uid, until in self._until.items() if until > now}
+        self._until[user_id] = now + self.window
+
+    def wrote_recently(self, user_id: int) -> bool:
+        until = self._until.get(user_id)
+        if until is None:
+            return False
+        if until <= self._clock():
+            del self._until[user_id]
+            return False
+        return True
+
+
+recent_writers = (
+    RecentWriters(settings.READ_YOUR_WRITES_SECONDS)
+    if DATABASE_READ_URL and settings.READ_YOUR_WRITES_SECONDS > 0 else None
+)
+
+
+def new_session():
+    """A request-style session for the configured mode (AsyncSession or ThreadedSession)."""
+    if AsyncSessionLocal is not None:
+        return AsyncSessionLocal()
+    return ThreadedSession(ThreadedSessionLocal())
+
+def new_write_session():
+    """Like new_session, but always on the read-write engine."""
+    if AsyncWriteSessionLocal is not None:
+        return AsyncWriteSessionLocal()
+    return ThreadedSession(ThreadedWriteSessionLocal())
+
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    async with _threaded_session_slots:
+        db = ThreadedSession(ThreadedSessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+async def get_read_db(request: Request, db=Depends(get_db)):
+    """
+    Session for read-only endpoints: the replica when one is configured,
+    otherwise the request's primary session. With READ_YOUR_WRITES_SECONDS
+    set, a user who just wrote keeps reading from the primary for that long.
+    """
+    replica_factory = AsyncReadSessionLocal or ThreadedReadSessionLocal
+    if replica_factory is None:
         yield db
+        return
+
+    if recent_writers is not None:
+        user_id = peek_user_id(request.headers.get("authorization"))
+        if user_id is not None and user_id.isdigit() and recent_writers.wrote_recently(int(user_id)):
+            yield db
+            return
+
+    if AsyncReadSessionLocal is not None:
+        async with AsyncReadSessionLocal() as read_db:
+            yield read_db
+        return
+
+    # The request already holds a threaded-session slot through get_db
+    read_db = ThreadedSession(ThreadedReadSessionLocal())
+    try:
+        yield read_db
     finally:
-        db.close()
\ No newline at end of file
+        await read_db.close()
+
+
+if settings.METRICS_ENABLED:
+    _pools = {
+        "primary": async_engine or engine,
+        "primary_read_only": async_request_engine if SQLITE_PRODUCTION_MODE else None,
+        "replica": async_read_engine or read_engine,
+    }
+    # Threaded sessions and jobs use the sync engines even in async mode
+    for _engine in {engine, request_engine, read_engine, *_pools.values()}:
+        if _engine is not None:
+            instrument_engine(getattr(_engine, "sync_engine", _engine))
+    register_pool_gauges(_pools)
+
+
+write_queue = WriteQueue(
+    new_write_session,
+    max_batch=settings.SQLITE_WRITE_BATCH_SIZE,
+    max_delay=settings.SQLITE_WRITE_BATCH_DELAY_MS / 1000
+) if SQLITE_PRODUCTION_MODE else None
+
+def dispose_after_fork():
+    """
+    Give a forked worker pools of its own. Connections the parent opened are
+    forgotten, not closed, so the parent's sockets are left alone.
+    """
+    for _engine in {engine, request_engine, read_engine, async_engine, async_request_engine, async_read_engine}:
+        if _engine is not None:
+            getattr(_engine, "sync_engine", _engine).dispose(close=False)
+
+async def run_write(db, unit, user_id: Optional[int] = None):
+    """
+    Run a write unit - `async def unit(session)` - and commit it, returning
+    its result. Normally the unit runs on the request's own session. In SQLite
+    production mode it is queued to the single writer and committed together
+    with other queued units, so it must load what it changes through `session`.
+    `user_id` marks whose data changed, for read-your-writes routing.
+    """
+    if write_queue is not None:
+        result = await write_queue.submit(unit)
+    else:
+        result = await unit(db)
+        await db.commit()
+    if recent_writers is not None and user_id is not None:
+        recent_writers.record(user_id)
+    return result
@@ -1,15 +1,16 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from ..core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.database import get_db, get_read_db
 from ..core.security import verify_token
 from ..models.user import User
 
 security = HTTPBearer()
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
 ) -> User:
     token = credentials.credentials
     user_id = verify_token(token)
@@ -20,11 +21,14 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await db.get(User, int(user_id))
+    if user is None and db is not primary_db:
+        # Just signed up: the replica may not have the account yet
+        user = await primary_db.get(User, int(user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,264 @@
+"""
+In-process metrics in the Prometheus text format.
+
+MetricsMiddleware times every HTTP request and labels it with the matched
+route template (never the raw path, which would explode label cardinality).
+Cursor-execute hooks on the engines count queries and DB time into the
+current request's QueryStats through a context variable. Like the rate
+limiter, the middleware is plain ASGI, and its hot path is a couple of clock
+reads and dict updates on the event-loop thread, so it can stay on in
+production. The numbers are per worker process.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, labels=()):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labelnames + ("le",)
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(names, labels + (_format_value(float(bound)),))} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(names, labels + ('+Inf',))} {series[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(float(series[-2]))}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}"
+
+
+class Gauge:
+    """A gauge read by calling `sample()` at scrape time, which returns {labels: value}."""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), sample=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.sample = sample
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.sample().items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                # One broken gauge must not take the whole scrape down
+                lines.append(f"# {metric.name} unavailable: {e}")
+        return "\n".join(lines) + "\n"
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Stats of the request being handled. Threadpool calls copy the context, so
+# queries run there are counted too; the object is shared, not the variable.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is not None and context is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - context._metrics_started
+
+def instrument_engine(sync_engine):
+    """Count queries and DB time of `sync_engine` (use `.sync_engine` for async engines)."""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+registry = MetricsRegistry()
+
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+))
+requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP responses by route and status code.", ("method", "route", "status")
+))
+requests_in_progress = 0
+registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests being handled.",
+    sample=lambda: {(): requests_in_progress},
+))
+request_queries = registry.register(Histogram(
+    "db_queries_per_request", "Database queries issued per HTTP request.", ("route",),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+request_db_time = registry.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in database queries per HTTP request.", ("route",)
+))
+queries_total = registry.register(Counter(
+    "db_queries_total", "Database queries issued while handling HTTP requests."
+))
+
+
+def register_pool_gauges(engines: dict):
+    """Checkout gauges for named SQLAlchemy pools, e.g. {"primary": engine}."""
+    def sample(read):
+        return {(name,): read(engine.pool) for name, engine in engines.items() if engine is not None}
+
+    registry.register(Gauge(
+        "db_pool_checked_out", "Connections currently checked out of the pool.", ("pool",),
+        sample=lambda: sample(lambda pool: pool.checkedout()),
+    ))
+    registry.register(Gauge(
+        "db_pool_size", "Configured pool size (excluding overflow).", ("pool",),
+        sample=lambda: sample(lambda pool: pool.size()),
+    ))
+    registry.register(Gauge(
+        "db_pool_overflow", "Overflow connections currently open (negative while below pool size).", ("pool",),
+        sample=lambda: sample(lambda pool: pool.overflow()),
+    ))
+
+
+def _threadpool_sample(attribute):
+    from anyio.to_thread import current_default_thread_limiter
+    return {(): getattr(current_default_thread_limiter(), attribute)}
+
+registry.register(Gauge(
+    "threadpool_busy_threads", "Worker threads in use by run_in_threadpool and sync endpoints.",
+    sample=lambda: _threadpool_sample("borrowed_tokens"),
+))
+registry.register(Gauge(
+    "threadpool_max_threads", "Size of the AnyIO worker thread pool.",
+    sample=lambda: _threadpool_sample("total_tokens"),
+))
+
+
+def route_template(scope) -> str:
+    """
+    The matched route's full path template, e.g. "/api/logs/{log_id}".
+    Routes of an included router only know their own part of the path, so
+    the router prefix is recovered from the request path.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    try:
+        rendered = path_format.format(**{k: str(v) for k, v in scope.get("path_params", {}).items()})
+    except (KeyError, IndexError, ValueError):
+        return path_format
+    path = scope["path"]
+    if rendered and path.endswith(rendered):
+        return path[: len(path) - len(rendered)] + path_format
+    return path_format
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global requests_in_progress
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        requests_in_progress += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            requests_in_progress -= 1
+            current_query_stats.reset(token)
+
+            route = route_template(scope)
+            method = scope["method"]
+            request_duration.observe(elapsed, (method, route))
+            requests_total.inc((method, route, status_code))
+            request_queries.observe(stats.count, (route,))
+            request_db_time.observe(stats.seconds, (route,))
+            if stats.count:
+                queries_total.inc(amount=stats.count)
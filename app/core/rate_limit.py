@@ -0,0 +1,193 @@
+"""
+Token-bucket rate limiting per user and route group.
+
+RateLimitMiddleware is a plain ASGI middleware: requests that match no rule
+pass straight through, and matching requests cost one token from the bucket
+keyed by (rule, user). Users are identified from the bearer token, falling
+back to the client address. Buckets live in memory per worker by default, or
+in Redis when RATE_LIMIT_REDIS_URL is set so every worker shares them.
+"""
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from .security import peek_user_id
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    name: str
+    methods: frozenset
+    path_prefix: str
+    rate: float  # tokens refilled per second
+    capacity: int  # burst size
+
+
+class BucketStore:
+    """Interface for bucket backends."""
+
+    async def take(self, key: str, rate: float, capacity: int, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens from the bucket. Returns 0 when allowed, otherwise
+        the number of seconds until enough tokens will be available.
+        """
+        raise NotImplementedError
+
+
+class InMemoryBucketStore(BucketStore):
+    """Buckets in a dict, for one worker. Only touched from the event loop, so no locking."""
+
+    def __init__(self, max_keys: int = 100_000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = {}  # key -> (tokens, updated_at, full_at)
+
+    async def take(self, key: str, rate: float, capacity: int, cost: float = 1.0) -> float:
+        return self.take_now(key, rate, capacity, cost)
+
+    def take_now(self, key: str, rate: float, capacity: int, cost: float = 1.0) -> float:
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._evict(now)
+            tokens = capacity
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        return retry_after
+
+    def _evict(self, now: float):
+        # A bucket that has refilled is the same as no bucket at all
+        full = [key for key, bucket in self._buckets.items() if bucket[2] <= now]
+        for key in full:
+            del self._buckets[key]
+        # Still over the limit: drop the oldest half rather than grow unbounded
+        if len(self._buckets) >= self.max_keys:
+            for key in list(self._buckets)[: len(self._buckets) // 2]:
+                del self._buckets[key]
+
+
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisBucketStore(BucketStore):
+    """Buckets shared by every worker, updated atomically by a Lua script."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL requires the `redis` package") from e
+        self.prefix = prefix
+        self._redis = aioredis.from_url(url)
+        self._take = self._redis.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, rate: float, capacity: int, cost: float = 1.0) -> float:
+        return float(await self._take(keys=[self.prefix + key], args=[rate, capacity, cost]))
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, rules, store: Optional[BucketStore] = None):
+        self.app = app
+        self.rules = list(rules)
+        self.store = store or InMemoryBucketStore()
+
+    def _match(self, method: str, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if method in rule.methods and path.startswith(rule.path_prefix):
+                return rule
+        return None
+
+    @staticmethod
+    def _identity(scope) -> str:
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        user_id = peek_user_id(authorization)
+        if user_id is not None:
+            return f"user:{user_id}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rule = self._match(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            retry_after = await self.store.take(f"{rule.name}:{self._identity(scope)}", rule.rate, rule.capacity)
+        except Exception:
+            # Fail open: a broken shared store must not take the API down
+            logger.warning("rate limit store error", exc_info=True)
+            retry_after = 0.0
+
+        if retry_after <= 0:
+            return await self.app(scope, receive, send)
+
+        response = JSONResponse(
+            {"detail": "Too many requests"},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+        await response(scope, receive, send)
+
+
+def rules_from_settings(settings):
+    return [
+        RateLimitRule(
+            name="log_writes",
+            methods=frozenset({"POST", "PUT", "DELETE"}),
+            path_prefix="/api/logs",
+            rate=settings.RATE_LIMIT_LOG_WRITES_PER_MINUTE / 60.0,
+            capacity=settings.RATE_LIMIT_LOG_WRITES_BURST,
+        ),
+        RateLimitRule(
+            name="ai",
+            methods=frozenset({"POST"}),
+            path_prefix="/api/ai",
+            rate=settings.RATE_LIMIT_AI_PER_MINUTE / 60.0,
+            capacity=settings.RATE_LIMIT_AI_BURST,
+        ),
+    ]
+
+
+def store_from_settings(settings) -> BucketStore:
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisBucketStore(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryBucketStore()
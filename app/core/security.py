@@ -1,13 +1,20 @@
 # core/security.py
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from jose import jwt
 from typing import Optional
-from passlib.context import CryptContext
 from .config import settings
 
-# Use Argon2 first (new hashes) but keep bcrypt in schemes so old hashes still verify.
-# Passlib will create new hashes using the first scheme in the list (argon2).
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    # passlib and its hash backends are only needed by signup and login, so
+    # they are imported on first use rather than at startup
+    from passlib.context import CryptContext
+    
+    # Use Argon2 first (new hashes) but keep bcrypt in schemes so old hashes still verify.
+    # Passlib will create new hashes using the first scheme in the list (argon2).
+    return CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -27,21 +34,46 @@ def verify_token(token: str) -> Optional[str]:
     except jwt.JWTError:
         return None
 
+@lru_cache(maxsize=4096)
+def _token_claims(token: str) -> Optional[tuple]:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.JWTError:
+        return None
+    return payload.get("sub"), payload.get("exp")
+
+def peek_user_id(authorization: Optional[str]) -> Optional[str]:
+    """
+    User id from an "Authorization: Bearer ..." header value, with verified
+    tokens cached. Only for bucketing requests by user (rate limits, routing)
+    before the endpoint runs; authentication still goes through verify_token.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    claims = _token_claims(authorization[7:])
+    if claims is None:
+        return None
+    user_id, exp = claims
+    # A cached token stays in the cache past its expiry
+    if exp is not None and exp <= time.time():
+        return None
+    return user_id
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain password against a stored hash. Works for both bcrypt and argon2 hashes.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """
     Hash the provided password. New hashes will use Argon2 (since it's first in schemes).
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def needs_rehash(hashed_password: str) -> bool:
     """
     Return True if the given hash should be rehashed according to current policy (e.g. upgrade from bcrypt -> argon2).
     Use this after successful verification to migrate hashes.
     """
-    return pwd_context.needs_update(hashed_password)
+    return get_pwd_context().needs_update(hashed_password)
@@ -0,0 +1,53 @@
+"""
+Optional post-boot warmup (WARMUP_ON_STARTUP).
+
+Startup only imports what serving a request needs; password hashing and the
+HTTP client for the AI service load on first use. On an instance that was
+asleep that first use lands on a user's request, so warmup does it right
+after the app starts accepting connections instead, together with opening a
+connection on each database engine. It runs in a worker thread and never
+delays startup; a failure is logged and otherwise ignored.
+"""
+import logging
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from . import database
+from .security import get_pwd_context
+
+logger = logging.getLogger(__name__)
+
+
+def _load_lazy_modules():
+    # Resolve the backend new hashes use (argon2-cffi) without hashing anything;
+    # the bcrypt one only loads for the old hashes that still need it
+    get_pwd_context().handler().get_backend()
+    import requests  # noqa: F401 - used by the AI service
+
+
+def _connect_engines():
+    for engine in (database.engine, database.request_engine, database.read_engine):
+        if engine is not None:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+
+async def _connect_async_engines():
+    for engine in (database.async_engine, database.async_request_engine, database.async_read_engine):
+        if engine is not None:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+
+async def warm_up():
+    started = time.perf_counter()
+    try:
+        await run_in_threadpool(_load_lazy_modules)
+        await run_in_threadpool(_connect_engines)
+        await _connect_async_engines()
+    except Exception:
+        logger.exception("warmup failed")
+        return
+    logger.info("warmup done", extra={"seconds": round(time.perf_counter() - started, 3)})
@@ -0,0 +1,95 @@
+"""
+Single-writer queue with group commit.
+
+SQLite allows one writer at a time, so letting every request open its own
+write transaction just moves the queueing into busy_timeout retries. Instead
+requests submit write units - `async def unit(session)` - to one writer task,
+which runs everything queued in a single transaction, each unit inside its
+own SAVEPOINT, and commits once. A unit that raises is rolled back alone and
+its caller gets the exception; the rest of the batch still commits.
+"""
+import asyncio
+import contextvars
+
+
+class WriteQueue:
+    def __init__(self, session_factory, max_batch: int = 64, max_delay: float = 0.0):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._loop = None
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        # A fresh context, so the writer does not inherit the request that started it
+        self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self):
+        """Commit whatever is queued, then stop the writer task."""
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, unit):
+        self.start()
+        future = self._loop.create_future()
+        self._queue.put_nowait((unit, future))
+        return await future
+
+    def _drain(self, batch):
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            self._drain(batch)
+            if len(batch) < self.max_batch and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+                self._drain(batch)
+
+            if None in batch:
+                stopping = True
+                batch = [item for item in batch if item is not None]
+            if batch:
+                await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch):
+        outcomes = []
+        try:
+            async with self.session_factory() as session:
+                for unit, future in batch:
+                    hooks = session.info.setdefault("after_commit", [])
+                    hook_count = len(hooks)
+                    try:
+                        async with session.begin_nested():
+                            result = await unit(session)
+                    except Exception as e:
+                        # Side effects of a rolled-back unit must not run on commit
+                        del session.info.get("after_commit", [])[hook_count:]
+                        outcomes.append((future, None, e))
+                    else:
+                        outcomes.append((future, result, None))
+                await session.commit()
+        except Exception as e:
+            # The whole batch is lost; units that had succeeded fail with the commit error
+            outcomes = [
+                (future, None, error or e) for future, _, error in outcomes
+            ] + [(future, None, e) for _, future in batch[len(outcomes):]]
+
+        for future, result, error in outcomes:
+            if future.done():
+                continue  # caller went away
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
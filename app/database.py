@@ -0,0 +1,7 @@
+"""
+Import path kept for scripts and tests written before the database module
+moved to app.core.database. Importing it also registers every model, so
+Base.metadata.create_all() sees all tables.
+"""
+from .core.database import Base, SessionLocal, engine, get_db  # noqa: F401
+from .models import analytics, badge, forecast, log, outbox, savings, team, user  # noqa: F401
@@ -0,0 +1,33 @@
+"""
+Nightly log archival: move logs older than ARCHIVE_AFTER_DAYS to
+eco_logs_archive, leaving per-day summary rows in eco_logs.
+
+Run with:
+    python -m app.jobs.archive_logs [--after-days N]
+"""
+import argparse
+from datetime import datetime
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.badge import UserBadge  # noqa: F401 - registers the User.badges mapper
+from ..services.archive import archive_cutoff, archive_logs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old eco logs.")
+    parser.add_argument("--after-days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                        help="archive logs older than this many days")
+    args = parser.parse_args()
+    cutoff = archive_cutoff(datetime.utcnow(), args.after_days)
+
+    db = SessionLocal()
+    try:
+        moved = archive_logs(db, cutoff, settings.ARCHIVE_CHUNK_SIZE)
+    finally:
+        db.close()
+    print(f"Archived {moved} logs dated before {cutoff.date().isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
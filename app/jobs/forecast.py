@@ -0,0 +1,183 @@
+"""
+Nightly savings forecast job.
+
+Loads per-user daily emissions for the last FORECAST_WINDOW_DAYS in chunks of
+users, fits an EWMA level and a linear trend for the whole chunk at once with
+NumPy, and stores one UserForecast row per user so the insights endpoint only
+needs a primary-key lookup.
+
+Run with:
+    python -m app.jobs.forecast [--as-of YYYY-MM-DD]
+"""
+import argparse
+import calendar
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select, delete, insert, update, func
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.user import User
+from ..models.log import EcoLog
+from ..models.badge import UserBadge  # noqa: F401 - registers the User.badges mapper
+from ..models.forecast import UserForecast
+
+
+def _normal_cdf(z):
+    # Abramowitz & Stegun 7.1.26 erf approximation (abs error < 1.5e-7)
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+def fit_trends(daily, month_to_date, days_remaining: int, goal: float, alpha: float = 0.3) -> dict:
+    """
+    Fit every row of `daily` (users x days, oldest first, last column is the
+    as-of day) in one pass. Returns arrays keyed by level (EWMA of daily
+    savings), trend (least-squares slope), projected (month-to-date plus the
+    remaining days) and probability (chance of finishing the month >= goal).
+    """
+    daily = np.asarray(daily, dtype=np.float64)
+    n_days = daily.shape[1]
+    t = np.arange(n_days, dtype=np.float64)
+
+    # EWMA at the last day as a single weighted dot product
+    weights = alpha * (1.0 - alpha) ** (n_days - 1 - t)
+    level = daily @ weights / weights.sum()
+
+    # Ordinary least squares on centered time
+    t_centered = t - t.mean()
+    mean = daily.mean(axis=1)
+    trend = (daily - mean[:, None]) @ t_centered / (t_centered @ t_centered)
+    residuals = daily - (mean[:, None] + trend[:, None] * t_centered)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / max(n_days - 2, 1))
+
+    # Walk the EWMA level along the trend for each remaining day, never below zero
+    ahead = np.arange(1, days_remaining + 1, dtype=np.float64)
+    remaining = np.clip(level[:, None] + trend[:, None] * ahead, 0.0, None).sum(axis=1)
+    projected = np.asarray(month_to_date, dtype=np.float64) + remaining
+
+    # Daily noise is treated as independent, so the spread grows with sqrt(days)
+    spread = sigma * np.sqrt(days_remaining)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(
+            spread > 0,
+            (projected - goal) / spread,
+            np.where(projected >= goal, np.inf, -np.inf),
+        )
+
+    return {
+        "level": level,
+        "trend": trend,
+        "projected": projected,
+        "probability": _normal_cdf(z),
+    }
+
+
+def iter_user_id_chunks(db, chunk_size: int):
+    """Yield ascending lists of user ids, keyset-paginated."""
+    last_id = 0
+    while True:
+        ids = db.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def load_daily_matrix(db, user_ids, start: date, n_days: int) -> np.ndarray:
+    """
+    Load daily emission totals for a chunk of users into a dense
+    (len(user_ids), n_days) matrix with one grouped query.
+    """
+    day = func.date(EcoLog.activity_date)
+    rows = db.execute(
+        select(EcoLog.user_id, day, func.sum(EcoLog.emissions_saved))
+        .where(
+            EcoLog.user_id >= user_ids[0],
+            EcoLog.user_id <= user_ids[-1],
+            EcoLog.activity_date >= datetime.combine(start, datetime.min.time()),
+        )
+        .group_by(EcoLog.user_id, day)
+    ).all()
+
+    matrix = np.zeros((len(user_ids), n_days))
+    if not rows:
+        return matrix
+
+    # Columnar arrays for the whole chunk, then one scatter-add
+    ids = np.asarray(user_ids)
+    row_uid, row_day, row_total = (np.asarray(col) for col in zip(*rows))
+    row_idx = np.clip(np.searchsorted(ids, row_uid), 0, len(ids) - 1)
+    col_idx = (row_day.astype("datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+    keep = (ids[row_idx] == row_uid) & (col_idx >= 0) & (col_idx < n_days)
+    np.add.at(matrix, (row_idx[keep], col_idx[keep]), row_total[keep].astype(np.float64))
+    return matrix
+
+
+def run_forecasts(db, as_of: date) -> int:
+    """
+    Forecast every user as of the end of `as_of` and replace their
+    UserForecast rows. Returns the number of users processed.
+    """
+    days_in_month = calendar.monthrange(as_of.year, as_of.month)[1]
+    # The window always covers the whole month so far
+    n_days = max(settings.FORECAST_WINDOW_DAYS, as_of.day)
+    start = as_of - timedelta(days=n_days - 1)
+    month_offset = n_days - as_of.day
+    days_remaining = days_in_month - as_of.day
+    goal = settings.MONTHLY_SAVINGS_GOAL_KG
+    computed_at = datetime.utcnow()
+
+    processed = 0
+    for user_ids in iter_user_id_chunks(db, settings.FORECAST_CHUNK_SIZE):
+        daily = load_daily_matrix(db, user_ids, start, n_days)
+        month_to_date = daily[:, month_offset:].sum(axis=1)
+        fit = fit_trends(daily, month_to_date, days_remaining, goal, settings.FORECAST_EWMA_ALPHA)
+
+        rows = [
+            {
+                "user_id": user_id,
+                "month": as_of.strftime("%Y-%m"),
+                "month_to_date": float(month_to_date[i]),
+                "projected_monthly_total": float(fit["projected"][i]),
+                "goal_kg": goal,
+                "goal_probability": float(fit["probability"][i]),
+                "daily_trend": float(fit["trend"][i]),
+                "daily_level": float(fit["level"][i]),
+                "computed_at": computed_at,
+            }
+            for i, user_id in enumerate(user_ids)
+        ]
+        db.execute(delete(UserForecast).where(UserForecast.user_id.in_(user_ids)))
+        db.execute(insert(UserForecast), rows)
+        # New forecasts are new data: invalidates the users' insight ETags
+        db.execute(update(User).where(User.id.in_(user_ids)).values(data_version=User.data_version + 1))
+        db.commit()
+        processed += len(user_ids)
+
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute monthly savings forecasts for all users.")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="last complete day to forecast from (default: yesterday, UTC)")
+    args = parser.parse_args()
+    as_of = args.as_of or (datetime.utcnow().date() - timedelta(days=1))
+
+    db = SessionLocal()
+    try:
+        processed = run_forecasts(db, as_of)
+    finally:
+        db.close()
+    print(f"Forecast {processed} users as of {as_of.isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
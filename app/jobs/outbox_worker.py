@@ -0,0 +1,63 @@
+"""
+Deliver outbox events from a process of its own, for deployments that run
+the web workers with OUTBOX_WORKER_IN_PROCESS=false. Several of these, and
+in-process workers, can drain the same table at once.
+
+Run with:
+    python -m app.jobs.outbox_worker [--once]
+"""
+import argparse
+import logging
+import signal
+import sys
+import time
+
+from ..core.config import settings
+from ..core.structured_logging import setup_logging
+from ..models.user import User  # noqa: F401 - registers mappers used by the handlers
+from ..models.badge import UserBadge  # noqa: F401
+from ..services import savings_stats
+from ..services.outbox import worker
+
+logger = logging.getLogger(__name__)
+
+
+def drain_batch() -> int:
+    """
+    Deliver one batch. savings.delta handlers only record sketch deltas in
+    this process, and there is no web app here to flush them, so flush
+    after every batch that delivered something.
+    """
+    picked_up = worker.drain_once()
+    if picked_up:
+        savings_stats.flush_sketches()
+    return picked_up
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver pending outbox events.")
+    parser.add_argument("--once", action="store_true", help="drain what is pending, then exit")
+    args = parser.parse_args()
+    setup_logging(settings)
+    # Stop through the finally below, so recorded deltas are not lost
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    delivered = 0
+    try:
+        while True:
+            picked_up = drain_batch()
+            delivered += picked_up
+            if picked_up >= worker.batch_size:
+                continue
+            if args.once:
+                break
+            if picked_up:
+                logger.info("outbox drained", extra={"picked_up": picked_up, "lag_seconds": worker.lag_seconds})
+            time.sleep(worker.poll_seconds)
+    finally:
+        savings_stats.flush_sketches()
+    print(f"Picked up {delivered} outbox events")
+
+
+if __name__ == "__main__":
+    main()
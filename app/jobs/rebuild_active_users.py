@@ -0,0 +1,31 @@
+"""
+Recompute the daily active-user sketches from eco_logs.
+
+Run with:
+    python -m app.jobs.rebuild_active_users [--days N]
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from ..core.database import SessionLocal
+from ..models.user import User  # noqa: F401 - registers mappers used by EcoLog
+from ..models.badge import UserBadge  # noqa: F401
+from ..services.active_users import rebuild_active_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute the daily active-user sketches.")
+    parser.add_argument("--days", type=int, default=30, help="days to rebuild, up to today (30 covers MAU)")
+    args = parser.parse_args()
+
+    since = datetime.utcnow().date() - timedelta(days=args.days - 1)
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_active_users(db, since)
+    finally:
+        db.close()
+    print(f"Rebuilt active-user sketches for {rebuilt} days since {since}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Recompute every user's activity-day bitmap from their logs.
+
+Run with:
+    python -m app.jobs.rebuild_activity_days
+"""
+from ..core.database import SessionLocal
+from ..models.badge import UserBadge  # noqa: F401 - registers the User.badges mapper
+from ..models.team import Team  # noqa: F401 - registers the users.team_id target
+from ..services.activity_days import rebuild_activity_days
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_activity_days(db)
+    finally:
+        db.close()
+    print(f"Rebuilt activity days for {rebuilt} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Backfill the savings totals and percentile sketches from eco_logs.
+
+Run with:
+    python -m app.jobs.rebuild_savings_stats
+"""
+from ..core.database import SessionLocal
+from ..models.user import User  # noqa: F401 - registers mappers used by EcoLog
+from ..models.badge import UserBadge  # noqa: F401
+from ..services.savings_stats import rebuild_savings_stats
+
+
+def main():
+    db = SessionLocal()
+    try:
+        written = rebuild_savings_stats(db)
+    finally:
+        db.close()
+    print(f"Rebuilt savings stats: {written} totals")
+
+
+if __name__ == "__main__":
+    main()
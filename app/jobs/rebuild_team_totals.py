@@ -0,0 +1,23 @@
+"""
+Recompute every team's member count and totals from its members.
+
+Run with:
+    python -m app.jobs.rebuild_team_totals
+"""
+from ..core.database import SessionLocal
+from ..models.log import EcoLog  # noqa: F401 - registers mappers used by User
+from ..models.badge import UserBadge  # noqa: F401
+from ..services.teams import rebuild_team_totals
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_team_totals(db)
+    finally:
+        db.close()
+    print(f"Rebuilt totals for {rebuilt} teams")
+
+
+if __name__ == "__main__":
+    main()
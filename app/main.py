@@ -1,9 +1,48 @@
+import asyncio
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
-from app.api.endpoints import auth, logs, dashboard, insights, leaderboard, profile, ai
+from app.core.database import write_queue
+from app.core import metrics
+from app.core.compression import CompressionMiddleware
+from app.core.structured_logging import RequestIdMiddleware, setup_logging
+from app.core.warmup import warm_up
+from app.schemas.common import ApiInfo, HealthStatus
+from app.core.rate_limit import RateLimitMiddleware, rules_from_settings, store_from_settings
+from app.api.endpoints import auth, logs, dashboard, insights, leaderboard, profile, ai, live, teams, admin
+from app.services import active_users, outbox, savings_stats
 
-app = FastAPI(title=settings.PROJECT_NAME)
+log_listener = setup_logging(settings)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync endpoints, threaded DB sessions and password hashing share this pool
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    flush_task = asyncio.create_task(savings_stats.run_flush_loop())
+    active_users_task = asyncio.create_task(active_users.run_flush_loop())
+    outbox_task = asyncio.create_task(outbox.worker.run()) if settings.OUTBOX_WORKER_IN_PROCESS else None
+    if write_queue is not None:
+        write_queue.start()
+    # In the background, so the server accepts connections straight away
+    warmup_task = asyncio.create_task(warm_up()) if settings.WARMUP_ON_STARTUP else None
+    yield
+    flush_task.cancel()
+    active_users_task.cancel()
+    if outbox_task is not None:
+        outbox_task.cancel()
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if write_queue is not None:
+        await write_queue.stop()
+    # Persist whatever this worker recorded since the last flush
+    await run_in_threadpool(savings_stats.flush_sketches)
+    await run_in_threadpool(active_users.flush_active_users)
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # CORS middleware - Updated for frontend connections
 origins = [
@@ -18,6 +57,14 @@ origins = [
     "http://127.0.0.1:3000",
 ]
 
+# Added before CORS so 429 responses still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=rules_from_settings(settings),
+        store=store_from_settings(settings),
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -26,19 +73,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresses whatever the app and the middleware above produced
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        content_types=settings.COMPRESSION_CONTENT_TYPES.split(","),
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Outermost, so it also times rate-limited and CORS-rejected requests
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Request ids for log correlation, set before anything else runs
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(logs.router, prefix="/api/logs", tags=["logs"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 app.include_router(insights.router, prefix="/api/insights", tags=["insights"])
 app.include_router(leaderboard.router, prefix="/api/leaderboard", tags=["leaderboard"])
+app.include_router(teams.router, prefix="/api/teams", tags=["teams"])
 app.include_router(profile.router, prefix="/api/profile", tags=["profile"])
 app.include_router(ai.router, prefix="/api/ai", tags=["ai"])
+app.include_router(live.router, prefix="/api/live", tags=["live"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
-@app.get("/")
-def read_root():
+@app.get("/", response_model=ApiInfo)
+async def read_root():
     return {"message": "Welcome to EcoPulse API", "version": "1.0.0"}
 
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+@app.get("/health", response_model=HealthStatus)
+async def health_check():
+    return {"status": "healthy"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Date, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class ActiveUserSketch(Base):
+    """
+    HyperLogLog sketch of the users who logged on one day, overall
+    (activity_type "") or for one activity type. See services/active_users.py.
+    """
+    __tablename__ = "active_user_sketches"
+
+    day = Column(Date, primary_key=True)
+    activity_type = Column(String, primary_key=True, default="")
+    registers = Column(LargeBinary, nullable=False)  # HyperLogLog.to_bytes()
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
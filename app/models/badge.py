@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..core.database import Base
@@ -20,6 +20,9 @@ class UserBadge(Base):
     badge_id = Column(Integer, ForeignKey("badges.id"), nullable=False)
     earned_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Each badge once per user, however many workers evaluate at the same time
+    __table_args__ = (Index("uq_user_badges_user_badge", "user_id", "badge_id", unique=True),)
+
     # Relationships
     user = relationship("User", back_populates="badges")
     badge = relationship("Badge")
\ No newline at end of file
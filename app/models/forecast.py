@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class UserForecast(Base):
+    """
+    Precomputed monthly savings projection for one user.
+    Written in bulk by the nightly job in app/jobs/forecast.py.
+    """
+    __tablename__ = "user_forecasts"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(String, nullable=False)  # e.g. "2026-10"
+    month_to_date = Column(Float, nullable=False)  # kg CO2 saved so far this month
+    projected_monthly_total = Column(Float, nullable=False)
+    goal_kg = Column(Float, nullable=False)
+    goal_probability = Column(Float, nullable=False)
+    daily_trend = Column(Float, nullable=False)  # kg/day change per day (regression slope)
+    daily_level = Column(Float, nullable=False)  # EWMA of daily savings
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, Enum as SQLEnum
+from sqlalchemy import DDL, Boolean, Column, Integer, String, DateTime, Text, Float, ForeignKey, Index, Enum as SQLEnum, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from enum import Enum
@@ -22,6 +22,85 @@ class EcoLog(Base):
     points_earned = Column(Integer, nullable=False)
     activity_date = Column(DateTime(timezone=True), server_default=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Summary rows stand in for a day's archived logs of one type: their
+    # emissions and points are the sums and entry_count the number of logs.
+    # Count activities with sum(entry_count), and list only is_archived=False.
+    is_archived = Column(Boolean, nullable=False, default=False, server_default="0")
+    entry_count = Column(Integer, nullable=False, default=1, server_default="1")
+    # users.data_version of the write that last created or edited the log,
+    # for the delta sync feed (services/sync.py)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_eco_logs_user_date", "user_id", "activity_date"),
+        Index("ix_eco_logs_user_change_seq", "user_id", "change_seq"),
+        # Ids only grow, as the export's watermark needs: SQLite would hand
+        # the highest id out again once its log is deleted
+        {"sqlite_autoincrement": True},
+    )
 
     # Relationships
-    user = relationship("User", back_populates="logs")
\ No newline at end of file
+    user = relationship("User", back_populates="logs")
+
+
+# Full-text search over descriptions (services/search.py), maintained by the
+# database: on SQLite an external-content FTS5 index kept in step by
+# triggers, on PostgreSQL a generated tsvector column with a GIN index.
+# The migration creates the same objects.
+SEARCH_DDL = {
+    "sqlite": (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS eco_logs_fts USING fts5("
+        "description, content='eco_logs', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS eco_logs_fts_insert AFTER INSERT ON eco_logs BEGIN "
+        "INSERT INTO eco_logs_fts(rowid, description) VALUES (new.id, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS eco_logs_fts_delete AFTER DELETE ON eco_logs BEGIN "
+        "INSERT INTO eco_logs_fts(eco_logs_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS eco_logs_fts_update AFTER UPDATE OF description ON eco_logs BEGIN "
+        "INSERT INTO eco_logs_fts(eco_logs_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+        "INSERT INTO eco_logs_fts(rowid, description) VALUES (new.id, new.description); END",
+    ),
+    "postgresql": (
+        "ALTER TABLE eco_logs ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', description)) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_eco_logs_search_vector ON eco_logs USING GIN (search_vector)",
+    ),
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(EcoLog.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+# The index is a table of its own that would outlive eco_logs
+event.listen(EcoLog.__table__, "before_drop", DDL("DROP TABLE IF EXISTS eco_logs_fts").execute_if(dialect="sqlite"))
+
+
+class EcoLogTombstone(Base):
+    """A deleted log, so sync clients hear about the deletion (services/sync.py)."""
+    __tablename__ = "eco_log_tombstones"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    change_seq = Column(Integer, primary_key=True)  # users.data_version of the delete
+    log_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class EcoLogArchive(Base):
+    """
+    Logs older than ARCHIVE_AFTER_DAYS, moved out of eco_logs with their ids.
+    Range-partitioned by month on PostgreSQL.
+    """
+    __tablename__ = "eco_logs_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    activity_type = Column(SQLEnum(ActivityType), nullable=False)
+    description = Column(Text, nullable=False)
+    emissions_saved = Column(Float, nullable=False)
+    points_earned = Column(Integer, nullable=False)
+    # Part of the key because PostgreSQL partitions on it
+    activity_date = Column(DateTime(timezone=True), primary_key=True)
+    created_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_eco_logs_archive_user_date", "user_id", "activity_date"),
+        {"postgresql_partition_by": "RANGE (activity_date)"},
+    )
\ No newline at end of file
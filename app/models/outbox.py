@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from ..core.database import Base
+
+class OutboxEvent(Base):
+    """
+    A side effect of a write, stored in the write's own transaction and
+    delivered later by app/services/outbox.py. Deleted once delivered.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)  # e.g. "savings.delta"
+    payload = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # naive UTC, for the lag metric
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class UserSavingsTotal(Base):
+    """
+    Running emissions-saved total per user, period and activity type.
+    period is "all" or an ISO week like "2026-W42"; activity_type "" means all types.
+    """
+    __tablename__ = "user_savings_totals"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period = Column(String, primary_key=True)
+    activity_type = Column(String, primary_key=True, default="")
+    total = Column(Float, nullable=False, default=0.0)
+
+class SavingsSketch(Base):
+    """Persisted quantile sketch of user totals for one scope, e.g. "all:*" or "2026-W42:food"."""
+    __tablename__ = "savings_sketches"
+
+    scope = Column(String, primary_key=True)
+    payload = Column(Text, nullable=False)  # QuantileSketch.to_dict() as JSON
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class Team(Base):
+    __tablename__ = "teams"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
+    # Sums over the members, kept up to date by the writes that change a
+    # member's score or membership (services/teams.py), never summed on read
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
+    eco_score = Column(Float, nullable=False, default=0.0, server_default="0", index=True)
+    total_emissions_saved = Column(Float, nullable=False, default=0.0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey, Index, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..core.database import Base
@@ -13,11 +13,22 @@ class User(Base):
     full_name = Column(String, nullable=True)
     bio = Column(Text, nullable=True)
     avatar = Column(String, nullable=True)
+    is_admin = Column(Boolean, nullable=False, default=False, server_default="0")  # may read /api/admin
     eco_score = Column(Float, default=0.0)
     total_emissions_saved = Column(Float, default=0.0)
+    # Bumped with every write to the user's data; versions ETags and memoized reads
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Logs dated before this are in eco_logs_archive; None until any are
+    archived_before = Column(DateTime(timezone=True), nullable=True)
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
+    # One bit per day with a log; see services/activity_days.py
+    activity_days = Column(LargeBinary, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     logs = relationship("EcoLog", back_populates="user")
-    badges = relationship("UserBadge", back_populates="user")
\ No newline at end of file
+    badges = relationship("UserBadge", back_populates="user")
+
+    # A team's members by score
+    __table_args__ = (Index("ix_users_team_score", "team_id", "eco_score"),)
\ No newline at end of file
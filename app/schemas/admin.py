@@ -0,0 +1,13 @@
+from datetime import date
+from typing import Dict
+from pydantic import BaseModel
+
+class ActiveUserCounts(BaseModel):
+    dau: int
+    wau: int
+    mau: int
+
+class ActiveUsers(ActiveUserCounts):
+    # Approximate (HyperLogLog): about 1.6% standard error at the default precision
+    as_of: date
+    by_activity_type: Dict[str, ActiveUserCounts]
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+class Message(BaseModel):
+    message: str
+
+class ApiInfo(BaseModel):
+    message: str
+    version: str
+
+class HealthStatus(BaseModel):
+    status: str
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+class DashboardStats(BaseModel):
+    total_emissions_saved: float
+    eco_score: float
+    weekly_emissions_saved: float
+    weekly_activity_count: int
+    user_rank: str
@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import Dict, List
+from datetime import datetime
+
+from .log import ActivityType
+
+class WeekProgress(BaseModel):
+    week: str
+    emissions_saved: float
+    points_earned: int
+
+class WeeklyInsights(BaseModel):
+    weekly_progress: List[WeekProgress]
+
+class CategoryShare(BaseModel):
+    type: ActivityType
+    count: int
+    total_emissions: float
+
+class CategoryDistribution(BaseModel):
+    categories: List[CategoryShare]
+
+class MonthlySummary(BaseModel):
+    monthly_emissions_saved: float
+    monthly_points_earned: int
+    monthly_activities: int
+
+class SavingsForecast(BaseModel):
+    month: str
+    month_to_date: float
+    projected_monthly_total: float
+    goal_kg: float
+    goal_probability: float
+    daily_trend: float
+    computed_at: datetime
+
+class SavingsRank(BaseModel):
+    emissions_saved: float
+    percentile: float
+
+class PeriodRanks(BaseModel):
+    all_time: SavingsRank
+    weekly: SavingsRank
+
+class SavingsPercentiles(PeriodRanks):
+    week: str
+    by_activity_type: Dict[str, PeriodRanks]
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    username: str
+    full_name: str
+    eco_score: float
+    emissions_saved: float
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -29,9 +29,24 @@ class EcoLog(EcoLogBase):
     activity_date: datetime
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class EcoLogResponse(BaseModel):
     log: EcoLog
-    message: str
\ No newline at end of file
+    message: str
+
+class EcoLogSearchResults(BaseModel):
+    results: List[EcoLog]
+    # Pass as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class EcoLogChanges(BaseModel):
+    # Created or edited since the token, oldest change first
+    logs: List[EcoLog]
+    # Ids of logs deleted since the token
+    deleted: List[int]
+    # Pass as ?since= next time; unchanged when there was nothing new
+    next_since: str
+    # More changes are waiting: ask again with next_since straight away
+    has_more: bool
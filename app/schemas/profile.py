@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import List, Optional, Union
+from datetime import date, datetime
+
+class ProfileUpdate(BaseModel):
+    full_name: Optional[str] = None
+    bio: Optional[str] = None
+    avatar: Optional[str] = None
+
+class BadgeStatus(BaseModel):
+    name: str
+    description: str
+    icon: str
+    earned_at: Optional[datetime] = None
+    earned: bool
+
+class BadgeList(BaseModel):
+    badges: List[BadgeStatus]
+
+class Achievement(BaseModel):
+    title: str
+    value: Union[int, str]
+
+class AchievementList(BaseModel):
+    achievements: List[Achievement]
+
+class Streaks(BaseModel):
+    current_streak: int
+    longest_streak: int
+    active_days: int
+    last_active: Optional[date] = None
+
+class ActivityCalendar(BaseModel):
+    start: date
+    days: int
+    # Base64 of the day bits, least significant bit of each byte first: bit i is start + i days
+    bitmap: str
+    active_days: int
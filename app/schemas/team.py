@@ -0,0 +1,24 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import Optional
+
+class TeamCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+
+class Team(BaseModel):
+    id: int
+    name: str
+    member_count: int
+    eco_score: float
+    total_emissions_saved: float
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TeamLeaderboardEntry(BaseModel):
+    rank: int
+    id: int
+    name: str
+    member_count: int
+    eco_score: float
+    emissions_saved: float
@@ -1,5 +1,5 @@
 # schemas/user.py
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, validator
 from typing import Optional
 from datetime import datetime
 
@@ -40,13 +40,21 @@ class User(UserBase):
     total_emissions_saved: float
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class UserProfile(User):
+    full_name: Optional[str] = None
+    bio: Optional[str] = None
+    avatar: Optional[str] = None
 
 class UserResponse(BaseModel):
     user: User
     message: str
 
+class ProfileUpdateResponse(BaseModel):
+    message: str
+    user: UserProfile
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,239 @@
+"""
+Production server: a pre-forking master over uvicorn workers.
+
+The master binds the listening socket, imports the app (SERVER_PRELOAD) and
+forks the workers, which then share the imported code and module state
+copy-on-write instead of each importing it again. Every worker accepts from
+the same socket and runs its own event loop, database pools, write queue and
+outbox worker.
+
+SIGTERM or SIGINT to the master is passed on to the workers: each stops
+accepting, lets in-flight requests finish for up to
+SERVER_GRACEFUL_TIMEOUT_SECONDS, runs the app's shutdown and exits. A second
+signal, or workers still running well past the timeout, gets them killed.
+Workers that die otherwise are replaced.
+
+Run with:
+    python -m app.server [--workers N] [--host HOST] [--port PORT]
+
+For development with auto-reload use `uvicorn app.main:app --reload`.
+"""
+import argparse
+import gc
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Optional
+
+import uvicorn
+
+from .core.config import settings
+from .core.structured_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits sooner than this after starting counts as a failed start
+MIN_WORKER_UPTIME_SECONDS = 5.0
+# Consecutive failed starts before the master gives up instead of respawning forever
+MAX_FAILED_STARTS = 5
+# Time past the graceful timeout for the app's own shutdown before workers are killed
+SHUTDOWN_MARGIN_SECONDS = 10
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on: its affinity mask, capped by a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def worker_count(settings, cpus: int, requested: Optional[int] = None) -> int:
+    """
+    `requested`, WEB_CONCURRENCY, or one worker per CPU: each worker is a
+    single event loop, so more than that only adds contention. With
+    DB_MAX_CONNECTIONS set, capped so every worker's full pool fits under the
+    limit. Rate limiting without RATE_LIMIT_REDIS_URL keeps its buckets in
+    each worker's memory, where N workers would allow N times the limits, so
+    that runs a single worker.
+    """
+    workers = requested or settings.WEB_CONCURRENCY or cpus
+    if settings.DB_MAX_CONNECTIONS:
+        per_worker = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        workers = min(workers, settings.DB_MAX_CONNECTIONS // per_worker)
+    if workers > 1 and settings.RATE_LIMIT_ENABLED and not settings.RATE_LIMIT_REDIS_URL:
+        logger.warning(
+            "in-memory rate limits are per worker; running one worker, set RATE_LIMIT_REDIS_URL for more",
+            extra={"workers": workers},
+        )
+        workers = 1
+    return max(1, workers)
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def serve_worker(sock: socket.socket, app=None) -> int:
+    """
+    Run one worker on `sock` until it is told to stop, returning its exit
+    code. `app` is the preloaded app, or None to import it here.
+    """
+    if app is None:
+        from .main import app, log_listener
+    else:
+        # The master's log listener thread and pooled connections did not
+        # survive the fork in any usable form
+        from .core import database
+        log_listener = setup_logging(settings)
+        database.dispose_after_fork()
+
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        log_config=None,  # records go through the app's logging setup
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    )
+    server = uvicorn.Server(config)
+    try:
+        server.run(sockets=[sock])
+    finally:
+        log_listener.stop()
+    return 0 if server.started else 3  # 3: the app failed to start, as with `uvicorn`
+
+
+class Master:
+    """Forks the workers, passes shutdown signals on to them and replaces workers that die."""
+
+    def __init__(self, sock: socket.socket, workers: int, app=None):
+        self.sock = sock
+        self.workers = workers
+        self.app = app
+        self.children = {}  # pid -> monotonic start time
+        self.stopping = False
+        self.failed_starts = 0
+        self.exit_code = 0
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+
+        code = 1
+        try:
+            # Out of the terminal's process group, so Ctrl-C reaches only the
+            # master, which then stops the workers exactly once
+            os.setpgid(0, 0)
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGALRM):
+                signal.signal(signum, signal.SIG_DFL)
+            code = serve_worker(self.sock, self.app)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            # Never return into the master's code
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def stop(self, signum=None, frame=None):
+        if self.stopping:
+            self.kill()
+            return
+        self.stopping = True
+        logger.info("stopping workers", extra={"workers": len(self.children)})
+        self._signal_children(signal.SIGTERM)
+        signal.alarm(settings.SERVER_GRACEFUL_TIMEOUT_SECONDS + SHUTDOWN_MARGIN_SECONDS)
+
+    def kill(self, signum=None, frame=None):
+        logger.warning("killing workers", extra={"workers": len(self.children)})
+        self._signal_children(signal.SIGKILL)
+
+    def _signal_children(self, signum):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGALRM, self.kill)
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info("workers started", extra={"workers": self.workers, "pids": sorted(self.children)})
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+
+            logger.warning("worker exited", extra={"pid": pid, "exit_code": os.waitstatus_to_exitcode(status)})
+            if time.monotonic() - started < MIN_WORKER_UPTIME_SECONDS:
+                self.failed_starts += 1
+                if self.failed_starts >= MAX_FAILED_STARTS:
+                    logger.error("workers keep failing at startup, shutting down")
+                    self.exit_code = 1
+                    self.stop()
+                    continue
+            else:
+                self.failed_starts = 0
+            self.spawn()
+
+        signal.alarm(0)
+        return self.exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the EcoPulse API with pre-forked workers.")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: WEB_CONCURRENCY, or one per CPU; "
+                             "one without RATE_LIMIT_REDIS_URL)")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=settings.SERVER_PRELOAD,
+                        help="import the app in each worker instead of once in the master")
+    args = parser.parse_args()
+
+    sock = bind_socket(args.host, args.port, settings.SERVER_BACKLOG)
+    app = None
+    if args.preload:
+        from .main import app
+        # Keep the collector from writing to every preloaded object in each
+        # worker, which would copy their pages
+        gc.freeze()
+    else:
+        setup_logging(settings)
+
+    workers = worker_count(settings, available_cpus(), args.workers)
+    logger.info("listening", extra={"host": args.host, "port": args.port, "preload": args.preload})
+    sys.exit(Master(sock, workers, app).run())
+
+
+if __name__ == "__main__":
+    main()
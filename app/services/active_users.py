@@ -0,0 +1,190 @@
+"""
+Daily, weekly and monthly active users, overall and per activity type.
+
+A user is active on a day when they create a log. Once a log write commits,
+the user is added to this process's HyperLogLog sketches for that day, both
+overall and for the log's activity type. A background loop merges them into
+the persisted per-day sketches (ActiveUserSketch) every
+ACTIVE_USERS_FLUSH_SECONDS. Merging is a register-wise maximum, so
+flushes from several workers combine without double counting. A weekly or
+monthly figure merges the daily sketches, with no COUNT(DISTINCT) over
+eco_logs. Additions a worker has not flushed yet are lost if it crashes.
+"""
+import asyncio
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SessionLocal, call_after_commit
+from ..models.analytics import ActiveUserSketch
+from ..models.log import EcoLog
+from .hyperloglog import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+ALL_TYPES = ""
+# (figure, days up to and including the day asked about)
+WINDOWS = (("dau", 1), ("wau", 7), ("mau", 30))
+
+
+class ActiveUserRegistry:
+    """This process's additions since the last flush, by (day, activity type)."""
+
+    def __init__(self, precision: int):
+        self.precision = precision
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+
+    def record(self, user_id: int, activity_type: str, day: date):
+        with self._lock:
+            for type_key in (ALL_TYPES, activity_type):
+                sketch = self._pending.get((day, type_key))
+                if sketch is None:
+                    sketch = self._pending[(day, type_key)] = HyperLogLog(self.precision)
+                sketch.add(user_id)
+
+    def flush(self, db: Session):
+        """Merge the pending sketches into the stored ones."""
+        if not self._flush_lock.acquire(blocking=False):
+            return  # another thread is already flushing
+        try:
+            with self._lock:
+                flushing, self._pending = self._pending, {}
+            if not flushing:
+                return
+
+            try:
+                days = {day for day, _ in flushing}
+                stored = {
+                    (row.day, row.activity_type): row.registers
+                    for row in db.execute(
+                        select(ActiveUserSketch.day, ActiveUserSketch.activity_type, ActiveUserSketch.registers)
+                        .where(ActiveUserSketch.day.in_(days)).with_for_update()
+                    )
+                }
+                inserts, updates = [], []
+                for (day, type_key), pending in flushing.items():
+                    row = {"day": day, "activity_type": type_key}
+                    if (day, type_key) not in stored:
+                        inserts.append({**row, "registers": pending.to_bytes()})
+                        continue
+                    sketch = HyperLogLog.from_bytes(stored[(day, type_key)])
+                    sketch.merge(pending)
+                    updates.append({**row, "registers": sketch.to_bytes()})
+                # One executemany each, however many days and types are pending
+                if inserts:
+                    db.execute(insert(ActiveUserSketch), inserts)
+                if updates:
+                    db.execute(update(ActiveUserSketch), updates)
+                db.commit()
+            except Exception:
+                db.rollback()
+                # Merging is idempotent, so putting them back is always safe
+                with self._lock:
+                    for key, sketch in flushing.items():
+                        self._pending.setdefault(key, HyperLogLog(self.precision)).merge(sketch)
+                raise
+        finally:
+            self._flush_lock.release()
+
+    def reset(self):
+        with self._lock:
+            self._pending = {}
+
+
+registry = ActiveUserRegistry(settings.ACTIVE_USERS_HLL_PRECISION)
+
+
+def record_activity(session, user_id: int, activity_type, day: date):
+    """Count the user as active on `day` once the caller's transaction commits."""
+    call_after_commit(session, registry.record, user_id, getattr(activity_type, "value", activity_type), day)
+
+
+def active_user_counts(db: Session, as_of: date) -> dict:
+    """DAU, WAU and MAU for the days ending `as_of`, overall and per activity type."""
+    longest = max(days for _, days in WINDOWS)
+    rows = db.execute(
+        select(ActiveUserSketch.day, ActiveUserSketch.activity_type, ActiveUserSketch.registers)
+        .where(ActiveUserSketch.day > as_of - timedelta(days=longest), ActiveUserSketch.day <= as_of)
+        .order_by(ActiveUserSketch.day.desc())
+    ).all()
+
+    by_type = {}
+    for day, type_key, registers in rows:
+        by_type.setdefault(type_key, []).append((day, HyperLogLog.from_bytes(registers)))
+
+    def figures(days):
+        # Newest day first: one running merge grows from the day to the week to the month
+        counts, running, merged = {}, None, 0
+        for figure, window in WINDOWS:
+            since = as_of - timedelta(days=window)
+            while merged < len(days) and days[merged][0] > since:
+                sketch = days[merged][1]
+                if running is None:
+                    running = sketch
+                else:
+                    running.merge(sketch)
+                merged += 1
+            counts[figure] = running.count() if running else 0
+        return counts
+
+    return {
+        "as_of": as_of,
+        **figures(by_type.get(ALL_TYPES, [])),
+        "by_activity_type": {type_key: figures(days) for type_key, days in sorted(by_type.items()) if type_key},
+    }
+
+
+def flush_active_users():
+    db = SessionLocal()
+    try:
+        registry.flush(db)
+    finally:
+        db.close()
+
+
+async def run_flush_loop():
+    """Background task: periodically persist the pending sketches."""
+    while True:
+        await asyncio.sleep(settings.ACTIVE_USERS_FLUSH_SECONDS)
+        try:
+            await run_in_threadpool(flush_active_users)
+        except Exception:
+            logger.exception("active user sketch flush failed")
+
+
+def rebuild_active_users(db: Session, since: date) -> int:
+    """
+    Recompute the daily sketches from `since` on from eco_logs. Used to
+    backfill them or replace drifted ones; returns the number of days.
+    Days that have been archived only keep one summary row per user, day
+    and type, which is all a sketch needs.
+    """
+    day = func.date(EcoLog.activity_date)
+    sketches = {}
+    for user_id, active_day, activity_type in db.execute(
+        select(EcoLog.user_id, day, EcoLog.activity_type)
+        .where(EcoLog.activity_date >= datetime.combine(since, datetime.min.time()))
+        .group_by(EcoLog.user_id, day, EcoLog.activity_type)
+    ):
+        if isinstance(active_day, str):  # SQLite's date() is text
+            active_day = date.fromisoformat(active_day)
+        for type_key in (ALL_TYPES, getattr(activity_type, "value", activity_type)):
+            sketch = sketches.get((active_day, type_key))
+            if sketch is None:
+                sketch = sketches[(active_day, type_key)] = HyperLogLog(settings.ACTIVE_USERS_HLL_PRECISION)
+            sketch.add(user_id)
+
+    db.execute(delete(ActiveUserSketch).where(ActiveUserSketch.day >= since))
+    db.add_all(
+        ActiveUserSketch(day=active_day, activity_type=type_key, registers=sketch.to_bytes())
+        for (active_day, type_key), sketch in sketches.items()
+    )
+    db.commit()
+    return len({active_day for active_day, _ in sketches})
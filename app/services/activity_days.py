@@ -0,0 +1,159 @@
+"""
+The days each user logged something, as one bitmap per user.
+
+users.activity_days holds a 4-byte little-endian origin (date.toordinal()
+of bit 0, the user's first active day) followed by the bits, least
+significant first: bit i is set when the user has a log on origin + i days
+(UTC). A year of daily logging takes 50 bytes. Log writes keep it current
+in their transaction (mark_day, unmark_day_if_empty); streaks are a few
+big-int operations on it and the calendar endpoint sends the bits as they
+are, so neither reads eco_logs.
+
+Archiving keeps a summary row on every archived day, so the bitmap and a
+rebuild from eco_logs (rebuild_activity_days) agree.
+"""
+import struct
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, func, exists
+from sqlalchemy.orm import Session
+
+from ..models.log import EcoLog
+from ..models.user import User
+
+_ORIGIN = struct.Struct("<I")
+
+
+class DayBitmap:
+    def __init__(self, origin: Optional[date] = None, bits: int = 0):
+        self.origin = origin
+        self.bits = bits
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "DayBitmap":
+        if not data:
+            return cls()
+        (ordinal,) = _ORIGIN.unpack_from(data)
+        return cls(date.fromordinal(ordinal), int.from_bytes(data[_ORIGIN.size:], "little"))
+
+    def to_bytes(self) -> Optional[bytes]:
+        """The stored form, re-based on the first active day; None when there are none."""
+        if not self.bits:
+            return None
+        first = (self.bits & -self.bits).bit_length() - 1
+        bits = self.bits >> first
+        origin = self.origin + timedelta(days=first)
+        return _ORIGIN.pack(origin.toordinal()) + bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+    def _index(self, day: date) -> int:
+        return (day - self.origin).days
+
+    def __contains__(self, day: date) -> bool:
+        if self.origin is None or day < self.origin:
+            return False
+        return bool(self.bits >> self._index(day) & 1)
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def add(self, day: date):
+        if self.origin is None:
+            self.origin = day
+        elif day < self.origin:
+            self.bits <<= self._index(self.origin) - self._index(day)
+            self.origin = day
+        self.bits |= 1 << self._index(day)
+
+    def discard(self, day: date):
+        if day in self:
+            self.bits &= ~(1 << self._index(day))
+
+    @property
+    def last_active(self) -> Optional[date]:
+        return self.origin + timedelta(days=self.bits.bit_length() - 1) if self.bits else None
+
+    def current_streak(self, today: date) -> int:
+        """
+        Consecutive active days up to today. A streak that reached yesterday
+        still counts while today has no log yet: the day isn't over.
+        """
+        end = today if today in self else today - timedelta(days=1)
+        if end not in self:
+            return 0
+        # The highest inactive day at or below `end` bounds the run
+        top = self._index(end)
+        gaps = ~self.bits & ((1 << (top + 1)) - 1)
+        return top + 1 - gaps.bit_length()
+
+    def longest_streak(self) -> int:
+        longest, bits = 0, self.bits
+        while bits:
+            bits >>= (bits & -bits).bit_length() - 1  # to the start of the next run
+            run = (~bits & (bits + 1)).bit_length() - 1  # its trailing ones
+            longest = max(longest, run)
+            bits >>= run
+        return longest
+
+    def window(self, start: date, days: int) -> int:
+        """The bits for `days` days from `start`, bit 0 being `start`."""
+        if self.origin is None:
+            return 0
+        offset = self._index(start)
+        bits = self.bits >> offset if offset >= 0 else self.bits << -offset
+        return bits & ((1 << days) - 1)
+
+
+async def mark_day(session, user_id: int, stored: Optional[bytes], day: date):
+    """
+    Record a log on `day`. `stored` is the user's activity_days as read
+    under the row lock of the write's user update; nothing is written when
+    the day is already marked, which is every log after a day's first.
+    """
+    bitmap = DayBitmap.from_bytes(stored)
+    if day in bitmap:
+        return
+    bitmap.add(day)
+    await session.execute(update(User).where(User.id == user_id).values(activity_days=bitmap.to_bytes()))
+
+
+async def unmark_day_if_empty(session, user_id: int, stored: Optional[bytes], day: date, deleted_id: int):
+    """Clear `day` when the log `deleted_id` was the user's last one on it."""
+    bitmap = DayBitmap.from_bytes(stored)
+    if day not in bitmap:
+        return
+    start = datetime.combine(day, datetime.min.time())
+    others = await session.scalar(select(exists().where(
+        EcoLog.user_id == user_id,
+        EcoLog.activity_date >= start,
+        EcoLog.activity_date < start + timedelta(days=1),
+        EcoLog.id != deleted_id,
+    )))
+    if others:
+        return
+    bitmap.discard(day)
+    await session.execute(update(User).where(User.id == user_id).values(activity_days=bitmap.to_bytes()))
+
+
+def rebuild_activity_days(db: Session, chunk_size: int = 1000) -> int:
+    """
+    Recompute every user's bitmap from their logs, archived days' summary
+    rows included. Used to backfill or check them; returns the number of
+    users with any activity.
+    """
+    day = func.date(EcoLog.activity_date)
+    bitmaps = {}
+    for user_id, active_day in db.execute(select(EcoLog.user_id, day).group_by(EcoLog.user_id, day)):
+        if isinstance(active_day, str):  # SQLite's date() is text
+            active_day = date.fromisoformat(active_day)
+        bitmaps.setdefault(user_id, DayBitmap()).add(active_day)
+
+    # Versions move too, so no ETag or memoized answer outlives the old bitmaps
+    db.execute(update(User).values(activity_days=None, data_version=User.data_version + 1))
+    items = list(bitmaps.items())
+    for start in range(0, len(items), chunk_size):
+        db.execute(update(User), [
+            {"id": user_id, "activity_days": bitmap.to_bytes()} for user_id, bitmap in items[start:start + chunk_size]
+        ])
+    db.commit()
+    return len(bitmaps)
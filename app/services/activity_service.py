@@ -1,27 +1,38 @@
-from sqlalchemy.orm import Session
-from app import models, schemas
-from datetime import datetime
+"""
+Listing a user's logs across the hot table and the archive, newest first.
 
-def create_activity(user_id: int, activity_in: schemas.ActivityCreate, db: Session):
-    activity = models.Activity(
-        user_id=user_id,
-        category=activity_in.category,
-        description=activity_in.description,
-        emissions_kg=activity_in.emissions_kg,
-        created_at=datetime.utcnow(),
-    )
-    db.add(activity)
-    db.commit()
-    db.refresh(activity)
-    return activity
+Every archived log is older than the user's archived_before and every
+listable log in eco_logs is not, so a page reads eco_logs first and goes on
+into eco_logs_archive only when it runs past the hot tier.
+"""
+from sqlalchemy import select, func
 
+from ..core.database import as_dicts
+from ..models.log import EcoLog, EcoLogArchive
+from ..models.user import User
 
-def list_user_activities(user_id: int, db: Session, skip: int = 0, limit: int = 10):
-    return (
-        db.query(models.Activity)
-        .filter(models.Activity.user_id == user_id, models.Activity.is_archived == False)
-        .order_by(models.Activity.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+
+async def list_user_activities(db, user: User, columns, skip: int = 0, limit: int = 10) -> list:
+    """`columns` are EcoLog columns; rows come back as dicts keyed by their names."""
+    hot = as_dicts(await db.execute(
+        select(*columns).where(
+            EcoLog.user_id == user.id,
+            EcoLog.is_archived.is_(False),
+        ).order_by(EcoLog.activity_date.desc(), EcoLog.id.desc()).offset(skip).limit(limit)
+    ))
+    if len(hot) >= limit or user.archived_before is None:
+        return hot
+
+    archive_skip = 0
+    if not hot and skip:
+        hot_count = await db.scalar(
+            select(func.count(EcoLog.id)).where(EcoLog.user_id == user.id, EcoLog.is_archived.is_(False))
+        )
+        archive_skip = max(skip - hot_count, 0)
+    archived = as_dicts(await db.execute(
+        select(*(getattr(EcoLogArchive, column.key) for column in columns)).where(
+            EcoLogArchive.user_id == user.id
+        ).order_by(EcoLogArchive.activity_date.desc(), EcoLogArchive.id.desc())
+        .offset(archive_skip).limit(limit - len(hot))
+    ))
+    return hot + archived
@@ -1,8 +1,10 @@
 import os
-import requests
+import logging
 import random
 from ..core.config import settings
 
+logger = logging.getLogger(__name__)
+
 def get_ai_response(prompt: str):
     """
     Get AI response from OpenRouter
@@ -10,6 +12,8 @@ def get_ai_response(prompt: str):
     """
     # Try OpenRouter first
     if settings.OPENROUTER_API_KEY:
+        # Imported here: requests is slow to import and only needed with a key
+        import requests
         try:
             headers = {
                 "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
@@ -39,9 +43,9 @@ def get_ai_response(prompt: str):
                 result = response.json()
                 return result["choices"][0]["message"]["content"]
             else:
-                print(f"OpenRouter API error: {response.status_code} - {response.text}")
-        except Exception as e:
-            print(f"OpenRouter API exception: {str(e)}")
+                logger.warning("OpenRouter API error", extra={"status_code": response.status_code, "body": response.text[:500]})
+        except Exception:
+            logger.warning("OpenRouter API exception", exc_info=True)
 
     # Fallback mock responses for eco-questions
     eco_responses = {
@@ -0,0 +1,131 @@
+"""
+Tiering of old eco logs.
+
+archive_logs() moves each user's logs dated before a day-aligned cutoff from
+eco_logs to eco_logs_archive. In their place it leaves one summary row per
+(day, activity type): is_archived is set, emissions and points are the sums,
+and entry_count is the number of logs. Totals, per-day series and counts
+read from eco_logs alone stay exact as long as they count with
+sum(entry_count). Only listings of individual logs read the archive, and
+only for pages past users.archived_before.
+
+That keeps eco_logs, and the depth of its indexes, bounded by
+ARCHIVE_AFTER_DAYS of detail plus one summary row per active day.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, delete, insert, update, text
+from sqlalchemy.orm import Session
+
+from ..models.log import EcoLog, EcoLogArchive
+from ..models.user import User
+
+ARCHIVE_FIELDS = ("id", "user_id", "activity_type", "description", "emissions_saved",
+                  "points_earned", "activity_date", "created_at")
+
+
+def archive_cutoff(now: datetime, after_days: int) -> datetime:
+    """Start of the oldest day that stays in eco_logs."""
+    return datetime.combine((now - timedelta(days=after_days)).date(), datetime.min.time())
+
+
+def ensure_month_partitions(db: Session, first: date, last: date):
+    """On PostgreSQL, create the archive's monthly partitions covering first..last."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    month = first.replace(day=1)
+    while month <= last:
+        following = (month + timedelta(days=32)).replace(day=1)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS eco_logs_archive_{month:%Y_%m} PARTITION OF eco_logs_archive "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        ))
+        month = following
+
+
+def _day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def archive_user_logs(db: Session, user_ids, cutoff: datetime) -> int:
+    """
+    Archive the logs of `user_ids` dated before `cutoff` in the session's
+    transaction. Returns the number of logs moved.
+    """
+    logs = db.execute(
+        select(*(getattr(EcoLog, field) for field in ARCHIVE_FIELDS)).where(
+            EcoLog.user_id.in_(user_ids),
+            EcoLog.is_archived.is_(False),
+            EcoLog.activity_date < cutoff,
+        )
+    ).all()
+    if not logs:
+        return 0
+
+    ensure_month_partitions(
+        db, min(log.activity_date for log in logs).date(), max(log.activity_date for log in logs).date()
+    )
+    db.execute(insert(EcoLogArchive), [log._asdict() for log in logs])
+
+    summaries = defaultdict(lambda: [0.0, 0, 0])
+    for log in logs:
+        summary = summaries[(log.user_id, _day(log.activity_date), log.activity_type)]
+        summary[0] += log.emissions_saved
+        summary[1] += log.points_earned
+        summary[2] += 1
+
+    # Fold into summary rows left by earlier runs for the same days
+    existing = db.execute(
+        select(EcoLog.id, EcoLog.user_id, EcoLog.activity_date, EcoLog.activity_type).where(
+            EcoLog.user_id.in_({key[0] for key in summaries}),
+            EcoLog.is_archived.is_(True),
+            EcoLog.activity_date.in_({key[1] for key in summaries}),
+        )
+    ).all()
+    for row in existing:
+        key = (row.user_id, _day(row.activity_date), row.activity_type)
+        if key in summaries:
+            emissions, points, count = summaries.pop(key)
+            db.execute(update(EcoLog).where(EcoLog.id == row.id).values(
+                emissions_saved=EcoLog.emissions_saved + emissions,
+                points_earned=EcoLog.points_earned + points,
+                entry_count=EcoLog.entry_count + count,
+            ))
+    if summaries:
+        db.execute(insert(EcoLog), [
+            {
+                "user_id": user_id, "activity_type": activity_type, "activity_date": day,
+                "description": f"{count} archived {'activity' if count == 1 else 'activities'}",
+                "emissions_saved": emissions, "points_earned": points,
+                "is_archived": True, "entry_count": count,
+            }
+            for (user_id, day, activity_type), (emissions, points, count) in summaries.items()
+        ])
+
+    db.execute(delete(EcoLog).where(EcoLog.id.in_([log.id for log in logs])))
+    # Deep pages of their listings now come from the archive
+    moved_users = {log.user_id for log in logs}
+    db.execute(update(User).where(User.id.in_(moved_users)).values(
+        archived_before=cutoff, data_version=User.data_version + 1
+    ))
+    return len(logs)
+
+
+def archive_logs(db: Session, cutoff: datetime, chunk_size: int) -> int:
+    """Archive everyone's logs dated before `cutoff`, one commit per chunk of users."""
+    moved = 0
+    last_id = 0
+    while True:
+        user_ids = db.execute(
+            select(EcoLog.user_id).distinct().where(
+                EcoLog.user_id > last_id,
+                EcoLog.is_archived.is_(False),
+                EcoLog.activity_date < cutoff,
+            ).order_by(EcoLog.user_id).limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            return moved
+        moved += archive_user_logs(db, user_ids, cutoff)
+        db.commit()
+        last_id = user_ids[-1]
@@ -1,11 +1,14 @@
 # services/auth.py  (adjust path to match your project structure)
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.database import run_write
 from ..models.user import User
 from ..schemas.user import UserCreate
 from ..core.security import get_password_hash, verify_password, needs_rehash
 import re
 
-def generate_username(email: str, full_name: str, db: Session) -> str:
+async def generate_username(email: str, full_name: str, db: AsyncSession) -> str:
     """
     Generate a unique username from email and full name
     """
@@ -13,53 +16,61 @@ def generate_username(email: str, full_name: str, db: Session) -> str:
     username = base_username
 
     counter = 1
-    while db.query(User).filter(User.username == username).first():
+    while await db.scalar(select(User.id).where(User.username == username)):
         username = f"{base_username}{counter}"
         counter += 1
 
     return username
 
-def create_user(db: Session, user_data: UserCreate):
+async def create_user(db: AsyncSession, user_data: UserCreate):
     """
     Create a new user. No truncation; password is hashed via get_password_hash (Argon2).
     """
     password = user_data.password  # no truncation, no slicing
 
     # Generate unique username
-    username = generate_username(user_data.email, user_data.full_name, db)
-
-    hashed_password = get_password_hash(password)
-
-    db_user = User(
-        email=user_data.email,
-        username=username,
-        full_name=user_data.full_name,
-        hashed_password=hashed_password
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
-
-def authenticate_user(db: Session, email: str, password: str):
+    username = await generate_username(user_data.email, user_data.full_name, db)
+
+    # Argon2 is deliberately slow; keep it off the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, password)
+
+    async def write(session):
+        db_user = User(
+            email=user_data.email,
+            username=username,
+            full_name=user_data.full_name,
+            hashed_password=hashed_password
+        )
+        session.add(db_user)
+        await session.flush()
+        await session.refresh(db_user)
+        return db_user
+
+    return await run_write(db, write)
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
     """
     Authenticate user. If the stored password hash is old (bcrypt) and verifies,
     re-hash with Argon2 and update the DB so the account migrates.
     """
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    if not await run_in_threadpool(verify_password, password, user.hashed_password):
         return None
 
     # If hash needs update (e.g. was bcrypt), re-hash with current scheme and save.
     try:
         if needs_rehash(user.hashed_password):
-            user.hashed_password = get_password_hash(password)
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+            hashed_password = await run_in_threadpool(get_password_hash, password)
+
+            async def write(session):
+                await session.execute(
+                    update(User).where(User.id == user.id).values(hashed_password=hashed_password)
+                )
+
+            await run_write(db, write)
     except Exception:
         # If rehash/update fails for some reason, don't block login — we've already verified.
         # But log the error in your real logs, here we fail silently to avoid locking real users out.
@@ -67,8 +78,8 @@ def authenticate_user(db: Session, email: str, password: str):
 
     return user
 
-def get_user_by_id(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(User).where(User.email == email))
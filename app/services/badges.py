@@ -0,0 +1,65 @@
+"""
+Badge awards. Badge.requirement names a threshold as "<kind>_<number>":
+"score_100" is an eco score of at least 100, "logs_10" at least ten logs.
+Requirements of other kinds are left for whoever seeds them to award.
+"""
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models.badge import Badge, UserBadge
+from ..models.log import EcoLog
+from ..models.user import User
+
+
+def requirement_met(requirement: str, eco_score: float, log_count: int) -> bool:
+    kind, _, number = requirement.partition("_")
+    try:
+        threshold = float(number)
+    except ValueError:
+        return False
+    if kind == "score":
+        return eco_score >= threshold
+    if kind == "logs":
+        return log_count >= threshold
+    return False
+
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _award(db: Session, user_id: int, badge_ids: list) -> set:
+    """Insert the awards, skipping any a concurrent evaluation got to first. Returns the badge ids inserted."""
+    insert = _DIALECT_INSERTS[db.get_bind().dialect.name]
+    return set(db.execute(
+        insert(UserBadge)
+        .values([{"user_id": user_id, "badge_id": badge_id} for badge_id in badge_ids])
+        .on_conflict_do_nothing(index_elements=["user_id", "badge_id"])
+        .returning(UserBadge.badge_id)
+    ).scalars())
+
+
+def evaluate_badges(db: Session, user_id: int) -> list:
+    """Award the user every badge they now qualify for. Returns the new badges' names."""
+    eco_score = db.scalar(select(User.eco_score).where(User.id == user_id))
+    if eco_score is None:
+        return []  # the user is gone
+    log_count = db.scalar(
+        select(func.coalesce(func.sum(EcoLog.entry_count), 0)).where(EcoLog.user_id == user_id)
+    )
+
+    unearned = db.execute(
+        select(Badge.id, Badge.name, Badge.requirement)
+        .outerjoin(UserBadge, (UserBadge.badge_id == Badge.id) & (UserBadge.user_id == user_id))
+        .where(UserBadge.id.is_(None))
+    ).all()
+    awarded = [
+        (badge_id, name) for badge_id, name, requirement in unearned
+        if requirement_met(requirement, eco_score, log_count)
+    ]
+    if not awarded:
+        return []
+    inserted = _award(db, user_id, [badge_id for badge_id, _ in awarded])
+    if inserted:
+        db.execute(update(User).where(User.id == user_id).values(data_version=User.data_version + 1))
+    return [name for badge_id, name in awarded if badge_id in inserted]
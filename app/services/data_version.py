@@ -0,0 +1,89 @@
+"""
+Per-user data versions, for conditional GETs and memoized read endpoints.
+
+users.data_version goes up in the same transaction as every write to a user's
+logs, profile or forecast. Read endpoints whose answer depends only on that
+user's data turn it into a strong ETag: a poll that sends the ETag back in
+If-None-Match gets a 304 after the single lookup that authenticates it, and a
+poll that doesn't is answered from a per-process memo keyed by
+(user, version, endpoint) instead of re-running its aggregate queries.
+
+Answers over a moving time window (the last 7 days, this month) can change
+without a write, so their keys also carry the current time bucket of
+DATA_VERSION_WINDOW_SECONDS.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..core.config import settings
+
+
+def version_key(user, path: str, query: str, window: Optional[float] = None, clock=time.time) -> tuple:
+    bucket = int(clock() // window) if window else None
+    return (user.id, user.data_version or 0, bucket, path, query)
+
+
+def etag_for(key: tuple) -> str:
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: compression turns our ETags into W/ ones."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class VersionMemo:
+    """
+    Least-recently-used results of versioned endpoints. Entries are never
+    invalidated: a write bumps the version, so its old entries stop being
+    asked for and age out.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key: tuple):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+memo = VersionMemo(settings.DATA_VERSION_MEMO_SIZE)
+
+
+async def memoize(key: tuple, compute):
+    """
+    The result of `async def compute()` for a versioned endpoint's key,
+    computed once per user data version. Results must not be mutated.
+    """
+    result = memo.get(key)
+    if result is None:
+        result = await compute()
+        memo.put(key, result)
+    return result
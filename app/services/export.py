@@ -0,0 +1,208 @@
+"""
+Incremental Parquet export of eco_logs and users, for offline analytics.
+
+Rows are streamed in chunks of `chunk_size` and written as row groups to one
+Parquet file per table, month and run, in hive-style partitions:
+
+    <root>/eco_logs/month=2026-10/part-000000001234.parquet
+    <root>/users/month=2026-10/part-20261019T120000.parquet
+    <root>/_watermarks.json
+
+so memory is bounded by a chunk however large the tables are. Files are
+written under temporary names and renamed once complete, and the
+watermarks are saved last. A run that dies is redone from the same
+watermarks and writes the same file names.
+
+eco_logs is append-only here: each run exports the logs with ids past the
+last one exported, in id order, partitioned by activity_date. It stops at
+the first log younger than `settle_seconds`, so a transaction still
+inserting a lower id cannot be skipped. Archive summary rows are left out:
+the logs they summarise were exported before they were archived. Edits and
+deletions of exported logs are not carried over; delete the export to
+start again.
+
+users rows change, so each run exports the users whose row changed in
+[previous cutoff, now - settle_seconds), partitioned by that change. The
+latest row per id is the current one. Only ids, scores and team are
+exported: no credentials or personal details.
+
+Reads go to the read replica when one is configured.
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, func
+
+from ..models.log import EcoLog
+from ..models.user import User
+
+WATERMARKS = "_watermarks.json"
+
+LOG_COLUMNS = (
+    EcoLog.id, EcoLog.user_id, EcoLog.activity_type, EcoLog.description,
+    EcoLog.emissions_saved, EcoLog.points_earned, EcoLog.activity_date, EcoLog.created_at,
+)
+_user_changed_at = func.coalesce(User.updated_at, User.created_at)
+USER_COLUMNS = (
+    User.id, User.eco_score, User.total_emissions_saved, User.team_id,
+    User.created_at, _user_changed_at.label("changed_at"),
+)
+
+
+def _schemas() -> dict:
+    timestamp = pa.timestamp("us", tz="UTC")
+    return {
+        "eco_logs": pa.schema([
+            ("id", pa.int64()), ("user_id", pa.int64()), ("activity_type", pa.string()),
+            ("description", pa.string()), ("emissions_saved", pa.float64()), ("points_earned", pa.int64()),
+            ("activity_date", timestamp), ("created_at", timestamp),
+        ]),
+        "users": pa.schema([
+            ("id", pa.int64()), ("eco_score", pa.float64()), ("total_emissions_saved", pa.float64()),
+            ("team_id", pa.int64()), ("created_at", timestamp), ("changed_at", timestamp),
+        ]),
+    }
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    # SQLite hands back server-side defaults (CURRENT_TIMESTAMP) as text
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+
+def load_watermarks(root: Path) -> dict:
+    path = root / WATERMARKS
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _save_watermarks(root: Path, watermarks: dict):
+    temporary = root / f".{WATERMARKS}.tmp"
+    temporary.write_text(json.dumps(watermarks, indent=2, sort_keys=True) + "\n")
+    os.replace(temporary, root / WATERMARKS)
+
+
+class _MonthlyFiles:
+    """One open ParquetWriter per month partition of a table, renamed into place on close."""
+
+    def __init__(self, directory: Path, schema, file_name: str):
+        self.directory = directory
+        self.schema = schema
+        self.file_name = file_name
+        self._writers = {}  # month -> (writer, temporary path, final path)
+
+    def write(self, month: str, rows: list):
+        if month not in self._writers:
+            partition = self.directory / f"month={month}"
+            partition.mkdir(parents=True, exist_ok=True)
+            temporary = partition / f".{self.file_name}.tmp"
+            self._writers[month] = (pq.ParquetWriter(temporary, self.schema), temporary, partition / self.file_name)
+        columns = list(zip(*rows))
+        table = pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, self.schema)], schema=self.schema
+        )
+        self._writers[month][0].write_table(table)
+
+    def close(self, complete: bool):
+        """Finish the files; only complete ones are renamed into place."""
+        for writer, temporary, final in self._writers.values():
+            writer.close()
+            if complete:
+                os.replace(temporary, final)
+        self._writers = {}
+
+
+def _write_chunk(files: _MonthlyFiles, rows: list, month_of) -> int:
+    by_month = {}
+    for row in rows:
+        moment = month_of(row)
+        by_month.setdefault(f"{moment.year:04d}-{moment.month:02d}", []).append(row)
+    for month, month_rows in by_month.items():
+        files.write(month, month_rows)
+    return len(rows)
+
+
+def export_logs(conn, root: Path, after_id: int, settle_before: datetime, chunk_size: int) -> tuple:
+    """Export logs with ids past `after_id`; returns (rows written, new watermark id)."""
+    files = _MonthlyFiles(root / "eco_logs", _schemas()["eco_logs"], f"part-{after_id:012d}.parquet")
+    result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+        select(*LOG_COLUMNS)
+        .where(EcoLog.id > after_id, EcoLog.is_archived.is_(False))
+        .order_by(EcoLog.id)
+    )
+    written, last_id, settled, complete = 0, after_id, True, False
+    try:
+        for partition in result.partitions():
+            rows = []
+            for log in partition:
+                created_at = _as_datetime(log.created_at)
+                if _naive_utc(created_at) >= settle_before:
+                    settled = False
+                    break
+                rows.append((
+                    log.id, log.user_id, getattr(log.activity_type, "value", log.activity_type), log.description,
+                    log.emissions_saved, log.points_earned, _as_datetime(log.activity_date), created_at,
+                ))
+            if rows:
+                written += _write_chunk(files, rows, lambda row: row[6] or row[7])
+                last_id = rows[-1][0]
+            if not settled:
+                break
+        complete = True
+    finally:
+        result.close()
+        files.close(complete)
+    return written, last_id
+
+
+def export_users(conn, root: Path, changed_from: datetime, changed_before: datetime, chunk_size: int) -> int:
+    """Export users whose row changed in [changed_from, changed_before)."""
+    files = _MonthlyFiles(root / "users", _schemas()["users"], f"part-{changed_from:%Y%m%dT%H%M%S}.parquet")
+    result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+        select(*USER_COLUMNS)
+        .where(_user_changed_at >= changed_from, _user_changed_at < changed_before)
+        .order_by(User.id)
+    )
+    written, complete = 0, False
+    try:
+        for partition in result.partitions():
+            rows = [
+                (user.id, user.eco_score, user.total_emissions_saved, user.team_id,
+                 _as_datetime(user.created_at), _as_datetime(user.changed_at))
+                for user in partition
+            ]
+            written += _write_chunk(files, rows, lambda row: row[5])
+        complete = True
+    finally:
+        result.close()
+        files.close(complete)
+    return written
+
+
+def export_parquet(engine, root: Path, now: datetime, settle_seconds: int, chunk_size: int) -> dict:
+    """
+    Export what changed since the watermarks saved under `root` and move
+    them on. `now` is naive UTC. Returns the rows written per table.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    watermarks = load_watermarks(root)
+    settle_before = now - timedelta(seconds=settle_seconds)
+    changed_from = datetime.fromisoformat(watermarks.get("users_changed_before", "1970-01-01T00:00:00"))
+
+    with engine.connect() as conn:
+        logs, last_id = export_logs(conn, root, watermarks.get("eco_logs_id", 0), settle_before, chunk_size)
+        users = export_users(conn, root, changed_from, settle_before, chunk_size)
+
+    _save_watermarks(root, {
+        "eco_logs_id": last_id,
+        "users_changed_before": settle_before.isoformat(),
+        "exported_at": now.replace(tzinfo=timezone.utc).isoformat(),
+    })
+    return {"eco_logs": logs, "users": users}
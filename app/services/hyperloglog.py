@@ -0,0 +1,72 @@
+import hashlib
+import math
+
+# 2 ** -rank for every rank a register can hold
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(66)]
+
+class HyperLogLog:
+    """
+    Approximate distinct counter (HyperLogLog, with linear counting for
+    small cardinalities).
+
+    Items hash to one of 2**precision registers, each keeping the longest
+    run of leading zero bits seen in the rest of the hash. The standard
+    error is about 1.04 / sqrt(2**precision): 1.6% at the default 12, in
+    4 KiB. Two properties make it fit per-day persisted sketches:
+
+    * merging is the register-wise maximum, so the sketch of a week is the
+      merge of its days and counts each user once;
+    * adding an item twice, or merging a sketch into itself, changes
+      nothing, so a repeated flush cannot inflate a count.
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @staticmethod
+    def _hash(item) -> int:
+        return int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), "big")
+
+    def add(self, item):
+        hashed = self._hash(item)
+        rest_bits = 64 - self.precision
+        index = hashed >> rest_bits
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        import numpy as np  # here, not at import: it is heavy and only merges need it
+        mine = np.frombuffer(self.registers, dtype=np.uint8)
+        np.maximum(mine, np.frombuffer(other.registers, dtype=np.uint8), out=mine)
+
+    def copy(self) -> "HyperLogLog":
+        sketch = HyperLogLog(self.precision)
+        sketch.registers = bytearray(self.registers)
+        return sketch
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(_INVERSE_POWERS[register] for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        sketch = cls(len(data).bit_length() - 1)
+        if len(data) != 1 << sketch.precision:
+            raise ValueError("register count must be a power of two")
+        sketch.registers = bytearray(data)
+        return sketch
@@ -0,0 +1,163 @@
+"""
+Live updates pushed to clients over server-sent events.
+
+BroadcastHub is an in-process pub/sub. Each subscriber has a bounded buffer,
+and a subscriber whose buffer is full when an event arrives is evicted: its
+buffer is dropped and its stream ends with an "evicted" event, so the client
+reconnects and refetches instead of the worker holding a growing backlog for
+a connection that is not reading. Publishing never waits on a subscriber.
+
+Log writes publish after they commit, to "leaderboard" (everyone) and
+"dashboard:<user id>" (that user's tabs). The hub only sees writes made in
+its own worker process; a client connected to another worker learns about
+them on its next reconnect, at most LIVE_MAX_CONNECTION_SECONDS later.
+"""
+import asyncio
+import json
+from collections import defaultdict, deque
+from typing import Iterable, Optional
+
+from ..core import metrics
+from ..core.config import settings
+
+
+class HubFull(Exception):
+    pass
+
+
+def format_event(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+EVICTED = format_event("evicted", {"reason": "slow consumer"})
+
+
+class Subscriber:
+    __slots__ = ("topics", "buffer_size", "evicted", "_events", "_ready")
+
+    def __init__(self, topics: frozenset, buffer_size: int):
+        self.topics = topics
+        self.buffer_size = buffer_size
+        self.evicted = False
+        self._events = deque()
+        self._ready = asyncio.Event()
+
+    def offer(self, event: bytes) -> bool:
+        if len(self._events) >= self.buffer_size:
+            return False
+        self._events.append(event)
+        self._ready.set()
+        return True
+
+    def evict(self):
+        self.evicted = True
+        self._events.clear()
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[bytes]:
+        """The next event, EVICTED once evicted, or None after `timeout` seconds without one."""
+        if not self._events and not self.evicted:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.evicted:
+            return EVICTED
+        return self._events.popleft()
+
+
+evictions_total = metrics.registry.register(metrics.Counter(
+    "live_evictions_total", "Event streams closed because the client fell behind."
+))
+
+
+class BroadcastHub:
+    """
+    Subscribers by topic. Only touched from the event loop; publish() hands
+    events from other threads over to it.
+    """
+
+    def __init__(self, buffer_size: int = 64, max_subscribers: int = 10_000):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.subscriber_count = 0
+        self.evictions = 0
+        self._topics = defaultdict(set)
+        self._loop = None
+
+    def subscribe(self, topics: Iterable[str]) -> Subscriber:
+        if self.subscriber_count >= self.max_subscribers:
+            raise HubFull()
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(frozenset(topics), self.buffer_size)
+        for topic in subscriber.topics:
+            self._topics[topic].add(subscriber)
+        self.subscriber_count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        removed = False
+        for topic in subscriber.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None and subscriber in subscribers:
+                subscribers.discard(subscriber)
+                removed = True
+                if not subscribers:
+                    del self._topics[topic]
+        if removed:
+            self.subscriber_count -= 1
+
+    def publish(self, topic: str, event: str, data):
+        """Send an event to the topic's subscribers. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None or topic not in self._topics:
+            return  # nobody listening; skip the encoding
+        payload = format_event(event, data)
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._deliver(topic, payload)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._deliver, topic, payload)
+            except RuntimeError:
+                pass  # the loop has closed
+
+    def _deliver(self, topic: str, payload: bytes):
+        for subscriber in list(self._topics.get(topic, ())):
+            if not subscriber.offer(payload):
+                self.unsubscribe(subscriber)
+                subscriber.evict()
+                self.evictions += 1
+                evictions_total.inc()
+
+
+hub = BroadcastHub(settings.LIVE_SUBSCRIBER_BUFFER, settings.LIVE_MAX_SUBSCRIBERS)
+
+metrics.registry.register(metrics.Gauge(
+    "live_subscribers", "Open server-sent event streams in this worker.",
+    sample=lambda: {(): hub.subscriber_count},
+))
+
+
+def dashboard_topic(user_id) -> str:
+    return f"dashboard:{user_id}"
+
+
+def publish_score(user_id: int, username: str, full_name: Optional[str], eco_score: float,
+                  total_emissions_saved: float, data_version: int, points_earned: int, emissions_saved: float):
+    """After a log write commits: the user's new standing, and what changed."""
+    hub.publish("leaderboard", "leaderboard", {
+        "username": username,
+        "full_name": full_name or username,
+        "eco_score": float(eco_score or 0),
+        "emissions_saved": float(total_emissions_saved or 0),
+    })
+    hub.publish(dashboard_topic(user_id), "dashboard", {
+        "eco_score": float(eco_score or 0),
+        "total_emissions_saved": float(total_emissions_saved or 0),
+        "data_version": data_version,
+        "change": {"points_earned": points_earned, "emissions_saved": emissions_saved},
+    })
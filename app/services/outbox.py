@@ -0,0 +1,193 @@
+"""
+Transactional outbox for the side effects of writes.
+
+Write units call enqueue() to store side effects - savings rollups, badge
+evaluation - as OutboxEvent rows in the write's own transaction. The request
+commits without running them, and they are not lost if the process dies
+right after. OutboxWorker drains the table in batches, inside the web
+process (OUTBOX_WORKER_IN_PROCESS) or on its own with
+`python -m app.jobs.outbox_worker`.
+
+Delivery is at least once. A worker claims an event by deleting its row in
+the same transaction that runs the handler, so when two workers pick up the
+same event only the one whose DELETE removes the row applies it. A failed
+batch is retried one event per transaction, so a bad event only holds back
+itself: it keeps its error and is retried until OUTBOX_MAX_ATTEMPTS, then
+left in the table for someone to look at. Handlers must be safe to run
+again after a failure.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, delete, update
+from sqlalchemy.orm import Session
+
+from ..core import metrics
+from ..core.config import settings
+from ..core.database import SessionLocal, call_after_commit
+from ..models.outbox import OutboxEvent
+from .badges import evaluate_badges
+from .savings_stats import apply_savings_delta
+
+logger = logging.getLogger(__name__)
+
+# topic -> handler(db: Session, payload: dict), run in the claiming transaction
+HANDLERS = {}
+
+def handler(topic: str):
+    def register(fn):
+        HANDLERS[topic] = fn
+        return fn
+    return register
+
+@handler("savings.delta")
+def _savings_delta(db: Session, payload: dict):
+    activity_date = payload["activity_date"]
+    apply_savings_delta(
+        db, payload["user_id"], payload["activity_type"],
+        datetime.fromisoformat(activity_date) if activity_date else None, payload["delta"]
+    )
+
+@handler("badges.evaluate")
+def _badges_evaluate(db: Session, payload: dict):
+    evaluate_badges(db, payload["user_id"])
+
+
+def enqueue(session, topic: str, **payload):
+    """
+    Store a side effect in `session`'s transaction. Works with any session
+    a write unit gets; the payload must be JSON-serializable.
+    """
+    session.add(OutboxEvent(topic=topic, payload=json.dumps(payload)))
+    call_after_commit(session, worker.wake)
+
+
+delivered_total = metrics.registry.register(metrics.Counter(
+    "outbox_events_delivered_total", "Outbox events whose handler ran and committed.", ("topic",)
+))
+failed_total = metrics.registry.register(metrics.Counter(
+    "outbox_events_failed_total", "Outbox event deliveries that raised and will be retried.", ("topic",)
+))
+
+
+class OutboxWorker:
+    def __init__(self, session_factory, batch_size: int = 100, poll_seconds: float = 1.0,
+                 max_attempts: int = 10, clock=datetime.utcnow):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self._clock = clock
+        # Age of the oldest undelivered event when the worker last looked
+        self.lag_seconds = 0.0
+        self._loop = None
+        self._wakeup = None
+
+    def wake(self):
+        """Drain now rather than at the next poll. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # the loop has closed
+
+    def fetch(self, db: Session) -> list:
+        events = db.execute(
+            select(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload, OutboxEvent.created_at)
+            .where(OutboxEvent.attempts < self.max_attempts)
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        self.lag_seconds = max(0.0, (self._clock() - events[0].created_at).total_seconds()) if events else 0.0
+        return events
+
+    def _apply(self, db: Session, event) -> bool:
+        if not db.execute(delete(OutboxEvent).where(OutboxEvent.id == event.id)).rowcount:
+            return False  # another worker delivered it first
+        handle = HANDLERS.get(event.topic)
+        if handle is None:
+            raise LookupError(f"no handler for outbox topic {event.topic!r}")
+        handle(db, json.loads(event.payload))
+        return True
+
+    def deliver(self, db: Session, events) -> int:
+        """Run the handlers for `events`; returns how many this call delivered."""
+        if not events:
+            return 0
+        delivered = None
+        if len(events) > 1:
+            try:
+                delivered = [event for event in events if self._apply(db, event)]
+                db.commit()
+            except Exception:
+                db.rollback()
+                delivered = None
+        if delivered is None:
+            delivered = []
+            for event in events:
+                try:
+                    if self._apply(db, event):
+                        delivered.append(event)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.exception("outbox event failed", extra={"event_id": event.id, "topic": event.topic})
+                    db.execute(
+                        update(OutboxEvent).where(OutboxEvent.id == event.id)
+                        .values(attempts=OutboxEvent.attempts + 1, last_error=repr(e)[:1000])
+                    )
+                    db.commit()
+                    failed_total.inc((event.topic,))
+        for event in delivered:
+            delivered_total.inc((event.topic,))
+        return len(delivered)
+
+    def drain_once(self) -> int:
+        """Deliver one batch. Returns the number of events picked up."""
+        db = self.session_factory()
+        try:
+            events = self.fetch(db)
+            self.deliver(db, events)
+            return len(events)
+        finally:
+            db.close()
+
+    async def run(self):
+        """Background task: drain whenever a write commits, and every poll_seconds."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                self._wakeup.clear()
+                try:
+                    picked_up = await run_in_threadpool(self.drain_once)
+                except Exception:
+                    logger.exception("outbox drain failed")
+                    picked_up = 0
+                if picked_up >= self.batch_size:
+                    continue  # a backlog: keep going
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._loop = None
+
+
+worker = OutboxWorker(
+    SessionLocal,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_seconds=settings.OUTBOX_POLL_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+)
+
+metrics.registry.register(metrics.Gauge(
+    "outbox_lag_seconds", "Age of the oldest undelivered outbox event when the worker last polled.",
+    sample=lambda: {(): worker.lag_seconds},
+))
@@ -0,0 +1,125 @@
+import math
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so any quantile is accurate to
+    within `relative_accuracy` of the true value. Bucket counts are plain
+    integers, which makes two properties cheap:
+
+    * merging sketches from several workers is adding their counts;
+    * a value can be removed again, so when a user's total changes the old
+      total is moved to its new bucket instead of being counted twice.
+    """
+
+    # Values at or below this are counted in the zero bucket
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins = {}
+        self.zero_count = 0
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(key-1), gamma^key]
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def add(self, value: float, count: int = 1):
+        if value <= self.MIN_VALUE:
+            self.zero_count += count
+            return
+        key = self._key(value)
+        new_count = self.bins.get(key, 0) + count
+        if new_count:
+            self.bins[key] = new_count
+        else:
+            del self.bins[key]
+
+    def remove(self, value: float, count: int = 1):
+        self.add(value, -count)
+
+    def replace(self, old_value, new_value):
+        """Move one observation from old_value to new_value (either may be None)."""
+        if old_value is not None:
+            self.remove(old_value)
+        if new_value is not None:
+            self.add(new_value)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            new_count = self.bins.get(key, 0) + count
+            if new_count:
+                self.bins[key] = new_count
+            else:
+                self.bins.pop(key, None)
+
+    def copy(self) -> "QuantileSketch":
+        sketch = QuantileSketch(self.relative_accuracy)
+        sketch.bins = dict(self.bins)
+        sketch.zero_count = self.zero_count
+        return sketch
+
+    def rank(self, value: float) -> float:
+        """
+        Fraction of observations below `value`, counting observations in the
+        same bucket as half below (the usual percentile-rank convention).
+        """
+        total = self.count
+        if total <= 0:
+            return 0.0
+        if value <= self.MIN_VALUE:
+            return 0.5 * self.zero_count / total
+
+        key = self._key(value)
+        below = self.zero_count
+        same = 0
+        for bucket, count in self.bins.items():
+            if bucket < key:
+                below += count
+            elif bucket == key:
+                same = count
+        return min(max((below + 0.5 * same) / total, 0.0), 1.0)
+
+    def quantile(self, q: float):
+        """Approximate value at quantile q (0..1), or None if empty."""
+        total = self.count
+        if total <= 0:
+            return None
+        target = q * (total - 1)
+        seen = self.zero_count
+        if seen > target:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > target:
+                return self._value(key)
+        return self._value(max(self.bins))
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "bins": {str(key): count for key, count in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.zero_count = data.get("zero_count", 0)
+        sketch.bins = {int(key): count for key, count in data.get("bins", {}).items() if count}
+        return sketch
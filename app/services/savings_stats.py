@@ -0,0 +1,279 @@
+"""
+Percentile rankings of users' emissions savings.
+
+Every log write adjusts the user's running totals (UserSavingsTotal) and, once
+the transaction commits, moves the user from their old total to the new one in
+an in-process QuantileSketch delta. A background loop merges the deltas into
+the persisted sketches every SAVINGS_SKETCH_FLUSH_SECONDS and reloads the merged
+result, so every worker process ranks against everyone's writes.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, delete, insert, func, or_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SessionLocal, call_after_commit
+from ..models.log import EcoLog
+from ..models.savings import UserSavingsTotal, SavingsSketch
+from .quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+ALL_PERIOD = "all"
+ALL_TYPES = ""
+
+def week_key(moment: datetime) -> str:
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def scope_key(period: str, activity_type: str) -> str:
+    return f"{period}:{activity_type or '*'}"
+
+def _type_value(activity_type) -> str:
+    return getattr(activity_type, "value", activity_type) or ALL_TYPES
+
+
+class SketchRegistry:
+    """
+    Per-process view of the savings sketches: the last persisted snapshot plus
+    the local changes that have not been flushed yet.
+    """
+
+    def __init__(self, relative_accuracy: float):
+        self.relative_accuracy = relative_accuracy
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._persisted = {}
+        self._flushing = {}
+        self._pending = {}
+        self._loaded_at = None
+
+    def record(self, scope: str, old_total, new_total):
+        with self._lock:
+            delta = self._pending.get(scope)
+            if delta is None:
+                delta = self._pending[scope] = QuantileSketch(self.relative_accuracy)
+            delta.replace(old_total, new_total)
+
+    def snapshot(self, scope: str) -> QuantileSketch:
+        with self._lock:
+            persisted = self._persisted.get(scope)
+            sketch = persisted.copy() if persisted else QuantileSketch(self.relative_accuracy)
+            for layer in (self._flushing, self._pending):
+                if scope in layer:
+                    sketch.merge(layer[scope])
+        return sketch
+
+    def is_stale(self, max_age: float) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > max_age
+
+    def flush(self, db: Session):
+        """Merge local deltas into the stored sketches, then reload the current scopes."""
+        if not self._flush_lock.acquire(blocking=False):
+            return  # another thread is already flushing
+        try:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                flushing = self._flushing
+
+            try:
+                rows = {
+                    row.scope: row
+                    for row in db.execute(
+                        select(SavingsSketch).where(SavingsSketch.scope.in_(list(flushing))).with_for_update()
+                    ).scalars()
+                } if flushing else {}
+                for scope, delta in flushing.items():
+                    row = rows.get(scope)
+                    if row is None:
+                        row = SavingsSketch(scope=scope)
+                        db.add(row)
+                        sketch = delta
+                    else:
+                        sketch = QuantileSketch.from_dict(json.loads(row.payload))
+                        sketch.merge(delta)
+                    row.payload = json.dumps(sketch.to_dict())
+                db.commit()
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    for scope, delta in flushing.items():
+                        self._pending.setdefault(scope, QuantileSketch(self.relative_accuracy)).merge(delta)
+                    self._flushing = {}
+                raise
+
+            current_week = week_key(datetime.utcnow())
+            rows = db.execute(
+                select(SavingsSketch).where(or_(
+                    SavingsSketch.scope.like(f"{ALL_PERIOD}:%"),
+                    SavingsSketch.scope.like(f"{current_week}:%"),
+                ))
+            ).scalars().all()
+            persisted = {row.scope: QuantileSketch.from_dict(json.loads(row.payload)) for row in rows}
+
+            with self._lock:
+                self._persisted = persisted
+                self._flushing = {}
+                self._loaded_at = time.monotonic()
+        finally:
+            self._flush_lock.release()
+
+    def reset(self):
+        with self._lock:
+            self._persisted, self._flushing, self._pending = {}, {}, {}
+            self._loaded_at = None
+
+
+registry = SketchRegistry(settings.SAVINGS_SKETCH_ACCURACY)
+
+
+def apply_savings_delta(db: Session, user_id: int, activity_type, activity_date, delta: float):
+    """
+    Add `delta` kg to the user's all-time and weekly totals, both overall and
+    for `activity_type`. Sketches are updated after the caller commits.
+    """
+    type_value = _type_value(activity_type)
+    periods = (ALL_PERIOD, week_key(activity_date or datetime.utcnow()))
+    types = (ALL_TYPES, type_value)
+
+    rows = {
+        (row.period, row.activity_type): row
+        for row in db.query(UserSavingsTotal).filter(
+            UserSavingsTotal.user_id == user_id,
+            UserSavingsTotal.period.in_(periods),
+            UserSavingsTotal.activity_type.in_(types)
+        )
+    }
+
+    for period in periods:
+        for type_key in types:
+            row = rows.get((period, type_key))
+            old_total = row.total if row else None
+            new_total = (old_total or 0.0) + delta
+
+            # A user with nothing saved in a scope drops out of its population
+            if new_total <= QuantileSketch.MIN_VALUE:
+                new_total = None
+                if row:
+                    db.delete(row)
+            elif row:
+                row.total = new_total
+            else:
+                db.add(UserSavingsTotal(
+                    user_id=user_id, period=period, activity_type=type_key, total=new_total
+                ))
+
+            if old_total is not None or new_total is not None:
+                call_after_commit(db, registry.record, scope_key(period, type_key), old_total, new_total)
+
+    # Make new rows visible to a second call in the same transaction
+    db.flush()
+
+
+def get_user_percentiles(db: Session, user_id: int) -> dict:
+    """
+    Percentile rank of the user's all-time and weekly totals, overall and per
+    activity type, against the sketches as last loaded. Only reads `db`:
+    callers refresh stale sketches with flush_sketches() first.
+    """
+    current_week = week_key(datetime.utcnow())
+    totals = {
+        (row.period, row.activity_type): row.total
+        for row in db.query(UserSavingsTotal).filter(
+            UserSavingsTotal.user_id == user_id,
+            UserSavingsTotal.period.in_((ALL_PERIOD, current_week))
+        )
+    }
+
+    def rank(period, type_key):
+        total = totals.get((period, type_key), 0.0)
+        sketch = registry.snapshot(scope_key(period, type_key))
+        return {
+            "emissions_saved": total,
+            "percentile": round(100 * sketch.rank(total), 1) if total else 0.0,
+        }
+
+    type_keys = sorted({type_key for _, type_key in totals if type_key})
+    return {
+        "week": current_week,
+        "all_time": rank(ALL_PERIOD, ALL_TYPES),
+        "weekly": rank(current_week, ALL_TYPES),
+        "by_activity_type": {
+            type_key: {
+                "all_time": rank(ALL_PERIOD, type_key),
+                "weekly": rank(current_week, type_key),
+            }
+            for type_key in type_keys
+        },
+    }
+
+
+def flush_sketches():
+    db = SessionLocal()
+    try:
+        registry.flush(db)
+    finally:
+        db.close()
+
+async def run_flush_loop():
+    """Background task: periodically persist and reload the sketches."""
+    while True:
+        await asyncio.sleep(settings.SAVINGS_SKETCH_FLUSH_SECONDS)
+        try:
+            await run_in_threadpool(flush_sketches)
+        except Exception:
+            logger.exception("savings sketch flush failed")
+
+
+def rebuild_savings_stats(db: Session) -> int:
+    """
+    Recompute all-time and current-week totals from eco_logs and rebuild every
+    sketch from them. Used to backfill existing data; returns the number of
+    total rows written.
+    """
+    now = datetime.utcnow()
+    year, week, _ = now.isocalendar()
+    current_week = week_key(now)
+    week_start = datetime.combine(date.fromisocalendar(year, week, 1), datetime.min.time())
+
+    rows = []
+    sketches = defaultdict(lambda: QuantileSketch(registry.relative_accuracy))
+    for period, since in ((ALL_PERIOD, None), (current_week, week_start)):
+        query = select(
+            EcoLog.user_id, EcoLog.activity_type, func.sum(EcoLog.emissions_saved)
+        ).group_by(EcoLog.user_id, EcoLog.activity_type)
+        if since is not None:
+            query = query.where(EcoLog.activity_date >= since)
+
+        overall = defaultdict(float)
+        for user_id, activity_type, total in db.execute(query):
+            overall[user_id] += total or 0.0
+            rows.append((user_id, period, _type_value(activity_type), total or 0.0))
+        rows.extend((user_id, period, ALL_TYPES, total) for user_id, total in overall.items())
+
+    rows = [row for row in rows if row[3] > QuantileSketch.MIN_VALUE]
+    for _, period, type_key, total in rows:
+        sketches[scope_key(period, type_key)].add(total)
+
+    db.execute(delete(UserSavingsTotal))
+    db.execute(delete(SavingsSketch))
+    if rows:
+        db.execute(insert(UserSavingsTotal), [
+            {"user_id": user_id, "period": period, "activity_type": type_key, "total": total}
+            for user_id, period, type_key, total in rows
+        ])
+    db.add_all(
+        SavingsSketch(scope=scope, payload=json.dumps(sketch.to_dict()))
+        for scope, sketch in sketches.items()
+    )
+    db.commit()
+    registry.reset()
+    return len(rows)
@@ -0,0 +1,79 @@
+"""
+Full-text search over log descriptions.
+
+SQLite matches against the eco_logs_fts FTS5 index (porter stemming, so
+"cycling" finds "cycled") and ranks by bm25. PostgreSQL matches the
+generated search_vector column through its GIN index and ranks by
+ts_rank_cd. Both indexes are kept in sync by the database itself; see
+models/log.py.
+
+Results are ordered by (score, id), where a lower score is a better match,
+and paginated by keyset. The cursor is the last hit's (score, id), so a
+page costs the same however deep it is.
+"""
+import base64
+import json
+import math
+import re
+from typing import Optional
+
+from sqlalchemy import select, func, literal_column, or_, and_, table, column
+
+from ..core.database import engine
+from ..models.log import EcoLog
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_MAX_LOG_ID = 2 ** 63 - 1
+
+
+def match_terms(q: str) -> list:
+    return _WORD.findall(q.lower())
+
+
+def encode_cursor(score: float, log_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, log_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Raises ValueError for anything encode_cursor did not produce."""
+    try:
+        score, log_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (TypeError, OverflowError):
+        raise ValueError("invalid cursor")
+    # Both are bound into the keyset comparison, where anything else fails
+    if type(score) not in (int, float) or not math.isfinite(score):
+        raise ValueError("invalid cursor")
+    if type(log_id) is not int or not 0 <= log_id <= _MAX_LOG_ID:
+        raise ValueError("invalid cursor")
+    return float(score), log_id
+
+
+def search_query(columns, user_id: int, q: str, after: Optional[tuple], limit: int,
+                 dialect: str = engine.dialect.name):
+    """
+    The select for one page of a user's hits: `columns` plus a "score"
+    column, best first. `after` is a decoded cursor.
+    """
+    if dialect == "postgresql":
+        query = func.plainto_tsquery("english", q)
+        vector = literal_column("eco_logs.search_vector")
+        score = -func.ts_rank_cd(vector, query)
+        statement = select(*columns, score.label("score")).where(vector.op("@@")(query))
+    else:
+        fts_table = table("eco_logs_fts", column("rowid"))
+        fts = literal_column("eco_logs_fts")  # the table's own name is its match column
+        score = func.bm25(fts)
+        # Each term quoted: user input never reaches the FTS5 query syntax
+        terms = " ".join(f'"{term}"' for term in match_terms(q))
+        statement = (
+            select(*columns, score.label("score"))
+            .select_from(EcoLog)
+            .join(fts_table, EcoLog.id == fts_table.c.rowid)
+            .where(fts.op("MATCH")(terms))
+        )
+
+    statement = statement.where(EcoLog.user_id == user_id, EcoLog.is_archived.is_(False))
+    if after is not None:
+        last_score, last_id = after
+        statement = statement.where(or_(score > last_score, and_(score == last_score, EcoLog.id > last_id)))
+    return statement.order_by(score, EcoLog.id).limit(limit)
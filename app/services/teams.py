@@ -0,0 +1,79 @@
+"""
+Team totals, maintained incrementally.
+
+A team's member_count, eco_score and total_emissions_saved are the sums over
+its members. Every write that changes a member's score applies the same
+delta to the team in its transaction (add_to_team). Joining or leaving moves
+the member's whole score between teams (move_member). Team pages and the
+team leaderboard read the counters and never sum members' rows.
+
+Writes that touch a user's score or team first update or lock the user's
+row. That orders them, so a log write and a team change for the same user
+cannot both apply against the old team.
+"""
+from typing import Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+
+from ..models.team import Team
+from ..models.user import User
+
+
+async def add_to_team(session, team_id: Optional[int], points: float, emissions: float):
+    """Apply a member's score change to their team, if they have one."""
+    if team_id is None:
+        return
+    await session.execute(update(Team).where(Team.id == team_id).values(
+        eco_score=Team.eco_score + points,
+        total_emissions_saved=Team.total_emissions_saved + emissions,
+    ))
+
+
+async def move_member(session, user_id: int, team_id: Optional[int]) -> Optional[int]:
+    """
+    Put the user in `team_id` (None to leave), moving their score with them.
+    Returns the team they were in.
+    """
+    member = (await session.execute(
+        select(User.team_id, User.eco_score, User.total_emissions_saved)
+        .where(User.id == user_id).with_for_update()
+    )).one()
+    if member.team_id == team_id:
+        return team_id
+
+    eco_score, emissions = member.eco_score or 0.0, member.total_emissions_saved or 0.0
+    for moved_team, sign in ((member.team_id, -1), (team_id, 1)):
+        if moved_team is not None:
+            await session.execute(update(Team).where(Team.id == moved_team).values(
+                member_count=Team.member_count + sign,
+                eco_score=Team.eco_score + sign * eco_score,
+                total_emissions_saved=Team.total_emissions_saved + sign * emissions,
+            ))
+    await session.execute(update(User).where(User.id == user_id).values(team_id=team_id))
+    return member.team_id
+
+
+def rebuild_team_totals(db: Session) -> int:
+    """
+    Recompute every team's counters from its members' user rows, which hold
+    their running totals. Used to backfill or check them; returns the
+    number of teams.
+    """
+    sums = {
+        team_id: (count, score, emissions)
+        for team_id, count, score, emissions in db.execute(
+            select(
+                User.team_id, func.count(User.id),
+                func.coalesce(func.sum(User.eco_score), 0.0), func.coalesce(func.sum(User.total_emissions_saved), 0.0),
+            ).where(User.team_id.is_not(None)).group_by(User.team_id)
+        )
+    }
+    team_ids = db.scalars(select(Team.id)).all()
+    for team_id in team_ids:
+        count, score, emissions = sums.get(team_id, (0, 0.0, 0.0))
+        db.execute(update(Team).where(Team.id == team_id).values(
+            member_count=count, eco_score=score, total_emissions_saved=emissions
+        ))
+    db.commit()
+    return len(team_ids)
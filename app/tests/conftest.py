@@ -1,13 +1,28 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# The app reads its settings at import, so point it at a scratch database first
+_db_dir = tempfile.mkdtemp(prefix="ecopulse-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core import database
 from app.main import app
 from app.database import Base, engine, SessionLocal
+from app.services import data_version
 
 @pytest.fixture(scope="function")
 def db():
     # Recreate the DB tables before each test
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Fresh tables restart user ids and versions, so memoized results would match them
+    data_version.memo.clear()
     db = SessionLocal()
     try:
         yield db
@@ -17,3 +32,77 @@ def db():
 @pytest.fixture(scope="function")
 def client(db):
     return TestClient(app)
+
+@pytest.fixture
+def signup(client):
+    """Signs a user up and logs them in; returns their Authorization headers."""
+    def sign_up(email, full_name="Test User", password="secret1"):
+        body = {"email": email, "full_name": full_name, "password": password, "confirm_password": password}
+        assert client.post("/auth/signup", json=body).status_code == 200
+        token = client.post("/auth/login", json={"email": email, "password": password}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    return sign_up
+
+@pytest.fixture
+def auth(signup):
+    return signup("user@example.com")
+
+@pytest.fixture
+def create_log(client):
+    """Logs an activity as the user with `headers`; returns the created log."""
+    def create(headers, activity_type="transport", description="cycled to work"):
+        body = {"activity_type": activity_type, "description": description}
+        response = client.post("/api/logs/", json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["log"]
+    return create
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+def _app_engines():
+    engines = [database.engine, database.request_engine, database.read_engine]
+    for async_engine in (database.async_engine, database.async_request_engine, database.async_read_engine):
+        if async_engine is not None:
+            engines.append(async_engine.sync_engine)
+    # The same engine can appear under several names
+    unique = {}
+    for candidate in engines:
+        if candidate is not None:
+            unique[id(candidate)] = candidate
+    return list(unique.values())
+
+
+@contextmanager
+def _counting_queries():
+    counter = QueryCounter()
+    engines = _app_engines()
+    for target in engines:
+        event.listen(target, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Counts SQL statements sent through any of the app's engines:
+
+        with count_queries() as queries:
+            client.get("/api/profile/badges", headers=auth)
+        assert queries.count <= 2
+    """
+    return _counting_queries
@@ -0,0 +1,104 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.models.log import EcoLog
+from app.models.user import User
+from app.services import active_users
+from app.services.active_users import active_user_counts, rebuild_active_users
+from app.services.hyperloglog import HyperLogLog
+
+
+def _sketch(items, precision=12):
+    sketch = HyperLogLog(precision)
+    for item in items:
+        sketch.add(item)
+    return sketch
+
+
+def test_hyperloglog_estimates_within_its_error():
+    assert _sketch([]).count() == 0
+    assert _sketch([1, 2, 3, 3, 3]).count() == 3
+    for n in (1000, 50000):
+        # Well inside three standard errors (1.6% each at precision 12)
+        assert _sketch(range(n)).count() == pytest.approx(n, rel=0.05)
+
+
+def test_merge_is_a_union_and_idempotent():
+    monday, tuesday = _sketch(range(0, 3000)), _sketch(range(2000, 5000))
+    week = monday.copy()
+    week.merge(tuesday)
+    assert week.count() == pytest.approx(5000, rel=0.05)
+
+    again = week.copy()
+    again.merge(tuesday)
+    again.merge(week)
+    assert again.to_bytes() == week.to_bytes()
+    assert HyperLogLog.from_bytes(week.to_bytes()).count() == week.count()
+    with pytest.raises(ValueError):
+        week.merge(HyperLogLog(10))
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    active_users.registry.reset()
+    yield
+    active_users.registry.reset()
+
+
+def test_daily_sketches_merge_into_weekly_and_monthly_counts(db):
+    today = date(2026, 10, 19)
+    # User u logs every `u % 10 + 1` days, as transport for u < 50, food otherwise
+    for days_ago in range(40):
+        for user_id in range(100):
+            if days_ago % (user_id % 10 + 1) == 0:
+                active_type = "transport" if user_id < 50 else "food"
+                active_users.registry.record(user_id, active_type, today - timedelta(days=days_ago))
+    active_users.registry.flush(db)
+    stored = active_user_counts(db, today)
+    # Flushing users a stored sketch already has changes nothing
+    active_users.registry.record(7, "transport", today)
+    active_users.registry.flush(db)
+    assert active_user_counts(db, today) == stored
+
+    counts = active_user_counts(db, today - timedelta(days=1))
+    # Daily loggers; everyone logging at least weekly; everyone
+    assert (counts["dau"], counts["wau"], counts["mau"]) == (10, pytest.approx(70, abs=2), pytest.approx(100, abs=2))
+    assert counts["by_activity_type"]["transport"] == {
+        "dau": 5, "wau": pytest.approx(35, abs=2), "mau": pytest.approx(50, abs=2)
+    }
+    assert active_user_counts(db, today + timedelta(days=40)) == {
+        "as_of": today + timedelta(days=40), "dau": 0, "wau": 0, "mau": 0, "by_activity_type": {}
+    }
+
+
+@pytest.fixture
+def users(signup):
+    return [signup(f"{name}@example.com") for name in ("admin", "member", "other")]
+
+
+def test_admin_endpoint_counts_log_writers(client, db, users):
+    admin, member, other = users
+    db.execute(update(User).where(User.email == "admin@example.com").values(is_admin=True))
+    db.commit()
+    assert client.get("/api/admin/active-users", headers=member).status_code == 403
+
+    for headers, activity_type in ((member, "water"), (member, "food"), (other, "water")):
+        body = {"activity_type": activity_type, "description": "refilled a bottle"}
+        assert client.post("/api/logs/", json=body, headers=headers).status_code == 200
+
+    response = client.get("/api/admin/active-users", headers=admin)
+    assert response.status_code == 200
+    counts = response.json()
+    assert (counts["dau"], counts["wau"], counts["mau"]) == (2, 2, 2)
+    assert counts["by_activity_type"] == {"food": {"dau": 1, "wau": 1, "mau": 1}, "water": {"dau": 2, "wau": 2, "mau": 2}}
+
+    # Backfilled from the logs, last week's writers count towards WAU but not DAU
+    last_week = datetime.utcnow() - timedelta(days=3)
+    db.execute(update(EcoLog).where(EcoLog.activity_type == "food").values(activity_date=last_week))
+    db.commit()
+    rebuild_active_users(db, last_week.date() - timedelta(days=30))
+    counts = client.get("/api/admin/active-users", headers=admin).json()
+    assert counts["by_activity_type"]["food"] == {"dau": 0, "wau": 1, "mau": 1}
+    assert (counts["dau"], counts["wau"]) == (2, 2)
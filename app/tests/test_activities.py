@@ -1,43 +1,12 @@
-import uuid
-
-def auth_header(client):
-    email = f"shie{uuid.uuid4().hex[:6]}@example.com"
-    client.post("/auth/register", json={
-        "username": "Shie",
-        "email": email,
-        "password": "Password123"
-    })
-    login = client.post("/auth/login", json={
-        "email": email,
-        "password": "Password123"
-    }).json()
-    return {"Authorization": f"Bearer {login['access_token']}"}
-
-
-def test_create_activity(client):
-    headers = auth_header(client)
-    payload = {
-        "name": "Tree planting",
-        "category": "environment",
-        "carbon_output": 5.0
-    }
-    response = client.post("/activities/", json=payload, headers=headers)
-    assert response.status_code == 201
-    data = response.json()
-    assert data["name"] == payload["name"]
-    assert data["carbon_output"] == payload["carbon_output"]
-
-
-def test_get_activities(client):
-    headers = auth_header(client)
-    client.post("/activities/", json={
-        "name": "Cycling",
-        "category": "fitness",
-        "carbon_output": 2.5
-    }, headers=headers)
-    response = client.get("/activities/", headers=headers)
+def test_recent_activities_lists_the_users_logs_newest_first(client, auth, signup):
+    for description in ("planted a tree", "cycled to work"):
+        body = {"activity_type": "transport", "description": description}
+        assert client.post("/api/logs/", json=body, headers=auth).status_code == 200
+    other = signup("other@example.com")
+    client.post("/api/logs/", json={"activity_type": "food", "description": "local veg"}, headers=other)
+
+    response = client.get("/api/dashboard/activities", headers=auth)
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list)
-    assert len(data) >= 1
-    assert "name" in data[0]
+    assert [activity["description"] for activity in data] == ["cycled to work", "planted a tree"]
+    assert client.get("/api/dashboard/activities", params={"limit": 1}, headers=auth).json()[0]["id"] == data[0]["id"]
@@ -0,0 +1,87 @@
+import base64
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.models.log import EcoLog
+from app.models.user import User
+from app.services.activity_days import DayBitmap, rebuild_activity_days
+
+
+def _bitmap(*days):
+    bitmap = DayBitmap()
+    for day in days:
+        bitmap.add(day)
+    return bitmap
+
+
+def _run(start, length):
+    return [start + timedelta(days=i) for i in range(length)]
+
+
+def test_bitmap_round_trips_and_rebases_on_the_first_day():
+    d = date(2026, 3, 10)
+    bitmap = _bitmap(d, d + timedelta(days=9), d - timedelta(days=5))
+    stored = bitmap.to_bytes()
+    assert len(stored) == 4 + 2
+    restored = DayBitmap.from_bytes(stored)
+    assert restored.origin == d - timedelta(days=5)
+    assert [day in restored for day in (d - timedelta(days=5), d, d + timedelta(days=1), d + timedelta(days=9))] == [
+        True, True, False, True
+    ]
+    assert len(restored) == 3 and restored.last_active == d + timedelta(days=9)
+
+    restored.discard(d - timedelta(days=5))
+    assert DayBitmap.from_bytes(restored.to_bytes()).origin == d
+    assert DayBitmap.from_bytes(_bitmap().to_bytes()).to_bytes() is None
+
+
+def test_streaks():
+    today = date(2026, 10, 19)
+    bitmap = _bitmap(*_run(date(2026, 1, 1), 40), *_run(today - timedelta(days=6), 7))
+    assert bitmap.longest_streak() == 40
+    assert bitmap.current_streak(today) == 7
+    # The streak survives until a whole day passes without a log
+    assert bitmap.current_streak(today + timedelta(days=1)) == 7
+    assert bitmap.current_streak(today + timedelta(days=2)) == 0
+    assert bitmap.current_streak(date(2026, 2, 5)) == 36
+    assert _bitmap().current_streak(today) == 0 and _bitmap().longest_streak() == 0
+
+
+def test_log_writes_keep_the_bitmap_and_endpoints_current(client, auth, db, create_log):
+    first, second = create_log(auth)["id"], create_log(auth)["id"]
+    streaks = client.get("/api/profile/streaks", headers=auth).json()
+    assert streaks["current_streak"] == 1 and streaks["active_days"] == 1
+    assert streaks["last_active"] == datetime.utcnow().date().isoformat()
+
+    calendar = client.get("/api/profile/calendar", headers=auth).json()
+    assert calendar["days"] == 365 and calendar["active_days"] == 1
+    bits = int.from_bytes(base64.b64decode(calendar["bitmap"]), "little")
+    assert bits == 1 << 364  # today is the last day of the window
+    this_year = client.get("/api/profile/calendar", params={"year": datetime.utcnow().year}, headers=auth).json()
+    assert this_year["start"] == f"{datetime.utcnow().year}-01-01" and this_year["active_days"] == 1
+    last_year = client.get("/api/profile/calendar", params={"year": 9999}, headers=auth)
+    assert last_year.status_code == 200 and last_year.json()["days"] == 365 and last_year.json()["active_days"] == 0
+    assert client.get("/api/profile/calendar", params={"year": 10000}, headers=auth).status_code == 422
+
+    # The day stays marked until its last log goes
+    client.delete(f"/api/logs/{first}", headers=auth)
+    assert client.get("/api/profile/streaks", headers=auth).json()["active_days"] == 1
+    client.delete(f"/api/logs/{second}", headers=auth)
+    assert client.get("/api/profile/streaks", headers=auth).json() == {
+        "current_streak": 0, "longest_streak": 0, "active_days": 0, "last_active": None,
+    }
+
+
+def test_rebuild_matches_the_incremental_bitmap(client, auth, db, create_log):
+    ids = [create_log(auth)["id"] for _ in range(4)]
+    now = datetime.utcnow()
+    for log_id, days_ago in zip(ids, (0, 1, 3, 3)):
+        db.execute(update(EcoLog).where(EcoLog.id == log_id).values(activity_date=now - timedelta(days=days_ago)))
+    db.commit()
+
+    assert rebuild_activity_days(db) == 1
+    stored = db.scalar(select(User.activity_days))
+    bitmap = DayBitmap.from_bytes(stored)
+    assert len(bitmap) == 3
+    assert bitmap.current_streak(now.date()) == 2 and bitmap.longest_streak() == 2
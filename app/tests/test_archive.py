@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, func, update
+
+from app.models.log import EcoLog, EcoLogArchive
+from app.services.archive import archive_cutoff, archive_logs
+
+
+@pytest.fixture
+def history(client, auth, db):
+    """Five logs: three on two days 400 days ago, two today."""
+    ids = []
+    for activity_type in ("transport", "transport", "food", "food", "energy"):
+        response = client.post("/api/logs/", json={"activity_type": activity_type, "description": "x"}, headers=auth)
+        ids.append(response.json()["log"]["id"])
+    old = datetime.utcnow().replace(hour=9) - timedelta(days=400)
+    for log_id, when in zip(ids[:3], (old, old + timedelta(hours=2), old + timedelta(days=1))):
+        db.execute(update(EcoLog).where(EcoLog.id == log_id).values(activity_date=when))
+    db.commit()
+    return ids
+
+
+def _archive(db):
+    return archive_logs(db, archive_cutoff(datetime.utcnow(), 365), chunk_size=10)
+
+
+def test_old_logs_move_to_the_archive_behind_summary_rows(client, auth, db, history):
+    stats = client.get("/api/dashboard/stats", headers=auth).json()
+    categories = client.get("/api/insights/categories", headers=auth).json()
+
+    assert _archive(db) == 3
+    assert _archive(db) == 0
+    assert sorted(db.scalars(select(EcoLogArchive.id))) == history[:3]
+    summaries = db.execute(
+        select(EcoLog.activity_type, EcoLog.entry_count).where(EcoLog.is_archived.is_(True))
+        .order_by(EcoLog.activity_date)
+    ).all()
+    assert [(row.activity_type.value, row.entry_count) for row in summaries] == [("transport", 2), ("food", 1)]
+
+    # Aggregates read the hot table alone and still count every log
+    assert client.get("/api/dashboard/stats", headers=auth).json() == stats
+    assert client.get("/api/insights/categories", headers=auth).json() == categories
+
+
+def test_listing_reads_the_archive_only_past_the_hot_tier(client, auth, db, history, count_queries):
+    _archive(db)
+
+    with count_queries() as queries:
+        page = client.get("/api/logs/", params={"limit": 2}, headers=auth).json()
+    assert [log["id"] for log in page] == [history[4], history[3]]
+    assert not any("eco_logs_archive" in statement for statement in queries.statements)
+
+    everything = client.get("/api/logs/", headers=auth).json()
+    assert [log["id"] for log in everything] == [history[4], history[3], history[2], history[1], history[0]]
+    deep = client.get("/api/logs/", params={"skip": 3, "limit": 5}, headers=auth).json()
+    assert [log["id"] for log in deep] == [history[1], history[0]]
+    activities = client.get("/api/dashboard/activities", params={"fields": "id"}, headers=auth).json()
+    assert activities == [{"id": log_id} for log_id in reversed(history)]
+
+
+def test_summary_rows_cannot_be_edited(client, auth, db, history):
+    _archive(db)
+    summary_id = db.scalar(select(func.min(EcoLog.id)).where(EcoLog.is_archived.is_(True)))
+    assert client.put(f"/api/logs/{summary_id}", json={"description": "y"}, headers=auth).status_code == 404
+    assert client.delete(f"/api/logs/{summary_id}", headers=auth).status_code == 404
@@ -1,73 +1,39 @@
-import uuid
-
-def test_register_user(client):
-    # Generate a unique email each test run to avoid conflict
-    email = f"shie{uuid.uuid4().hex[:6]}@example.com"
-    response = client.post("/auth/register", json={
-        "username": "Shie",
-        "email": email,
-        "password": "Password123"
-    })
-    # Expect a proper REST response
-    assert response.status_code in (200, 201)
-    data = response.json()
-    assert data["username"] == "Shie"
-    assert "id" in data
-    assert "email" in data
+def _signup_body(email="shie@example.com", password="Password123"):
+    return {"email": email, "full_name": "Shie", "password": password, "confirm_password": password}
 
 
-def test_login_user(client):
-    # Register first
-    email = f"shie{uuid.uuid4().hex[:6]}@example.com"
-    client.post("/auth/register", json={
-        "username": "Shie",
-        "email": email,
-        "password": "Password123"
-    })
-    response = client.post("/auth/login", json={
-        "email": email,
-        "password": "Password123"
-    })
+def test_signup_user(client):
+    response = client.post("/auth/signup", json=_signup_body())
     assert response.status_code == 200
     data = response.json()
-    assert "access_token" in data
-    assert "refresh_token" in data
+    assert data["user"]["username"] == "shie"
+    assert data["user"]["email"] == "shie@example.com"
+    assert "id" in data["user"]
+    assert "hashed_password" not in data["user"]
 
 
-def test_refresh_token(client):
-    email = f"shie{uuid.uuid4().hex[:6]}@example.com"
-    client.post("/auth/register", json={
-        "username": "Shie",
-        "email": email,
-        "password": "Password123"
-    })
-    login = client.post("/auth/login", json={
-        "email": email,
-        "password": "Password123"
-    }).json()
-    refresh = {"refresh_token": login["refresh_token"]}
-    response = client.post("/auth/refresh", json=refresh)
+def test_signup_rejects_duplicates_and_mismatched_passwords(client):
+    assert client.post("/auth/signup", json=_signup_body()).status_code == 200
+    assert client.post("/auth/signup", json=_signup_body()).status_code == 400
+    mismatched = {**_signup_body("other@example.com"), "confirm_password": "Password124"}
+    assert client.post("/auth/signup", json=mismatched).status_code == 422
+
+
+def test_login_user(client):
+    client.post("/auth/signup", json=_signup_body())
+    response = client.post("/auth/login", json={"email": "shie@example.com", "password": "Password123"})
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
-    assert "refresh_token" in data
+    assert data["token_type"] == "bearer"
+
+    wrong = client.post("/auth/login", json={"email": "shie@example.com", "password": "Password124"})
+    assert wrong.status_code == 401
 
 
-def test_logout_user(client):
-    email = f"shie{uuid.uuid4().hex[:6]}@example.com"
-    client.post("/auth/register", json={
-        "username": "Shie",
-        "email": email,
-        "password": "Password123"
-    })
-    login = client.post("/auth/login", json={
-        "email": email,
-        "password": "Password123"
-    }).json()
-    payload = {
-        "access_token": login["access_token"],
-        "refresh_token": login["refresh_token"]
-    }
-    response = client.post("/auth/logout", json=payload)
+def test_me_and_logout(client, auth):
+    assert client.get("/auth/me", headers=auth).json()["email"] == "user@example.com"
+    assert client.get("/auth/me").status_code in (401, 403)
+    response = client.post("/auth/logout", headers=auth)
     assert response.status_code == 200
-    assert response.json()["msg"] == "logged out"
+    assert response.json()["message"] == "Successfully logged out"
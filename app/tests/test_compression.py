@@ -0,0 +1,107 @@
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+
+def _client(minimum_size=500):
+    app = FastAPI()
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/large")
+    async def large():
+        return [{"id": i, "description": "cycled to work"} for i in range(200)]
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\x89PNG" + b"\x00" * 4096, media_type="image/png")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size, content_types=["application/json"])
+    return TestClient(app)
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br", brotli_available=False) == "gzip"
+    assert choose_encoding("gzip, br", brotli_available=True) == "br"
+    assert choose_encoding("br;q=0, gzip;q=0.5", brotli_available=True) == "gzip"
+    assert choose_encoding("*", brotli_available=False) == "gzip"
+    assert choose_encoding("identity") is None
+
+
+def test_large_json_is_gzipped_and_small_json_is_not(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    client = _client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    large = client.get("/large", headers=headers)
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert len(large.json()) == 200  # the client transparently decompresses
+
+    small = client.get("/small", headers=headers)
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"ok": True}
+
+    image = client.get("/image", headers=headers)
+    assert "content-encoding" not in image.headers
+
+    plain = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+def test_streaming_responses_are_compressed_chunk_by_chunk(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    rows = [json.dumps({"id": i, "description": "x" * 50}) + "\n" for i in range(30)]
+
+    async def rows_app(scope, receive, send):
+        async def produce():
+            for row in rows:
+                yield row
+
+        response = StreamingResponse(produce(), media_type="application/x-ndjson")
+        await response(scope, receive, send)
+
+    middleware = CompressionMiddleware(rows_app, minimum_size=10_000, content_types=["application/x-ndjson"])
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"spec_version": "2.4"}, "method": "GET", "path": "/",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    asyncio.run(middleware(scope, receive, send))
+
+    start, *bodies = sent
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert len(bodies) > 1
+
+    # Every chunk decodes on arrival: nothing waits for the end of the stream
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(bodies[0]["body"]).decode() == rows[0]
+    compressed = b"".join(body["body"] for body in bodies)
+    assert gzip.decompress(compressed).decode() == "".join(rows)
+
+
+def test_brotli_is_preferred_when_installed():
+    brotli = pytest.importorskip("brotli")
+    response = _client().get("/large", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(json.loads(brotli.decompress(response.content))) == 200
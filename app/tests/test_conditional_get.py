@@ -0,0 +1,80 @@
+import pytest
+
+from app.services.data_version import VersionMemo, etag_matches, version_key
+
+
+class _User:
+    id = 7
+    data_version = 3
+
+
+def test_etag_matching_is_weak():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_windowed_keys_change_with_the_time_bucket():
+    assert version_key(_User, "/p", "", None, clock=lambda: 0) == version_key(_User, "/p", "", None, clock=lambda: 10_000)
+    assert version_key(_User, "/p", "", 300, clock=lambda: 10) == version_key(_User, "/p", "", 300, clock=lambda: 290)
+    assert version_key(_User, "/p", "", 300, clock=lambda: 290) != version_key(_User, "/p", "", 300, clock=lambda: 310)
+
+
+def test_memo_evicts_least_recently_used():
+    memo = VersionMemo(max_entries=2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    memo.get("a")
+    memo.put("c", 3)
+    assert memo.get("a") == 1
+    assert memo.get("b") is None
+
+
+@pytest.mark.parametrize("path", [
+    "/api/dashboard/stats", "/api/insights/categories", "/api/profile/", "/api/profile/achievements",
+])
+def test_unchanged_data_answers_304_without_querying(client, auth, count_queries, path, create_log):
+    create_log(auth)
+    first = client.get(path, headers=auth)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and not etag.startswith("W/")
+
+    with count_queries() as queries:
+        again = client.get(path, headers={**auth, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert queries.count == 1  # the user lookup that authenticates the request
+
+    # A compressed response carried the weakened ETag, which still matches
+    assert client.get(path, headers={**auth, "If-None-Match": f"W/{etag}"}).status_code == 304
+
+
+def test_repeated_polls_are_memoized(client, auth, count_queries, create_log):
+    create_log(auth)
+    first = client.get("/api/insights/categories", headers=auth)
+    with count_queries() as queries:
+        second = client.get("/api/insights/categories", headers=auth)
+    assert second.json() == first.json()
+    assert queries.count == 1
+
+
+def test_writes_change_the_etag(client, auth, create_log):
+    log_id = create_log(auth)["id"]
+    etag = client.get("/api/insights/categories", headers=auth).headers["etag"]
+
+    for write in (
+        lambda: create_log(auth, "food"),
+        lambda: client.put(f"/api/logs/{log_id}", json={"activity_type": "energy"}, headers=auth),
+        lambda: client.delete(f"/api/logs/{log_id}", headers=auth),
+        lambda: client.put("/api/profile/", json={"bio": "hi"}, headers=auth),
+    ):
+        write()
+        response = client.get("/api/insights/categories", headers={**auth, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        etag = response.headers["etag"]
+
+    assert [c["type"] for c in response.json()["categories"]] == ["food"]
@@ -0,0 +1,45 @@
+import asyncio
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import get_async_database_url, settings
+from app.core.database import Base, ThreadedSession
+from app.models.user import User
+from app.models.log import EcoLog  # noqa: F401
+from app.models.badge import UserBadge  # noqa: F401
+
+
+def test_async_url_picks_async_drivers(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", "sqlite:///./ecopulse.db")
+    assert get_async_database_url() == "sqlite+aiosqlite:///./ecopulse.db"
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgres://u:p@db/eco")
+    assert get_async_database_url() == "postgresql+asyncpg://u:p@db/eco"
+
+
+def test_threaded_session_matches_async_session_api(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'threaded.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def scenario():
+        db = ThreadedSession(factory())
+        user = User(email="t@example.com", username="t", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+
+        assert (await db.get(User, user.id)).email == "t@example.com"
+        assert await db.scalar(select(User.username).where(User.id == user.id)) == "t"
+        assert (await db.scalars(select(User))).all() == [user]
+        rows = (await db.execute(select(User.id, User.email))).all()
+        assert rows == [(user.id, "t@example.com")]
+        assert await db.run_sync(lambda session: session.query(User).count()) == 1
+
+        await db.delete(user)
+        await db.commit()
+        assert await db.get(User, user.id) is None
+        await db.close()
+
+    asyncio.run(scenario())
+    engine.dispose()
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import update
+
+from app.core.database import engine
+from app.models.log import EcoLog
+from app.services.export import export_parquet, load_watermarks
+
+
+def _export(root, settle_seconds=0):
+    # A little ahead: SQLite's CURRENT_TIMESTAMP has whole seconds
+    return export_parquet(engine, root, datetime.utcnow() + timedelta(seconds=2), settle_seconds, chunk_size=2)
+
+
+def _rows(root, table):
+    return ds.dataset(root / table, partitioning="hive").to_table().sort_by("id").to_pylist()
+
+
+def test_export_is_partitioned_by_month_and_incremental(client, auth, db, tmp_path, create_log):
+    ids = [create_log(auth)["id"] for _ in range(5)]
+    last_month = datetime.utcnow().replace(day=1) - timedelta(days=1)
+    db.execute(update(EcoLog).where(EcoLog.id.in_(ids[:2])).values(activity_date=last_month))
+    db.commit()
+
+    assert _export(tmp_path) == {"eco_logs": 5, "users": 1}
+    months = sorted(path.name for path in (tmp_path / "eco_logs").iterdir())
+    assert months == [f"month={last_month:%Y-%m}", f"month={datetime.utcnow():%Y-%m}"]
+    logs = _rows(tmp_path, "eco_logs")
+    assert [log["id"] for log in logs] == ids
+    assert logs[0]["activity_type"] == "transport" and logs[0]["description"] == "cycled to work"
+    user = _rows(tmp_path, "users")[0]
+    assert user["eco_score"] == pytest.approx(sum(log["points_earned"] for log in logs))
+    assert "email" not in user and "hashed_password" not in user
+    # Chunks of two became row groups of one file per month
+    this_month = next((tmp_path / "eco_logs" / f"month={datetime.utcnow():%Y-%m}").glob("*.parquet"))
+    assert pq.ParquetFile(this_month).num_row_groups == 2
+
+    # Nothing new, nothing written; a new log lands in a file of its own
+    assert _export(tmp_path)["eco_logs"] == 0
+    new_id = create_log(auth)["id"]
+    assert _export(tmp_path)["eco_logs"] == 1
+    assert [log["id"] for log in _rows(tmp_path, "eco_logs")] == ids + [new_id]
+    assert load_watermarks(tmp_path)["eco_logs_id"] == new_id
+
+
+def test_unsettled_rows_wait_for_the_next_run(client, auth, db, tmp_path, create_log):
+    ids = [create_log(auth)["id"] for _ in range(3)]
+    db.execute(update(EcoLog).where(EcoLog.id == ids[0]).values(created_at=datetime.utcnow() - timedelta(hours=1)))
+    db.commit()
+
+    assert _export(tmp_path, settle_seconds=600) == {"eco_logs": 1, "users": 0}
+    assert load_watermarks(tmp_path)["eco_logs_id"] == ids[0]
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_a_log_created_after_the_last_one_was_deleted_is_exported(client, auth, tmp_path, create_log):
+    exported = create_log(auth)["id"]
+    assert _export(tmp_path)["eco_logs"] == 1
+    assert client.delete(f"/api/logs/{exported}", headers=auth).status_code == 200
+
+    # Its id is not handed out again, so the new log is past the watermark
+    created = create_log(auth)["id"]
+    assert created > exported
+    assert _export(tmp_path)["eco_logs"] == 1
+    assert [log["id"] for log in _rows(tmp_path, "eco_logs")] == [exported, created]
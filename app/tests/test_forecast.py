@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.jobs.forecast import fit_trends, load_daily_matrix, run_forecasts
+from app.models.user import User
+from app.models.log import EcoLog, ActivityType
+from app.models.forecast import UserForecast
+
+
+def test_fit_trends_flat_history_projects_the_level():
+    daily = np.full((1, 28), 2.0)
+    fit = fit_trends(daily, month_to_date=[20.0], days_remaining=10, goal=30.0)
+    assert fit["level"][0] == pytest.approx(2.0)
+    assert fit["trend"][0] == pytest.approx(0.0)
+    assert fit["projected"][0] == pytest.approx(40.0)
+    # No noise at all: the goal is certain
+    assert fit["probability"][0] == pytest.approx(1.0)
+
+
+def test_fit_trends_handles_many_users_at_once():
+    rising = np.linspace(0.0, 2.7, 28)
+    daily = np.vstack([rising, rising[::-1], np.zeros(28)])
+    fit = fit_trends(daily, month_to_date=[5.0, 5.0, 0.0], days_remaining=5, goal=10.0)
+    assert fit["trend"][0] > 0 > fit["trend"][1]
+    assert fit["projected"][0] > fit["projected"][1]
+    assert fit["projected"][2] == 0.0
+    assert fit["probability"][2] == 0.0
+    assert np.all((fit["probability"] >= 0) & (fit["probability"] <= 1))
+
+
+def test_fit_trends_probability_reflects_noise():
+    rng = np.random.default_rng(7)
+    daily = rng.normal(1.0, 0.5, size=(1, 56)).clip(0)
+    projected = fit_trends(daily, month_to_date=[15.0], days_remaining=15, goal=0.0)["projected"][0]
+    # A goal exactly at the projection is a coin flip; above it is less likely
+    at_goal = fit_trends(daily, month_to_date=[15.0], days_remaining=15, goal=projected)
+    above_goal = fit_trends(daily, month_to_date=[15.0], days_remaining=15, goal=projected + 2.0)
+    assert at_goal["probability"][0] == pytest.approx(0.5, abs=1e-6)
+    assert 0.0 < above_goal["probability"][0] < 0.5
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'forecast.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_run_forecasts_stores_one_row_per_user(db):
+    as_of = date(2026, 10, 15)
+    users = [
+        User(email=f"u{i}@example.com", username=f"u{i}", hashed_password="x")
+        for i in range(3)
+    ]
+    db.add_all(users)
+    db.flush()
+    for days_back in range(20):
+        db.add(EcoLog(
+            user_id=users[0].id,
+            activity_type=ActivityType.TRANSPORT,
+            description="cycled",
+            emissions_saved=1.5,
+            points_earned=2,
+            activity_date=datetime.combine(as_of - timedelta(days=days_back), datetime.min.time()),
+        ))
+    db.commit()
+
+    daily = load_daily_matrix(db, [u.id for u in users], as_of - timedelta(days=55), 56)
+    assert daily[0].sum() == pytest.approx(30.0)
+    assert daily[1:].sum() == 0
+
+    assert run_forecasts(db, as_of) == 3
+    forecast = db.get(UserForecast, users[0].id)
+    assert forecast.month == "2026-10"
+    assert forecast.month_to_date == pytest.approx(22.5)
+    assert forecast.projected_monthly_total > forecast.month_to_date
+    assert db.get(UserForecast, users[1].id).projected_monthly_total == 0.0
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.services.live import BroadcastHub, EVICTED, HubFull, hub
+
+
+def test_slow_subscribers_are_evicted_without_holding_back_the_rest():
+    async def scenario():
+        small = BroadcastHub(buffer_size=2, max_subscribers=2)
+        slow = small.subscribe(["leaderboard"])
+        fast = small.subscribe(["leaderboard", "dashboard:1"])
+        with pytest.raises(HubFull):
+            small.subscribe(["leaderboard"])
+
+        received = []
+        for n in range(3):
+            small.publish("leaderboard", "leaderboard", {"n": n})
+            received.append(await fast.next(timeout=1))
+
+        assert slow.evicted and small.evictions == 1
+        assert await slow.next(timeout=1) == EVICTED
+        assert small.subscriber_count == 1
+        assert [json.loads(event.split(b"data: ")[1]) for event in received] == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+        small.publish("dashboard:2", "dashboard", {"other": "user"})
+        assert await fast.next(timeout=0.01) is None
+
+    asyncio.run(scenario())
+
+
+def test_publishing_from_another_thread_reaches_the_loop():
+    async def scenario():
+        threaded = BroadcastHub()
+        subscriber = threaded.subscribe(["leaderboard"])
+        await asyncio.to_thread(threaded.publish, "leaderboard", "leaderboard", {"from": "thread"})
+        assert b'{"from":"thread"}' in await subscriber.next(timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_stream_requires_a_token(client):
+    assert client.get("/api/live/").status_code == 401
+    assert client.get("/api/live/", params={"token": "nope"}).status_code == 401
+
+
+def test_log_writes_are_pushed_to_open_streams(client, signup, monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_HEARTBEAT_SECONDS", 0.05)
+    auth = signup("live@example.com", "Live User")
+    token = auth["Authorization"].removeprefix("Bearer ")
+    log = client.post("/api/logs/", json={"activity_type": "water", "description": "short shower"}, headers=auth).json()["log"]
+    log_id = log["id"]
+
+    async def scenario():
+        chunks = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        scope = {
+            "type": "http", "asgi": {"spec_version": "2.3"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/api/live/", "raw_path": b"/api/live/", "root_path": "",
+            "query_string": f"token={token}".encode(), "headers": [], "server": ("test", 80),
+            "client": ("127.0.0.1", 50000),
+        }
+        stream = asyncio.create_task(app(scope, receive, send))
+        while hub.subscriber_count == 0:
+            await asyncio.sleep(0.01)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            deleted = await http.delete(f"/api/logs/{log_id}", headers=auth)
+        assert deleted.status_code == 200
+        while not any(b"event: dashboard" in chunk for chunk in chunks):
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)  # a heartbeat or two
+
+        disconnected.set()
+        await asyncio.wait_for(stream, 1)
+        return b"".join(chunks).decode()
+
+    body = asyncio.run(scenario())
+    assert body.startswith(f"retry: {settings.LIVE_RETRY_MS}\n\n")
+    assert "event: leaderboard\ndata: " in body and '"username":"live_user"' in body
+    assert f'"change":{{"points_earned":{-log["points_earned"]},"emissions_saved":{-log["emissions_saved"]}}}' in body
+    assert ": ping\n\n" in body
+    assert hub.subscriber_count == 0
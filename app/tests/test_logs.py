@@ -1,123 +1,59 @@
-import json
-from fastapi.testclient import TestClient
-from app.main import app
-from app.database import Base, engine, SessionLocal
-from app import models
 import pytest
 
-client = TestClient(app)
 
+def _create(client, auth, activity_type, description, **extra):
+    response = client.post("/api/logs/", json={"activity_type": activity_type, "description": description, **extra}, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()["log"]
 
-@pytest.fixture(autouse=True)
-def setup_db():
-    # Recreate tables for isolation if using sqlite in-memory or simple engine
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
 
+def test_create_log_computes_emissions_and_points(client, auth):
+    log = _create(client, auth, "transport", "Cycled to the office")
+    assert log["emissions_saved"] == pytest.approx(0.25)
+    assert log["points_earned"] == 2
+    assert log["activity_type"] == "transport"
 
-def create_user_and_token():
-    # Register
-    register_payload = {
-        "username": "tester",
-        "email": "tester@example.com",
-        "password": "password123",
-    }
-    r = client.post("/api/auth/register", json=register_payload)
-    assert r.status_code in (200, 201)
+    # Values the client sends are ignored; unmatched descriptions get the type's defaults
+    log = _create(client, auth, "energy", "Something else", emissions_saved=999.0, points_earned=999)
+    assert log["emissions_saved"] == pytest.approx(1.2)
+    assert log["points_earned"] == 6
 
-    # Login
-    login_payload = {"email": register_payload["email"], "password": register_payload["password"]}
-    r = client.post("/api/auth/login", json=login_payload)
-    assert r.status_code == 200
-    token = r.json()["access_token"]
-    return token
+    me = client.get("/auth/me", headers=auth).json()
+    assert me["eco_score"] == 8
+    assert me["total_emissions_saved"] == pytest.approx(1.45)
 
 
-def test_create_log_computes_eco_points_from_provided_carbon_output():
-    token = create_user_and_token()
+def test_create_log_validates_the_activity_type(client, auth):
+    body = {"activity_type": "flying", "description": "Took a plane"}
+    assert client.post("/api/logs/", json=body, headers=auth).status_code == 422
 
-    payload = {
-        "name": "Cycling to office",
-        "category": "Transportation",
-        "description": "Morning commute",
-        "carbon_output": 1.2,
-    }
-    r = client.post("/api/logs/", headers={"Authorization": f"Bearer {token}"}, json=payload)
-    assert r.status_code == 201, r.text
-    data = r.json()
-    assert "eco_points" in data
-    assert isinstance(data["eco_points"], (int, float))
-    # With low carbon emissions, eco_points should be relatively high
-    assert data["eco_points"] > 0
-    assert data["carbon_output"] == pytest.approx(1.2, rel=1e-3)
 
+def test_update_and_delete_log(client, auth):
+    log = _create(client, auth, "water", "Shorter shower")
+    response = client.put(f"/api/logs/{log['id']}", json={"description": "Fixed a leaky tap"}, headers=auth)
+    assert response.status_code == 200
+    updated = response.json()["log"]
+    assert updated["description"] == "Fixed a leaky tap"
+    # Points were earned when the log was created
+    assert updated["points_earned"] == log["points_earned"]
 
-def test_create_log_computes_emissions_when_structured_inputs_provided():
-    token = create_user_and_token()
+    assert client.delete(f"/api/logs/{log['id']}", headers=auth).status_code == 200
+    assert client.delete(f"/api/logs/{log['id']}", headers=auth).status_code == 404
+    assert client.get("/auth/me", headers=auth).json()["eco_score"] == 0
 
-    # Provide distance and mode so EmissionsCalculator is used.
-    # For car: factor ~ 0.21 kg/km => 10 km -> 2.1 kg
-    payload = {
-        "name": "Drive to store",
-        "category": "Transportation",
-        "description": "Grocery run",
-        "carbon_output": 999.0,  # should be ignored due to structured inputs
-        "distance": 10,
-        "mode": "car",
-    }
-    r = client.post("/api/logs/", headers={"Authorization": f"Bearer {token}"}, json=payload)
-    assert r.status_code == 201, r.text
-    data = r.json()
-    assert data["carbon_output"] == pytest.approx(2.1, rel=1e-3)
-    assert data["eco_points"] >= 0
 
+def test_logs_are_private(client, auth, signup):
+    log = _create(client, auth, "waste", "Recycled bottles")
+    other = signup("other@example.com")
+    assert client.put(f"/api/logs/{log['id']}", json={"description": "mine now"}, headers=other).status_code == 404
+    assert client.delete(f"/api/logs/{log['id']}", headers=other).status_code == 404
+    assert client.get("/api/logs/", headers=other).json() == []
 
-def test_update_log_recomputes_eco_points_and_emissions_when_structured_inputs_provided():
-    token = create_user_and_token()
 
-    # create initial
-    create_payload = {
-        "name": "Bus ride",
-        "category": "Transportation",
-        "description": "Commute",
-        "carbon_output": 5.0,
-    }
-    r = client.post("/api/logs/", headers={"Authorization": f"Bearer {token}"}, json=create_payload)
-    assert r.status_code == 201
-    created = r.json()
-
-    # update with structured inputs to trigger recalculation (bus factor 0.05 * 20km = 1.0kg)
-    update_payload = {
-        "name": "Bus ride",
-        "category": "Transportation",
-        "description": "Commute",
-        "carbon_output": 123.0,  # should be overridden
-        "distance": 20,
-        "mode": "bus",
-    }
-    r = client.put(f"/api/logs/{created['id']}", headers={"Authorization": f"Bearer {token}"}, json=update_payload)
-    assert r.status_code == 200, r.text
-    updated = r.json()
-    assert updated["carbon_output"] == pytest.approx(1.0, rel=1e-3)
-    assert updated["eco_points"] >= 0
-
-
-def test_get_logs_includes_eco_points():
-    token = create_user_and_token()
-
-    payload = {
-        "name": "Walking",
-        "category": "Transportation",
-        "description": "Park walk",
-        "carbon_output": 0.0,
-    }
-    r = client.post("/api/logs/", headers={"Authorization": f"Bearer {token}"}, json=payload)
-    assert r.status_code == 201
-
-    r = client.get("/api/logs/", headers={"Authorization": f"Bearer {token}"})
-    assert r.status_code == 200
-    items = r.json()
-    assert isinstance(items, list)
-    assert len(items) >= 1
-    assert "eco_points" in items[0]
+def test_get_logs_lists_the_users_logs(client, auth):
+    _create(client, auth, "food", "Plant-based lunch")
+    response = client.get("/api/logs/", headers=auth)
+    assert response.status_code == 200
+    items = response.json()
+    assert len(items) == 1
+    assert items[0]["points_earned"] == 4 and items[0]["emissions_saved"] == pytest.approx(2.5)
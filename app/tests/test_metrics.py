@@ -0,0 +1,49 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core import metrics
+from app.core.metrics import Histogram, MetricsMiddleware, MetricsRegistry, instrument_engine
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, ("/a",))
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+
+
+def test_middleware_labels_route_templates_and_counts_queries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    instrument_engine(engine)
+
+    router = APIRouter()
+
+    @router.get("/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT 1"))
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/items")
+    app.add_middleware(MetricsMiddleware)
+
+    with TestClient(app) as client:
+        assert client.get("/api/items/7").status_code == 200
+        assert client.get("/api/items/8").status_code == 200
+        assert client.get("/nowhere").status_code == 404
+
+    rendered = metrics.registry.render().splitlines()
+    assert 'http_requests_total{method="GET",route="/api/items/{item_id}",status="200"} 2' in rendered
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in rendered
+    assert 'db_queries_per_request_sum{route="/api/items/{item_id}"} 6.0' in rendered
+    engine.dispose()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.core import metrics
+from app.core.config import settings
+from app.jobs import outbox_worker
+from app.models.badge import Badge, UserBadge
+from app.models.outbox import OutboxEvent
+from app.models.savings import SavingsSketch, UserSavingsTotal
+from app.models.user import User
+from app.services import outbox, savings_stats
+from app.services.badges import _award, evaluate_badges
+from app.services.outbox import OutboxWorker, handler, HANDLERS
+from app.services.quantile_sketch import QuantileSketch
+
+
+def _all_time_total(db, user_id=1):
+    db.expire_all()
+    return db.scalar(select(UserSavingsTotal.total).where(
+        UserSavingsTotal.user_id == user_id, UserSavingsTotal.period == "all", UserSavingsTotal.activity_type == ""
+    ))
+
+
+def _worker(db, **kwargs):
+    return OutboxWorker(lambda: db.__class__(bind=db.get_bind()), **kwargs)
+
+
+def test_log_writes_defer_side_effects_to_the_outbox(client, db, auth):
+    db.add(Badge(name="First log", description="", icon="*", requirement="logs_1"))
+    db.commit()
+
+    log = client.post("/api/logs/", json={"activity_type": "transport", "description": "bus"}, headers=auth).json()["log"]
+    # Committed with the log, not yet applied
+    assert db.scalar(select(func.count(OutboxEvent.id))) == 2
+    assert _all_time_total(db) is None
+
+    worker = _worker(db)
+    assert worker.drain_once() == 2
+    assert _all_time_total(db) == log["emissions_saved"]
+    assert db.scalar(select(func.count(UserBadge.id))) == 1
+    assert db.scalar(select(func.count(OutboxEvent.id))) == 0
+
+    client.delete(f"/api/logs/{log['id']}", headers=auth)
+    worker.drain_once()
+    assert _all_time_total(db) is None
+
+
+def test_an_event_is_applied_once_when_two_workers_pick_it_up(client, db, auth):
+    client.post("/api/logs/", json={"activity_type": "food", "description": "veg"}, headers=auth)
+
+    first, second = _worker(db), _worker(db)
+    first_session, second_session = first.session_factory(), second.session_factory()
+    events = first.fetch(first_session)
+    stale_copy = second.fetch(second_session)
+    assert first.deliver(first_session, events) == 2
+    assert second.deliver(second_session, stale_copy) == 0
+    first_session.close()
+    second_session.close()
+
+    total = _all_time_total(db)
+    assert total is not None and total == db.scalar(select(User.total_emissions_saved))
+
+
+def test_a_badge_is_awarded_once_when_evaluations_race(client, db, auth):
+    badge = Badge(name="First log", description="", icon="*", requirement="logs_1")
+    db.add(badge)
+    db.commit()
+    client.post("/api/logs/", json={"activity_type": "food", "description": "veg"}, headers=auth)
+
+    # Another evaluation saw the badge unearned too and inserts after this one
+    assert evaluate_badges(db, 1) == ["First log"]
+    assert _award(db, 1, [badge.id]) == set()
+    db.commit()
+    assert db.scalar(select(func.count(UserBadge.id))) == 1
+    assert evaluate_badges(db, 1) == []
+
+
+def test_the_standalone_worker_persists_the_sketch_deltas_it_records(client, db, auth, monkeypatch):
+    savings_stats.registry.reset()
+    client.post("/api/logs/", json={"activity_type": "food", "description": "veg"}, headers=auth)
+    monkeypatch.setattr(outbox_worker, "worker", _worker(db))
+    try:
+        assert outbox_worker.drain_batch() == 2
+        db.expire_all()
+        row = db.scalar(select(SavingsSketch).where(SavingsSketch.scope == "all:*"))
+        assert row is not None and QuantileSketch.from_dict(json.loads(row.payload)).count == 1
+    finally:
+        savings_stats.registry.reset()
+
+
+def test_reading_percentiles_persists_deltas_off_the_event_loop(client, db, auth, monkeypatch):
+    savings_stats.registry.reset()
+    client.post("/api/logs/", json={"activity_type": "food", "description": "veg"}, headers=auth)
+    _worker(db).drain_once()
+
+    flushed_from_loop = []
+    flush = savings_stats.registry.flush
+
+    def spy(session):
+        try:
+            asyncio.get_running_loop()
+            flushed_from_loop.append(True)
+        except RuntimeError:
+            flushed_from_loop.append(False)
+        assert not session.info.get("read_only")
+        flush(session)
+
+    monkeypatch.setattr(savings_stats.registry, "flush", spy)
+    monkeypatch.setattr(settings, "SAVINGS_SKETCH_FLUSH_SECONDS", -1)  # always stale
+    try:
+        assert client.get("/api/insights/percentiles", headers=auth).status_code == 200
+        assert flushed_from_loop == [False]
+        db.expire_all()
+        row = db.scalar(select(SavingsSketch).where(SavingsSketch.scope == "all:*"))
+        assert row is not None and QuantileSketch.from_dict(json.loads(row.payload)).count == 1
+    finally:
+        savings_stats.registry.reset()
+
+
+def test_a_failing_event_is_retried_without_holding_back_the_batch(db):
+    calls = []
+
+    @handler("test.flaky")
+    def flaky(session, payload):
+        calls.append(payload["n"])
+        if payload["n"] == 2:
+            raise RuntimeError("boom")
+
+    try:
+        db.add_all(OutboxEvent(topic="test.flaky", payload=f'{{"n": {n}}}') for n in (1, 2, 3))
+        db.commit()
+        worker = _worker(db, max_attempts=2)
+
+        assert worker.drain_once() == 3
+        remaining = db.scalars(select(OutboxEvent)).all()
+        assert [(event.payload, event.attempts) for event in remaining] == [('{"n": 2}', 1)]
+        assert "boom" in remaining[0].last_error
+
+        worker.drain_once()
+        assert worker.drain_once() == 0  # parked after max_attempts
+        # The failed batch was rolled back and retried one event at a time
+        assert calls == [1, 2, 1, 2, 3, 2]
+    finally:
+        HANDLERS.pop("test.flaky")
+
+
+def test_lag_is_the_age_of_the_oldest_pending_event(db):
+    now = datetime(2026, 10, 19, 12, 0, 0)
+    db.add(OutboxEvent(topic="badges.evaluate", payload='{"user_id": 1}', created_at=now - timedelta(seconds=42)))
+    db.commit()
+    worker = OutboxWorker(lambda: db.__class__(bind=db.get_bind()), clock=lambda: now)
+
+    worker.drain_once()
+    assert worker.lag_seconds == 42.0
+    worker.drain_once()
+    assert worker.lag_seconds == 0.0
+
+    assert any(line.startswith("outbox_lag_seconds ") for line in metrics.registry.render().splitlines())
+    assert outbox.worker.lag_seconds >= 0.0
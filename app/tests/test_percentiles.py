@@ -0,0 +1,109 @@
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.user import User
+from app.models.log import EcoLog, ActivityType
+from app.models.badge import UserBadge  # noqa: F401
+from app.services.quantile_sketch import QuantileSketch
+from app.services import savings_stats
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(2, 1) for _ in range(5000)]
+    sketch = QuantileSketch(0.01)
+    for value in values:
+        sketch.add(value)
+
+    ordered = sorted(values)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+    assert sketch.rank(ordered[2500]) == pytest.approx(0.5, abs=0.01)
+
+
+def test_sketch_merge_and_remove():
+    left, right = QuantileSketch(), QuantileSketch()
+    for value in range(1, 51):
+        left.add(value)
+    for value in range(51, 101):
+        right.add(value)
+    left.merge(right)
+    assert left.count == 100
+    assert left.rank(75) == pytest.approx(0.745, abs=0.01)
+
+    # Moving one observation keeps the population size
+    left.replace(1, 1000)
+    assert left.count == 100
+    assert left.rank(2) < 0.02
+
+    restored = QuantileSketch.from_dict(left.to_dict())
+    assert restored.bins == left.bins
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    savings_stats.registry.reset()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+        savings_stats.registry.reset()
+
+
+def test_percentiles_follow_log_writes(db):
+    users = [User(email=f"p{i}@example.com", username=f"p{i}", hashed_password="x") for i in range(4)]
+    db.add_all(users)
+    db.commit()
+
+    for i, user in enumerate(users):
+        savings_stats.apply_savings_delta(db, user.id, ActivityType.TRANSPORT, None, float(i + 1))
+        db.commit()
+
+    top = savings_stats.get_user_percentiles(db, users[3].id)
+    bottom = savings_stats.get_user_percentiles(db, users[0].id)
+    assert top["all_time"]["emissions_saved"] == 4.0
+    assert top["all_time"]["percentile"] > bottom["all_time"]["percentile"]
+    assert top["by_activity_type"]["transport"]["weekly"]["percentile"] == top["weekly"]["percentile"]
+
+    # Deleting everything takes the user out of the population
+    savings_stats.apply_savings_delta(db, users[3].id, ActivityType.TRANSPORT, None, -4.0)
+    db.commit()
+    assert savings_stats.get_user_percentiles(db, users[3].id)["all_time"]["percentile"] == 0.0
+    assert savings_stats.registry.snapshot("all:*").count == 3
+
+
+def test_rolled_back_writes_do_not_reach_the_sketch(db):
+    user = User(email="r@example.com", username="r", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    savings_stats.apply_savings_delta(db, user.id, ActivityType.FOOD, None, 2.0)
+    db.rollback()
+    assert savings_stats.registry.snapshot("all:*").count == 0
+
+
+def test_rebuild_from_logs(db):
+    user = User(email="b@example.com", username="b", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.add_all([
+        EcoLog(user_id=user.id, activity_type=ActivityType.WATER, description="shower",
+               emissions_saved=0.5, points_earned=1),
+        EcoLog(user_id=user.id, activity_type=ActivityType.FOOD, description="local",
+               emissions_saved=1.5, points_earned=2),
+    ])
+    db.commit()
+
+    assert savings_stats.rebuild_savings_stats(db) == 6
+    result = savings_stats.get_user_percentiles(db, user.id)
+    assert result["all_time"]["emissions_saved"] == pytest.approx(2.0)
+    assert set(result["by_activity_type"]) == {"food", "water"}
@@ -0,0 +1,134 @@
+"""
+Query budgets: the most SQL statements each endpoint may issue for one
+request. A change that adds a query to a hot path, or loops over rows issuing
+one query each (N+1), fails here instead of showing up as latency.
+
+Every route the app serves needs an entry, so new endpoints have to declare
+a budget too. Budgets are measured against a user with logs of every
+activity type and a badge catalog where one badge is earned, so per-row
+queries would push the count past the budget.
+"""
+from datetime import date
+
+import pytest
+
+from app.core.config import settings
+from app.jobs.forecast import run_forecasts
+from app.main import app
+from app.models.badge import Badge, UserBadge
+from app.models.user import User
+from app.services.sync import encode_token
+from benchmarks.bench_load import undriven_routes
+
+LOG_BODY = {"activity_type": "transport", "description": "cycled to work"}
+
+# (method, path) -> (max statements, JSON body). Percentiles includes the
+# sketch flush the first request after startup does (one read, one reload);
+# active users includes flushing the seeded logs' sketches (read, insert).
+QUERY_BUDGETS = {
+    ("POST", "/auth/signup"): (4, {
+        "email": "new@example.com", "full_name": "New User",
+        "password": "secret1", "confirm_password": "secret1",
+    }),
+    ("POST", "/auth/login"): (1, {"email": "budget@example.com", "password": "secret1"}),
+    ("POST", "/auth/logout"): (0, None),
+    ("GET", "/auth/me"): (1, None),
+    ("GET", "/api/logs/"): (2, None),
+    ("GET", "/api/logs/search"): (2, None),
+    ("GET", "/api/logs/changes"): (3, None),
+    ("POST", "/api/logs/"): (7, LOG_BODY),
+    ("PUT", "/api/logs/{log_id}"): (9, {"activity_type": "food"}),
+    ("DELETE", "/api/logs/{log_id}"): (8, None),
+    ("GET", "/api/dashboard/stats"): (3, None),
+    ("GET", "/api/dashboard/activities"): (2, None),
+    ("GET", "/api/insights/weekly"): (2, None),
+    ("GET", "/api/insights/categories"): (2, None),
+    ("GET", "/api/insights/summary"): (2, None),
+    ("GET", "/api/insights/forecast"): (2, None),
+    ("GET", "/api/insights/percentiles"): (5, None),
+    ("GET", "/api/leaderboard/"): (1, None),
+    ("POST", "/api/teams/"): (3, {"name": "New team"}),
+    ("GET", "/api/teams/leaderboard"): (1, None),
+    ("GET", "/api/teams/{team_id}"): (1, None),
+    ("GET", "/api/teams/{team_id}/leaderboard"): (1, None),
+    ("POST", "/api/teams/{team_id}/join"): (4, None),
+    ("POST", "/api/teams/leave"): (4, None),
+    ("GET", "/api/profile/"): (1, None),
+    ("PUT", "/api/profile/"): (3, {"bio": "hi"}),
+    ("GET", "/api/profile/badges"): (2, None),
+    ("GET", "/api/profile/achievements"): (2, None),
+    ("GET", "/api/profile/streaks"): (1, None),
+    ("GET", "/api/profile/calendar"): (1, None),
+    ("POST", "/api/ai/chat"): (1, {"prompt": "transport tips"}),
+    ("GET", "/api/live/"): (0, None),
+    ("GET", "/api/admin/active-users"): (4, None),
+    ("GET", "/"): (0, None),
+    ("GET", "/health"): (0, None),
+}
+
+# Required query parameters
+QUERY_PARAMS = {
+    ("GET", "/api/logs/search"): {"q": "cycled"},
+    ("GET", "/api/logs/changes"): {"since": encode_token(0)},
+}
+
+ACTIVITY_TYPES = ("transport", "energy", "waste", "food", "water")
+
+
+def _served_routes():
+    return {
+        (method.upper(), path)
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    }
+
+
+@pytest.fixture(autouse=True)
+def short_live_streams(monkeypatch):
+    # The test client reads a response to the end; let event streams end quickly
+    monkeypatch.setattr(settings, "LIVE_MAX_CONNECTION_SECONDS", 0.05)
+
+
+@pytest.fixture
+def seeded(client, db, signup):
+    headers = signup("budget@example.com", "Budget User")
+    team_id = client.post("/api/teams/", json={"name": "Budget team"}, headers=headers).json()["id"]
+    assert client.post(f"/api/teams/{team_id}/join", headers=headers).status_code == 200
+
+    log_ids = []
+    for activity_type in ACTIVITY_TYPES * 2:
+        response = client.post("/api/logs/", json={**LOG_BODY, "activity_type": activity_type}, headers=headers)
+        assert response.status_code == 200
+        log_ids.append(response.json()["log"]["id"])
+
+    badges = [Badge(name=f"Badge {i}", description="", icon="*", requirement="") for i in range(5)]
+    db.add_all(badges)
+    db.flush()
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    db.add(UserBadge(user_id=user_id, badge_id=badges[0].id))
+    db.get(User, user_id).is_admin = True
+    db.commit()
+    run_forecasts(db, date.today())
+    return headers, log_ids, team_id
+
+
+def test_every_route_declares_a_budget():
+    assert _served_routes() - set(QUERY_BUDGETS) == set()
+    assert set(QUERY_BUDGETS) - _served_routes() == set()
+
+
+def test_load_benchmark_drives_or_lists_every_route():
+    assert undriven_routes(app) == set()
+
+
+@pytest.mark.parametrize("method,path", sorted(QUERY_BUDGETS))
+def test_route_stays_within_query_budget(method, path, seeded, client, count_queries):
+    headers, log_ids, team_id = seeded
+    budget, body = QUERY_BUDGETS[(method, path)]
+    url = path.format(log_id=log_ids[-1], team_id=team_id)
+
+    with count_queries() as queries:
+        response = client.request(method, url, json=body, params=QUERY_PARAMS.get((method, path)), headers=headers)
+
+    assert response.status_code < 400, response.text
+    assert queries.count <= budget, f"{method} {path} ran {queries.count} queries:\n" + "\n".join(queries.statements)
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import InMemoryBucketStore, RateLimitMiddleware, RateLimitRule
+from app.core.security import create_access_token, peek_user_id
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    store = InMemoryBucketStore(clock=clock)
+    for _ in range(3):
+        assert store.take_now("k", rate=1.0, capacity=3) == 0
+    assert store.take_now("k", rate=1.0, capacity=3) == 1.0
+
+    clock.now = 1.0
+    assert store.take_now("k", rate=1.0, capacity=3) == 0
+    assert store.take_now("k", rate=1.0, capacity=3) > 0
+
+
+def test_evicts_refilled_buckets_when_full():
+    clock = FakeClock()
+    store = InMemoryBucketStore(max_keys=2, clock=clock)
+    store.take_now("a", rate=1.0, capacity=1)
+    store.take_now("b", rate=1.0, capacity=1)
+    clock.now = 5.0
+    store.take_now("c", rate=1.0, capacity=1)
+    assert set(store._buckets) == {"c"}
+
+
+def make_client(capacity=2):
+    app = FastAPI()
+
+    @app.post("/api/logs/")
+    def create():
+        return {"ok": True}
+
+    @app.get("/api/logs/")
+    def listing():
+        return []
+
+    rule = RateLimitRule("log_writes", frozenset({"POST"}), "/api/logs", rate=0.1, capacity=capacity)
+    app.add_middleware(RateLimitMiddleware, rules=[rule], store=InMemoryBucketStore())
+    return TestClient(app)
+
+
+def auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def test_middleware_limits_per_user_with_retry_after():
+    client = make_client()
+    for _ in range(2):
+        assert client.post("/api/logs/", headers=auth(1)).status_code == 200
+
+    limited = client.post("/api/logs/", headers=auth(1))
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "10"
+
+    # Other users and unlimited routes are unaffected
+    assert client.post("/api/logs/", headers=auth(2)).status_code == 200
+    assert client.get("/api/logs/", headers=auth(1)).status_code == 200
+
+
+def test_anonymous_requests_are_bucketed_by_client_address():
+    client = make_client(capacity=1)
+    assert client.post("/api/logs/").status_code == 200
+    assert client.post("/api/logs/", headers={"Authorization": "Bearer garbage"}).status_code == 429
+
+
+def test_cached_token_expires(monkeypatch):
+    header = f"Bearer {create_access_token({'sub': '7'}, timedelta(minutes=1))}"
+    assert peek_user_id(header) == "7"
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert peek_user_id(header) is None
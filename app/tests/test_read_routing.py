@@ -0,0 +1,103 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.api.dependencies import get_current_user
+from app.core import database
+from app.core.database import Base, RecentWriters, get_db, get_read_db
+from app.core.security import create_access_token
+from app.models.user import User
+from app.models.log import EcoLog  # noqa: F401
+from app.models.badge import UserBadge  # noqa: F401
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _sqlite_file(path, users):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": user_id, "email": f"{name}@example.com", "username": name, "hashed_password": "x"}
+            for user_id, name in users
+        ])
+    engine.dispose()
+    return create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+
+@pytest.fixture
+def routed_app(tmp_path, monkeypatch):
+    # Same user 1 in both files under different names, so responses show which one answered
+    primary = _sqlite_file(tmp_path / "primary.db", [(1, "on_primary"), (2, "only_on_primary")])
+    replica = _sqlite_file(tmp_path / "replica.db", [(1, "on_replica")])
+    primary_sessions = async_sessionmaker(primary, expire_on_commit=False)
+    clock = FakeClock()
+    writers = RecentWriters(5.0, clock=clock)
+
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", async_sessionmaker(
+        replica, expire_on_commit=False, info={"read_only": True, "replica": True}
+    ))
+    monkeypatch.setattr(database, "recent_writers", writers)
+
+    async def primary_db():
+        async with primary_sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.dependency_overrides[get_db] = primary_db
+
+    @app.get("/name/{user_id}")
+    async def name(user_id: int, db=Depends(get_read_db)):
+        return (await db.get(User, user_id)).username
+
+    @app.get("/me")
+    async def me(user: User = Depends(get_current_user)):
+        return user.username
+
+    with TestClient(app) as client:
+        yield client, writers, clock
+
+    app.dependency_overrides.clear()
+
+
+def _auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def test_reads_go_to_replica_until_the_user_writes(routed_app):
+    client, writers, clock = routed_app
+    assert client.get("/name/1", headers=_auth(1)).json() == "on_replica"
+
+    writers.record(1)
+    assert client.get("/name/1", headers=_auth(1)).json() == "on_primary"
+    # Other users keep reading from the replica
+    assert client.get("/name/1", headers=_auth(2)).json() == "on_replica"
+
+    clock.now += 5.1
+    assert client.get("/name/1", headers=_auth(1)).json() == "on_replica"
+
+
+def test_current_user_falls_back_to_primary(routed_app):
+    client, _, _ = routed_app
+    assert client.get("/me", headers=_auth(1)).json() == "on_replica"
+    assert client.get("/me", headers=_auth(2)).json() == "only_on_primary"
+    assert client.get("/me", headers=_auth(3)).status_code == 401
+
+
+def test_recent_writers_is_bounded():
+    clock = FakeClock()
+    writers = RecentWriters(1.0, max_users=3, clock=clock)
+    for user_id in range(3):
+        writers.record(user_id)
+    clock.now = 2.0
+    writers.record(10)
+    assert len(writers._until) == 1
+    assert writers.wrote_recently(10) and not writers.wrote_recently(0)
@@ -0,0 +1,26 @@
+from app.main import app
+
+
+def test_every_route_declares_a_response_model():
+    untyped = []
+    for path, operations in app.openapi()["paths"].items():
+        for method, operation in operations.items():
+            success = operation["responses"].get("200", {})
+            # JSON for everything except streams such as text/event-stream
+            content = success.get("content", {})
+            schema = content.get("application/json", content.get("text/event-stream", {})).get("schema")
+            if not schema:
+                untyped.append(f"{method.upper()} {path}")
+    assert untyped == []
+
+
+def test_user_endpoints_do_not_expose_password_hashes(client, signup):
+    headers = signup("lean@example.com")
+
+    me = client.get("/auth/me", headers=headers).json()
+    assert "hashed_password" not in me
+    assert me["email"] == "lean@example.com"
+    assert "hashed_password" not in client.get("/api/profile/", headers=headers).json()
+    updated = client.put("/api/profile/", json={"bio": "hello"}, headers=headers).json()
+    assert "hashed_password" not in updated["user"]
+    assert updated["user"]["bio"] == "hello"
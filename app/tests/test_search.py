@@ -0,0 +1,65 @@
+import base64
+
+import pytest
+
+from app.services.search import decode_cursor, encode_cursor
+
+
+def _search(client, auth, **params):
+    response = client.get("/api/logs/search", params=params, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_search_is_stemmed_ranked_and_scoped_to_the_user(client, auth, signup, create_log):
+    once = create_log(auth, description="cycled to work")["id"]
+    twice = create_log(auth, description="cycling to the shops, then cycling home")["id"]
+    create_log(auth, "food", "vegetarian lunch")
+    create_log(signup("other@example.com"), description="cycling everywhere")
+
+    results = _search(client, auth, q="cycling")
+    assert [hit["id"] for hit in results["results"]] == [twice, once]
+    assert results["next_cursor"] is None
+    assert _search(client, auth, q="lunch cycling")["results"] == []
+
+
+def test_search_follows_edits_and_deletes(client, auth, create_log):
+    log_id = create_log(auth, description="took the bus")["id"]
+    assert client.put(f"/api/logs/{log_id}", json={"description": "walked instead"}, headers=auth).status_code == 200
+    assert _search(client, auth, q="bus")["results"] == []
+    assert [hit["id"] for hit in _search(client, auth, q="walked")["results"]] == [log_id]
+
+    assert client.delete(f"/api/logs/{log_id}", headers=auth).status_code == 200
+    assert _search(client, auth, q="walked")["results"] == []
+
+
+def test_search_pages_by_keyset(client, auth, create_log):
+    ids = {create_log(auth, description=f"bike ride number {i}")["id"] for i in range(5)}
+    seen, cursor = [], None
+    while True:
+        page = _search(client, auth, q="bike", limit=2, **({"cursor": cursor} if cursor else {}))
+        assert len(page["results"]) <= 2
+        seen += [hit["id"] for hit in page["results"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(ids)
+
+
+def test_cursor_round_trips_and_bad_input_is_rejected(client, auth):
+    assert decode_cursor(encode_cursor(-1.25e-06, 42)) == (-1.25e-06, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    bad = [
+        base64.urlsafe_b64encode(cursor.encode()).decode()
+        for cursor in ("[1, 1e400]", "[1, 100000000000000000000000000000]", "[1, -1]", "[1, 1.5]",
+                       "[NaN, 1]", "[1e400, 1]", '["1", 1]', "[true, 1]")
+    ]
+    for cursor in bad:
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+    for cursor in ["xyz"] + bad:
+        assert client.get("/api/logs/search", params={"q": "bike", "cursor": cursor}, headers=auth).status_code == 422
+    # Punctuation alone has no words, and FTS5 operators are matched as plain words
+    assert client.get("/api/logs/search", params={"q": "!!"}, headers=auth).status_code == 422
+    assert _search(client, auth, q='NEAR("bike" OR) -')["results"] == []
@@ -0,0 +1,63 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.server import worker_count
+from benchmarks.bench_workers import free_port, wait_healthy
+
+
+def _settings(**overrides):
+    return Settings(**{"WEB_CONCURRENCY": None, "DB_MAX_CONNECTIONS": None, "RATE_LIMIT_ENABLED": False,
+                       "DB_POOL_SIZE": 5, "DB_MAX_OVERFLOW": 10, **overrides})
+
+
+def test_worker_count_follows_cpus_settings_and_connection_limit():
+    assert worker_count(_settings(), cpus=4) == 4
+    assert worker_count(_settings(WEB_CONCURRENCY=3), cpus=8) == 3
+    # 5 + 10 connections per worker: 40 fit two workers, and one always runs
+    assert worker_count(_settings(DB_MAX_CONNECTIONS=40), cpus=8) == 2
+    assert worker_count(_settings(DB_MAX_CONNECTIONS=10), cpus=8) == 1
+    assert worker_count(_settings(), cpus=8, requested=2) == 2
+
+
+def test_in_memory_rate_limits_run_one_worker(caplog):
+    assert worker_count(_settings(RATE_LIMIT_ENABLED=True), cpus=4) == 1
+    assert worker_count(_settings(RATE_LIMIT_ENABLED=True, WEB_CONCURRENCY=3), cpus=4, requested=2) == 1
+    assert "RATE_LIMIT_REDIS_URL" in caplog.text
+    assert worker_count(_settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_REDIS_URL="redis://cache:6379/0"), cpus=4) == 4
+
+
+def _workers(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return sorted(map(int, f.read().split()))
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads worker pids from /proc")
+def test_server_replaces_dead_workers_and_drains_on_sigterm(tmp_path):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'server.db'}", LOG_LEVEL="WARNING",
+               RATE_LIMIT_ENABLED="false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port), "--workers", "2"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(f"http://127.0.0.1:{port}", server)
+        workers = _workers(server.pid)
+        assert len(workers) == 2
+
+        os.kill(workers[0], signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and (len(_workers(server.pid)) < 2 or workers[0] in _workers(server.pid)):
+            time.sleep(0.1)
+        assert len(_workers(server.pid)) == 2 and workers[0] not in _workers(server.pid)
+        assert httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
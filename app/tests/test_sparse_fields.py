@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture
+def auth_with_log(auth, create_log):
+    """The shared user's headers, once the user has logged one activity."""
+    create_log(auth)
+    return auth
+
+
+@pytest.mark.parametrize("path", ["/api/logs/", "/api/dashboard/activities"])
+def test_logs_select_only_the_requested_columns(client, auth_with_log, count_queries, path):
+    full = client.get(path, headers=auth_with_log).json()[0]
+    with count_queries() as queries:
+        response = client.get(path, params={"fields": "id,activity_type,emissions_saved"}, headers=auth_with_log)
+
+    assert response.status_code == 200
+    assert response.json() == [{key: full[key] for key in ("id", "activity_type", "emissions_saved")}]
+    select_logs = next(statement for statement in queries.statements if "FROM eco_logs" in statement)
+    assert "description" not in select_logs.split("FROM")[0]
+
+
+def test_sparse_timestamps_match_the_full_model(client, auth_with_log):
+    full = client.get("/api/logs/", headers=auth_with_log).json()[0]
+    sparse = client.get("/api/logs/", params={"fields": "activity_date"}, headers=auth_with_log).json()[0]
+    assert sparse == {"activity_date": full["activity_date"]}
+
+
+def test_leaderboard_fields(client, auth_with_log):
+    full = client.get("/api/leaderboard/").json()[0]
+    sparse = client.get("/api/leaderboard/", params={"fields": "full_name,rank"}).json()
+    assert sparse == [{"full_name": full["full_name"], "rank": 1}]
+
+
+@pytest.mark.parametrize("fields", ["description,password", "", " , "])
+def test_unknown_or_empty_fields_are_rejected(client, auth, fields):
+    assert client.get("/api/logs/", params={"fields": fields}, headers=auth).status_code == 422
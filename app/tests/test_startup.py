@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+from app.core import config
+
+
+def test_heavy_modules_load_lazily():
+    lazy = ("requests", "passlib", "argon2")
+    output = subprocess.run(
+        [sys.executable, "-c", f"import sys, app.main; print([m for m in {lazy!r} if m in sys.modules])"],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_settings_are_parsed_once(monkeypatch):
+    def fail():
+        raise AssertionError("Settings() built again")
+
+    monkeypatch.setattr(config, "Settings", fail)
+    assert config.get_database_url() == config._normalize_database_url(config.settings.DATABASE_URL)
+    config.get_async_database_url()
+    config.get_read_database_url()
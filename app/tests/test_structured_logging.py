@@ -0,0 +1,95 @@
+import io
+import json
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.structured_logging import RequestIdMiddleware, parse_levels, request_id_var, setup_logging
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+    logging.getLogger("app.tests.quiet").setLevel(logging.NOTSET)
+
+
+def _settings(**overrides):
+    values = dict(LOG_LEVEL="DEBUG", LOG_LEVELS="", LOG_FORMAT="json", LOG_DEBUG_SAMPLE_RATE=1.0)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_records_are_written_off_thread_as_json(restore_logging):
+    stream = io.StringIO()
+    writer_threads = set()
+    original_write = stream.write
+
+    def write(text):
+        writer_threads.add(threading.get_ident())
+        return original_write(text)
+
+    stream.write = write
+    listener = setup_logging(_settings(), stream=stream)
+
+    token = request_id_var.set("req-1")
+    try:
+        logging.getLogger("app.tests").info("hello %s", "world", extra={"user_id": 7})
+    finally:
+        request_id_var.reset(token)
+    listener.stop()
+
+    entry = json.loads(stream.getvalue().splitlines()[-1])
+    assert entry["message"] == "hello world"
+    assert entry["request_id"] == "req-1"
+    assert entry["user_id"] == 7
+    assert entry["level"] == "INFO"
+    assert threading.get_ident() not in writer_threads
+
+
+def test_debug_sampling_and_per_logger_levels(restore_logging):
+    stream = io.StringIO()
+    listener = setup_logging(
+        _settings(LOG_DEBUG_SAMPLE_RATE=0.0, LOG_LEVELS="app.tests.quiet=ERROR"), stream=stream
+    )
+    logging.getLogger("app.tests").debug("sampled away")
+    logging.getLogger("app.tests").warning("kept")
+    logging.getLogger("app.tests.quiet").warning("below its level")
+    listener.stop()
+
+    messages = [json.loads(line)["message"] for line in stream.getvalue().splitlines()]
+    assert messages == ["kept"]
+
+
+def test_parse_levels():
+    assert parse_levels(" app.api=debug, sqlalchemy.engine=WARNING ,") == {
+        "app.api": "DEBUG", "sqlalchemy.engine": "WARNING"
+    }
+
+
+def test_request_id_middleware_propagates_and_echoes_ids():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/id")
+    async def current_id():
+        return request_id_var.get()
+
+    with TestClient(app) as client:
+        response = client.get("/id", headers={"X-Request-ID": "abc123"})
+        assert response.json() == "abc123"
+        assert response.headers["x-request-id"] == "abc123"
+
+        generated = client.get("/id")
+        assert generated.headers["x-request-id"] == generated.json()
+        assert len(generated.json()) == 32
@@ -0,0 +1,97 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.models.log import EcoLog
+from app.services.archive import archive_cutoff, archive_logs
+from app.services.sync import decode_token, encode_token
+
+
+def _changes(client, auth, **params):
+    response = client.get("/api/logs/changes", params=params, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_token_round_trips_and_rejects_garbage():
+    assert decode_token(encode_token(42)) == 42
+    for garbage in ("", "not-a-token", encode_token(1)[:-2]):
+        with pytest.raises(ValueError):
+            decode_token(garbage)
+    for value in ("1e400", "1.5", "true", '"1"', "-1", str(2 ** 63)):
+        with pytest.raises(ValueError):
+            decode_token(base64.urlsafe_b64encode(f"[{value}]".encode()).decode())
+
+
+def test_feed_has_creates_edits_and_tombstones_since_the_token(client, auth, signup, create_log):
+    kept, edited, deleted = create_log(auth)["id"], create_log(auth)["id"], create_log(auth)["id"]
+    start = _changes(client, auth)
+    assert start["logs"] == [] and start["deleted"] == [] and not start["has_more"]
+    since = start["next_since"]
+
+    assert client.put(f"/api/logs/{edited}", json={"description": "cycled home"}, headers=auth).status_code == 200
+    created = create_log(auth, description="bus to the coast")["id"]
+    assert client.delete(f"/api/logs/{deleted}", headers=auth).status_code == 200
+    create_log(signup("other@example.com"))
+
+    changes = _changes(client, auth, since=since)
+    assert [log["id"] for log in changes["logs"]] == [edited, created]
+    assert changes["logs"][0]["description"] == "cycled home"
+    assert changes["deleted"] == [deleted]
+    assert kept not in changes["deleted"] and not changes["has_more"]
+
+    # Nothing since: the same token back, and a 304 for a conditional poll
+    again = client.get("/api/logs/changes", params={"since": changes["next_since"]}, headers=auth)
+    assert again.json() == {"logs": [], "deleted": [], "next_since": changes["next_since"], "has_more": False}
+    cached = client.get(
+        "/api/logs/changes", params={"since": changes["next_since"]},
+        headers={**auth, "If-None-Match": again.headers["ETag"]}
+    )
+    assert cached.status_code == 304
+
+
+def test_feed_pages_in_change_order(client, auth, create_log):
+    since = _changes(client, auth)["next_since"]
+    ids = [create_log(auth)["id"] for _ in range(3)]
+    assert client.delete(f"/api/logs/{ids[0]}", headers=auth).status_code == 200
+
+    seen, deleted = [], []
+    while True:
+        page = _changes(client, auth, since=since, limit=2)
+        seen += [log["id"] for log in page["logs"]]
+        deleted += page["deleted"]
+        since = page["next_since"]
+        if not page["has_more"]:
+            break
+    # The first log was created and deleted since the token: only its tombstone is left
+    assert seen == ids[1:] and deleted == [ids[0]]
+
+
+def test_a_deleted_id_is_not_handed_out_again(client, auth, create_log):
+    since = _changes(client, auth)["next_since"]
+    latest = create_log(auth)["id"]
+    assert client.delete(f"/api/logs/{latest}", headers=auth).status_code == 200
+    recreated = create_log(auth, description="recreated")["id"]
+    assert recreated > latest
+
+    changes = _changes(client, auth, since=since)
+    assert changes["deleted"] == [latest]
+    assert [log["id"] for log in changes["logs"]] == [recreated]
+
+
+def test_archiving_is_not_a_deletion(client, auth, db, create_log):
+    old = create_log(auth)["id"]
+    db.execute(update(EcoLog).where(EcoLog.id == old).values(activity_date=datetime.utcnow() - timedelta(days=400)))
+    db.commit()
+    since = _changes(client, auth)["next_since"]
+    assert archive_logs(db, archive_cutoff(datetime.utcnow(), 365), chunk_size=10) == 1
+
+    changes = _changes(client, auth, since=since)
+    assert changes["logs"] == [] and changes["deleted"] == []
+
+
+def test_invalid_token_is_rejected(client, auth):
+    for token in ("nope", base64.urlsafe_b64encode(b"[1e400]").decode()):
+        assert client.get("/api/logs/changes", params={"since": token}, headers=auth).status_code == 422
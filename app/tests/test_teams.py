@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.team import Team
+from app.services.teams import rebuild_team_totals
+
+
+def _counters(db):
+    db.expire_all()
+    return {
+        team.name: (team.member_count, round(team.eco_score, 6), round(team.total_emissions_saved, 6))
+        for team in db.scalars(select(Team))
+    }
+
+
+@pytest.fixture
+def teams(client, signup):
+    ana, ben = signup("ana@example.com", "Ana"), signup("ben@example.com", "Ben")
+    green = client.post("/api/teams/", json={"name": "Green"}, headers=ana).json()
+    blue = client.post("/api/teams/", json={"name": "Blue"}, headers=ana).json()
+    return ana, ben, green["id"], blue["id"]
+
+
+def test_counters_follow_log_writes_and_membership(client, db, teams, create_log):
+    ana, ben, green, blue = teams
+    before_joining = create_log(ana)
+    assert client.post(f"/api/teams/{green}/join", headers=ana).json()["member_count"] == 1
+    assert client.post(f"/api/teams/{green}/join", headers=ben).status_code == 200
+    logged = create_log(ben, "food")
+    deleted = create_log(ana, "energy")
+    assert client.delete(f"/api/logs/{deleted['id']}", headers=ana).status_code == 200
+
+    team = client.get(f"/api/teams/{green}").json()
+    assert team["member_count"] == 2
+    assert team["eco_score"] == pytest.approx(before_joining["points_earned"] + logged["points_earned"])
+    assert team["total_emissions_saved"] == pytest.approx(before_joining["emissions_saved"] + logged["emissions_saved"])
+
+    # Switching teams takes the member's whole score along
+    assert client.post(f"/api/teams/{blue}/join", headers=ben).status_code == 200
+    counters = _counters(db)
+    assert counters["Green"][:2] == (1, pytest.approx(before_joining["points_earned"]))
+    assert counters["Blue"][:2] == (1, pytest.approx(logged["points_earned"]))
+    assert client.post("/api/teams/leave", headers=ben).json() == {"message": "Left team"}
+    assert client.post("/api/teams/leave", headers=ben).json() == {"message": "Not in a team"}
+
+    # The incremental counters agree with a rebuild from the members
+    counters = _counters(db)
+    rebuild_team_totals(db)
+    assert _counters(db) == counters
+
+
+def test_team_leaderboards(client, teams, create_log):
+    ana, ben, green, blue = teams
+    client.post(f"/api/teams/{green}/join", headers=ana)
+    client.post(f"/api/teams/{green}/join", headers=ben)
+    create_log(ana)
+    create_log(ben)
+    create_log(ben)
+
+    board = client.get("/api/teams/leaderboard").json()
+    assert [(entry["rank"], entry["name"], entry["member_count"]) for entry in board] == [(1, "Green", 2), (2, "Blue", 0)]
+    members = client.get(f"/api/teams/{green}/leaderboard").json()
+    assert [member["username"] for member in members] == ["ben", "ana"]
+
+
+def test_team_names_are_unique_and_unknown_teams_404(client, teams):
+    ana, _, _, _ = teams
+    assert client.post("/api/teams/", json={"name": "Green"}, headers=ana).status_code == 400
+    assert client.get("/api/teams/999").status_code == 404
+    assert client.post("/api/teams/999/join", headers=ana).status_code == 404
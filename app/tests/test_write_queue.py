@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import (
+    Base, ThreadedSession, call_after_commit, _configure_sqlite, _sqlite_read_only_url
+)
+from app.core.write_queue import WriteQueue
+from app.models.user import User
+from app.models.log import EcoLog  # noqa: F401
+from app.models.badge import UserBadge  # noqa: F401
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'writes.db'}")
+    _configure_sqlite(engine, read_only=False)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _add_user(name, fail=False, hooks=None):
+    async def unit(session):
+        session.add(User(email=f"{name}@example.com", username=name, hashed_password="x"))
+        if hooks is not None:
+            call_after_commit(session, hooks.append, name)
+        await session.flush()
+        if fail:
+            raise ValueError(name)
+        return name
+    return unit
+
+
+def test_queued_units_share_one_commit(engine):
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    queue = WriteQueue(lambda: ThreadedSession(factory()), max_batch=64)
+
+    async def scenario():
+        results = await asyncio.gather(*(queue.submit(_add_user(f"u{i}")) for i in range(20)))
+        await queue.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [f"u{i}" for i in range(20)]
+    with factory() as db:
+        assert db.scalar(select(func.count(User.id))) == 20
+    assert len(commits) < 20
+
+
+def test_failed_unit_rolls_back_alone(engine):
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    queue = WriteQueue(lambda: ThreadedSession(factory()), max_batch=64)
+    hooks = []
+
+    async def scenario():
+        return await asyncio.gather(
+            queue.submit(_add_user("ok1", hooks=hooks)),
+            queue.submit(_add_user("bad", fail=True, hooks=hooks)),
+            queue.submit(_add_user("ok2", hooks=hooks)),
+            return_exceptions=True,
+        )
+
+    ok1, bad, ok2 = asyncio.run(scenario())
+    assert (ok1, ok2) == ("ok1", "ok2")
+    assert isinstance(bad, ValueError)
+    with factory() as db:
+        assert db.scalars(select(User.username).order_by(User.username)).all() == ["ok1", "ok2"]
+    # Only committed units' after-commit hooks ran
+    assert hooks == ["ok1", "ok2"]
+
+
+def test_read_only_connections_refuse_writes(engine, tmp_path):
+    reader = create_engine(_sqlite_read_only_url(f"sqlite:///{tmp_path / 'writes.db'}"))
+    _configure_sqlite(reader, read_only=True)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    with reader.connect() as conn:
+        assert conn.execute(select(func.count(User.id))).scalar() == 0
+        with pytest.raises(Exception, match="readonly|read-only|query_only"):
+            conn.execute(text("INSERT INTO users (email, username, hashed_password) VALUES ('r', 'r', 'x')"))
+    reader.dispose()
@@ -0,0 +1,125 @@
+"""
+Throughput of the async (DB_ASYNC=true) and threadpool (DB_ASYNC=false)
+database paths under high concurrency.
+
+Seeds a scratch SQLite database, then for each mode starts a fresh process
+that imports the app and drives authenticated GET requests through it in
+process with an asyncio HTTP client at the requested concurrency.
+
+Run with:
+    python -m benchmarks.bench_db_modes [--users 200] [--logs-per-user 50]
+        [--concurrency 200] [--requests 4000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ENDPOINTS = ["/api/dashboard/stats", "/api/logs/", "/api/insights/categories", "/api/leaderboard/"]
+
+
+def seed(database_url: str, users: int, logs_per_user: int):
+    from sqlalchemy import create_engine, insert
+    from app.core.database import Base
+    from app.models.user import User
+    from app.models.log import EcoLog, ActivityType
+    import app.models.badge  # noqa: F401
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(1)
+    types = list(ActivityType)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"bench{i}@example.com", "username": f"bench{i}",
+             "hashed_password": "x", "eco_score": 0.0, "total_emissions_saved": 0.0}
+            for i in range(1, users + 1)
+        ])
+        conn.execute(insert(EcoLog), [
+            {"user_id": i, "activity_type": rng.choice(types), "description": "benchmark entry",
+             "emissions_saved": rng.uniform(0.1, 3.0), "points_earned": rng.randint(1, 8)}
+            for i in range(1, users + 1) for _ in range(logs_per_user)
+        ])
+    engine.dispose()
+
+
+async def drive(users: int, concurrency: int, requests: int) -> dict:
+    import httpx
+    from app.main import app
+    from app.core.security import create_access_token
+
+    tokens = [create_access_token({"sub": str(i)}) for i in range(1, users + 1)]
+    latencies = []
+    queue = asyncio.Queue()
+    for n in range(requests):
+        queue.put_nowait(n)
+
+    async def worker(client):
+        rng = random.Random()
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            headers = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+            start = time.perf_counter()
+            response = await client.get(rng.choice(ENDPOINTS), headers=headers)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logs-per-user", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(drive(args.users, args.concurrency, args.requests))
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/bench.db"
+        seed(database_url, args.users, args.logs_per_user)
+
+        print(f"{args.requests} requests, concurrency {args.concurrency}, "
+              f"{args.users} users x {args.logs_per_user} logs")
+        for mode in ("true", "false"):
+            env = dict(os.environ, DATABASE_URL=database_url, DB_ASYNC=mode, RATE_LIMIT_ENABLED="false")
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_db_modes", "--child",
+                 "--users", str(args.users), "--concurrency", str(args.concurrency),
+                 "--requests", str(args.requests)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            label = "async" if mode == "true" else "threadpool"
+            print(f"{label:>10}: {result['throughput']:8.1f} req/s  "
+                  f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
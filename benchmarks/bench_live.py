@@ -0,0 +1,123 @@
+"""
+Live-update streams: how many one worker can hold, and how fast it fans out.
+
+Opens --connections server-sent event streams against the real app, called
+directly as ASGI in one process (the scope says ASGI spec 2.3, like uvicorn,
+so Starlette also runs its per-stream disconnect listener). It then
+publishes --events leaderboard updates and times each one from publish()
+until every stream has sent it.
+
+Reported per connection count:
+    memory      Python heap per open stream (tracemalloc). Socket buffers
+                and the server's own per-connection state come on top.
+    fan-out     p50/p99 time to deliver one event to every stream, and the
+                cost per stream.
+
+The capacity estimate is the smaller of what fits in --memory-mb and how
+many streams one event can reach within --fanout-budget-ms. Set
+LIVE_MAX_SUBSCRIBERS to that estimate.
+
+Run with:
+    python -m benchmarks.bench_live [--connections 1000,5000,10000] [--events 50]
+        [--fanout-budget-ms 100] [--memory-mb 512]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'live.db')}")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["LIVE_MAX_SUBSCRIBERS"] = "1000000"
+
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.live import hub  # noqa: E402
+
+
+def _scope(token: str) -> dict:
+    return {
+        "type": "http", "asgi": {"spec_version": "2.3"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/live/", "raw_path": b"/api/live/", "root_path": "",
+        "query_string": f"token={token}".encode(), "headers": [], "server": ("bench", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+
+async def measure(connections: int, events: int) -> dict:
+    disconnected = asyncio.Event()
+    received = [0] * events
+    done = [asyncio.Event() for _ in range(events)]
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        body = message.get("body", b"")
+        if body.startswith(b"event: leaderboard"):
+            n = int(body.rsplit(b'"n":', 1)[1].split(b"}", 1)[0])
+            received[n] += 1
+            if received[n] == connections:
+                done[n].set()
+
+    tokens = [create_access_token({"sub": str(i + 1)}) for i in range(connections)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    streams = [asyncio.create_task(app(_scope(token), receive, send)) for token in tokens]
+    while hub.subscriber_count < connections:
+        await asyncio.sleep(0.01)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    heap = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    fanout = []
+    for n in range(events):
+        started = time.perf_counter()
+        hub.publish("leaderboard", "leaderboard", {"username": "bench", "eco_score": float(n), "n": n})
+        await done[n].wait()
+        fanout.append(time.perf_counter() - started)
+
+    disconnected.set()
+    await asyncio.gather(*streams)
+    fanout.sort()
+    return {
+        "bytes_per_connection": heap / connections,
+        "fanout_p50": statistics.median(fanout),
+        "fanout_p99": fanout[min(len(fanout) - 1, int(len(fanout) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", default="1000,5000,10000",
+                        help="comma-separated stream counts to measure")
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--fanout-budget-ms", type=float, default=100.0)
+    parser.add_argument("--memory-mb", type=float, default=512.0)
+    args = parser.parse_args()
+
+    print(f"{'streams':>8} {'KiB/stream':>11} {'fan-out p50':>12} {'p99':>9} {'us/stream':>10}")
+    estimates = []
+    for connections in (int(count) for count in args.connections.split(",")):
+        result = asyncio.run(measure(connections, args.events))
+        per_stream = result["fanout_p50"] / connections
+        print(f"{connections:>8} {result['bytes_per_connection'] / 1024:>11.1f} "
+              f"{result['fanout_p50'] * 1000:>10.1f}ms {result['fanout_p99'] * 1000:>7.1f}ms "
+              f"{per_stream * 1e6:>10.1f}")
+        estimates.append((result["bytes_per_connection"], per_stream))
+
+    # The largest run is the most representative of a loaded worker
+    bytes_per_stream, seconds_per_stream = estimates[-1]
+    by_memory = int(args.memory_mb * 2**20 / bytes_per_stream)
+    by_fanout = int(args.fanout_budget_ms / 1000 / seconds_per_stream)
+    print(f"capacity per worker: {min(by_memory, by_fanout)} streams "
+          f"(memory {by_memory} in {args.memory_mb:.0f} MiB, fan-out {by_fanout} within {args.fanout_budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+Load benchmark: every endpoint against a synthetic dataset of any size.
+
+Seeds a scratch database through bulk inserts, with Zipf-skewed activity
+(a few users log a lot, most log a little), then rebuilds the derived tables
+(savings totals, forecasts) with the real jobs. A fresh process imports the
+app and drives a weighted mix of reads and writes through it in process with
+an asyncio HTTP client. Active users are picked with the same skew as the
+data. It reports throughput and p50/p95/p99 latency per endpoint, plus mean
+DB time per request from the app's own metrics.
+
+Every route the app serves is either in the mix or listed in NOT_DRIVEN
+with the reason; the run stops before driving anything when a route is in
+neither. Signup and login are left out: they are dominated by password
+hashing, which is slow on purpose. The AI chat endpoint is left out because
+it calls an external service. A live stream is timed to its first chunk,
+then disconnected.
+
+Results can be saved as a baseline and later runs compared against it.
+Baselines live in benchmarks/baselines/load.json, keyed by dataset size,
+concurrency and DB mode. They are only comparable on the same machine.
+
+Run with:
+    python -m benchmarks.bench_load [--users 2000] [--logs 200000]
+        [--zipf 1.2] [--days 365] [--concurrency 64] [--requests 5000]
+        [--database-url URL] [--save-baseline] [--check [--tolerance 0.2]]
+
+At release scale, e.g. --users 100000 --logs 10000000, seeding takes a few
+minutes on SQLite.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASELINES = Path(__file__).parent / "baselines" / "load.json"
+
+# (weight, method, route); {log_id} is one of the user's own logs, {team_id} any team
+MIX = [
+    (20, "GET", "/api/dashboard/stats"),
+    (10, "GET", "/api/dashboard/activities"),
+    (15, "GET", "/api/logs/"),
+    (3, "GET", "/api/logs/search"),
+    (3, "GET", "/api/logs/changes"),
+    (5, "GET", "/api/insights/weekly"),
+    (5, "GET", "/api/insights/categories"),
+    (5, "GET", "/api/insights/summary"),
+    (5, "GET", "/api/insights/forecast"),
+    (5, "GET", "/api/insights/percentiles"),
+    (10, "GET", "/api/leaderboard/"),
+    (5, "GET", "/auth/me"),
+    (3, "GET", "/api/profile/"),
+    (3, "GET", "/api/profile/badges"),
+    (3, "GET", "/api/profile/achievements"),
+    (3, "GET", "/api/profile/streaks"),
+    (2, "GET", "/api/profile/calendar"),
+    (3, "GET", "/api/teams/leaderboard"),
+    (2, "GET", "/api/teams/{team_id}"),
+    (2, "GET", "/api/teams/{team_id}/leaderboard"),
+    (1, "GET", "/api/admin/active-users"),
+    (1, "GET", "/api/live/"),
+    (4, "POST", "/api/logs/"),
+    (1, "PUT", "/api/logs/{log_id}"),
+    (1, "DELETE", "/api/logs/{log_id}"),
+    (1, "PUT", "/api/profile/"),
+    (1, "POST", "/api/teams/"),
+    (1, "POST", "/api/teams/{team_id}/join"),
+    (1, "POST", "/api/teams/leave"),
+]
+
+# Served routes deliberately not driven, and why
+NOT_DRIVEN = {
+    ("POST", "/auth/signup"): "password hashing, slow on purpose",
+    ("POST", "/auth/login"): "password hashing, slow on purpose",
+    ("POST", "/auth/logout"): "stateless, no work",
+    ("POST", "/api/ai/chat"): "calls an external service",
+    ("GET", "/"): "static, no work",
+    ("GET", "/health"): "static, no work",
+}
+
+# The seeded user that requests /api/admin
+ADMIN_USER_ID = 1
+# One team per this many users; every other user is in one
+USERS_PER_TEAM = 100
+
+# Share of logs per activity type and kg saved per entry (low, high)
+ACTIVITY_MIX = {
+    "TRANSPORT": (0.35, 0.1, 3.0),
+    "FOOD": (0.25, 0.2, 2.0),
+    "ENERGY": (0.2, 0.1, 1.5),
+    "WASTE": (0.12, 0.05, 0.8),
+    "WATER": (0.08, 0.02, 0.4),
+}
+
+# What the seeded logs say, by activity type, and the words searched for
+DESCRIPTIONS = {
+    "TRANSPORT": "cycled to work instead of driving",
+    "FOOD": "vegetarian lunch from the market",
+    "ENERGY": "line-dried the laundry",
+    "WASTE": "recycled the packaging",
+    "WATER": "shorter shower with a timer",
+}
+SEARCH_TERMS = ["cycled", "lunch", "laundry", "recycled", "shower", "market"]
+
+SEED_CHUNK = 50_000
+
+
+def undriven_routes(app) -> set:
+    """Served (method, route)s neither in MIX nor in NOT_DRIVEN, plus listed ones no longer served."""
+    served = {
+        (method.upper(), path)
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    }
+    listed = {(method, route) for _, method, route in MIX} | set(NOT_DRIVEN)
+    return served ^ listed
+
+
+def zipf_weights(n: int, exponent: float):
+    import numpy as np
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def seed(database_url: str, users: int, logs: int, exponent: float, days: int, seed_value: int = 1):
+    """
+    Bulk-load `users` users and `logs` eco_logs, skewed by a Zipf law over
+    users, and a team for every USERS_PER_TEAM users.
+    """
+    import numpy as np
+    from sqlalchemy import create_engine
+    import app.database  # noqa: F401 - registers every model
+    from app.core.database import Base
+    from app.models.log import EcoLog
+    from app.models.team import Team
+    from app.models.user import User
+
+    rng = np.random.default_rng(seed_value)
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+
+    # User i gets the i-th largest share; ids are shuffled so heavy users are not all low ids
+    per_user = rng.multinomial(logs, zipf_weights(users, exponent))
+    user_ids = rng.permutation(np.arange(1, users + 1))
+
+    names = list(ACTIVITY_MIX)
+    shares = np.array([ACTIVITY_MIX[name][0] for name in names])
+    low = np.array([ACTIVITY_MIX[name][1] for name in names])
+    high = np.array([ACTIVITY_MIX[name][2] for name in names])
+
+    log_table = EcoLog.__table__
+    date_bind = log_table.c.activity_date.type.bind_processor(engine.dialect) or (lambda value: value)
+    placeholder = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+    insert_log = (
+        f"INSERT INTO {log_table.name} (user_id, activity_type, description, emissions_saved, "
+        f"points_earned, activity_date, created_at) VALUES ({', '.join([placeholder] * 7)})"
+    )
+
+    now = datetime.utcnow()
+    owners = np.repeat(user_ids, per_user)
+    rng.shuffle(owners)  # interleave users, as real inserts would
+    score = np.zeros(users + 1)
+    saved = np.zeros(users + 1)
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        teams = max(1, users // USERS_PER_TEAM)
+        conn.execute(Team.__table__.insert(), [
+            {"id": team_id, "name": f"Bench team {team_id}"} for team_id in range(1, teams + 1)
+        ])
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "email": f"bench{user_id}@example.com", "username": f"bench{user_id}",
+             "hashed_password": "x", "eco_score": 0.0, "total_emissions_saved": 0.0,
+             "team_id": user_id // 2 % teams + 1 if user_id % 2 else None, "is_admin": user_id == ADMIN_USER_ID}
+            for user_id in range(1, users + 1)
+        ])
+        for start in range(0, logs, SEED_CHUNK):
+            chunk_owners = owners[start:start + SEED_CHUNK]
+            size = len(chunk_owners)
+            kinds = rng.choice(len(names), size=size, p=shares)
+            emissions = np.round(rng.uniform(low[kinds], high[kinds]), 3)
+            points = np.maximum(1, np.round(emissions * 3)).astype(int)
+            ages = rng.uniform(0, days * 86400, size=size)
+            np.add.at(score, chunk_owners, points)
+            np.add.at(saved, chunk_owners, emissions)
+            rows = []
+            for owner, kind, emission, point, age in zip(
+                chunk_owners.tolist(), kinds.tolist(), emissions.tolist(), points.tolist(), ages.tolist()
+            ):
+                moment = date_bind(now - timedelta(seconds=age))
+                rows.append((owner, names[kind], DESCRIPTIONS[names[kind]], emission, point, moment, moment))
+            conn.exec_driver_sql(insert_log, rows)
+
+        # The denormalised totals the write path keeps up to date
+        conn.exec_driver_sql(
+            f"UPDATE users SET eco_score = {placeholder}, total_emissions_saved = {placeholder} WHERE id = {placeholder}",
+            [(float(score[user_id]), float(saved[user_id]), user_id) for user_id in range(1, users + 1)],
+        )
+    engine.dispose()
+
+    # Heaviest users first, so the load generator can apply the same skew
+    return [int(user_id) for user_id in user_ids], teams
+
+
+def build_derived(database_url: str):
+    env = dict(os.environ, DATABASE_URL=database_url, LOG_LEVEL="WARNING")
+    for job in ("app.jobs.rebuild_savings_stats", "app.jobs.forecast", "app.jobs.rebuild_team_totals",
+                "app.jobs.rebuild_activity_days", "app.jobs.rebuild_active_users"):
+        subprocess.run([sys.executable, "-m", job], env=env, check=True, capture_output=True)
+
+
+def percentile(ordered, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+    }
+
+
+async def first_chunk(app, token: str):
+    """Open a live stream straight on the ASGI app and disconnect once its first chunk is sent."""
+    sent = asyncio.Event()
+
+    async def receive():
+        await sent.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status_code.append(message["status"])
+        elif message.get("body"):
+            sent.set()
+
+    status_code = []
+    scope = {
+        "type": "http", "asgi": {"spec_version": "2.3"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/live/", "raw_path": b"/api/live/", "root_path": "", "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "server": ("bench", 80), "client": ("127.0.0.1", 50000),
+    }
+    await app(scope, receive, send)
+    return status_code[0]
+
+
+async def drive(user_ids, teams: int, exponent: float, concurrency: int, requests: int) -> dict:
+    import httpx
+    from app.core import metrics
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.services.sync import encode_token
+
+    undriven = undriven_routes(app)
+    if undriven:
+        raise SystemExit(f"routes neither in MIX nor in NOT_DRIVEN, or no longer served: {sorted(undriven)}")
+
+    tokens = {user_id: create_access_token({"sub": str(user_id)}) for user_id in user_ids}
+    user_weights = zipf_weights(len(user_ids), exponent).tolist()
+    weights = [weight for weight, _, _ in MIX]
+    own_logs = {}  # user id -> ids of logs this run created and has not deleted
+    latencies = {(method, route): [] for _, method, route in MIX}
+    errors = {}
+    remaining = requests
+
+    async def request(client, method, route, user_id):
+        if route.startswith("/api/admin/"):
+            user_id = ADMIN_USER_ID
+        headers = {"Authorization": f"Bearer {tokens[user_id]}"}
+        body = params = None
+        url = route.format(team_id=random.randint(1, teams)) if "{team_id}" in route else route
+        if route == "/api/logs/{log_id}":
+            if not own_logs.get(user_id):
+                method, route = "POST", "/api/logs/"
+                url = route
+            else:
+                log_id = own_logs[user_id].pop() if method == "DELETE" else own_logs[user_id][-1]
+                url = route.format(log_id=log_id)
+                body = {"activity_type": "food"} if method == "PUT" else None
+        if route == "/api/logs/" and method == "POST":
+            body = {"activity_type": random.choice(["transport", "energy", "waste", "food", "water"]),
+                    "description": "cycled to work"}
+        elif route == "/api/profile/" and method == "PUT":
+            body = {"bio": "benchmark"}
+        elif route == "/api/teams/" and method == "POST":
+            body = {"name": f"Team {random.getrandbits(64):x}"}
+        elif route == "/api/logs/search":
+            params = {"q": random.choice(SEARCH_TERMS)}
+        elif route == "/api/logs/changes":
+            # Seeded logs are unstamped, so since 0 is what this run changed
+            params = {"since": encode_token(0)}
+
+        started = time.perf_counter()
+        if route == "/api/live/":
+            status_code = await first_chunk(app, tokens[user_id])
+        else:
+            response = await client.request(method, url, json=body, params=params, headers=headers)
+            status_code = response.status_code
+        latencies[(method, route)].append(time.perf_counter() - started)
+        if status_code >= 400:
+            errors[f"{method} {route} {status_code}"] = errors.get(f"{method} {route} {status_code}", 0) + 1
+        elif method == "POST" and route == "/api/logs/":
+            own_logs.setdefault(user_id, []).append(response.json()["log"]["id"])
+
+    async def worker(client):
+        nonlocal remaining
+        rng = random.Random()
+        while remaining > 0:
+            remaining -= 1
+            _, method, route = rng.choices(MIX, weights)[0]
+            user_id = rng.choices(user_ids, user_weights)[0]
+            await request(client, method, route, user_id)
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    # Mean DB time per request, by route template, from the app's own histograms
+    db_ms = {
+        labels[0]: series[-2] / series[-1] * 1000
+        for labels, series in metrics.request_db_time._series.items() if series[-1]
+    }
+    endpoints = {}
+    for (method, route), samples in latencies.items():
+        if samples:
+            endpoints[f"{method} {route}"] = dict(summarize(samples), db_ms=db_ms.get(route, 0.0))
+    everything = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "throughput": requests / elapsed,
+        "overall": summarize(everything),
+        "endpoints": endpoints,
+        "errors": errors,
+    }
+
+
+def baseline_key(args, mode: str) -> str:
+    return f"{args.users}u-{args.logs}l-z{args.zipf}-c{args.concurrency}-{mode}"
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions of `result` against `baseline` beyond `tolerance` (a fraction)."""
+    regressions = []
+    if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        regressions.append(f"throughput {result['throughput']:.1f} < baseline {baseline['throughput']:.1f} req/s")
+    for name, stats in result["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if stats[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name} {metric} {stats[metric]:.1f} > baseline {previous[metric]:.1f}")
+    return regressions
+
+
+def report(result: dict, baseline):
+    overall = result["overall"]
+    print(f"throughput {result['throughput']:8.1f} req/s   p50 {overall['p50_ms']:6.1f}  "
+          f"p95 {overall['p95_ms']:6.1f}  p99 {overall['p99_ms']:6.1f} ms")
+    print(f"{'endpoint':<38}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}{'db':>8}{'p95 vs base':>13}")
+    for name, stats in sorted(result["endpoints"].items()):
+        change = ""
+        previous = (baseline or {}).get("endpoints", {}).get(name)
+        if previous and previous["p95_ms"]:
+            change = f"{(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%"
+        print(f"{name:<38}{stats['requests']:>6}{stats['p50_ms']:>8.1f}{stats['p95_ms']:>8.1f}"
+              f"{stats['p99_ms']:>8.1f}{stats['db_ms']:>8.1f}{change:>13}")
+    for error, count in sorted(result["errors"].items()):
+        print(f"  {count} x {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--logs", type=int, default=200_000)
+    parser.add_argument("--zipf", type=float, default=1.2, help="skew of activity across users")
+    parser.add_argument("--days", type=int, default=365, help="spread logs over this many past days")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--database-url", help="seed and benchmark this database instead of a scratch SQLite file")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit non-zero on a regression against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        seeded = json.loads(Path(args.child).read_text())
+        result = asyncio.run(drive(seeded["users"], seeded["teams"], args.zipf, args.concurrency, args.requests))
+        # A file, not stdout: the app logs to stdout
+        Path(args.child).with_name("result.json").write_text(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        started = time.perf_counter()
+        user_ids, teams = seed(database_url, args.users, args.logs, args.zipf, args.days)
+        build_derived(database_url)
+        print(f"seeded {args.users} users, {args.logs} logs in {time.perf_counter() - started:.1f} s")
+
+        users_file = Path(tmp) / "users.json"
+        users_file.write_text(json.dumps({"users": user_ids, "teams": teams}))
+        env = dict(
+            os.environ, DATABASE_URL=database_url, RATE_LIMIT_ENABLED="false",
+            METRICS_ENABLED="true", LOG_LEVEL="WARNING",
+        )
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_load", "--child", str(users_file),
+             "--zipf", str(args.zipf), "--concurrency", str(args.concurrency),
+             "--requests", str(args.requests)],
+            env=env, stdout=subprocess.DEVNULL, check=True,
+        )
+        result = json.loads((Path(tmp) / "result.json").read_text())
+
+    mode = "async" if os.environ.get("DB_ASYNC", "true").lower() in ("1", "true", "yes") else "threadpool"
+    if os.environ.get("SQLITE_PRODUCTION_MODE", "").lower() in ("1", "true", "yes"):
+        mode += "-sqlite-production"
+    key = baseline_key(args, mode)
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    baseline = baselines.get(key)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, mode {mode}")
+    report(result, baseline)
+
+    if args.save_baseline:
+        baselines[key] = result
+        BASELINES.parent.mkdir(exist_ok=True)
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"saved baseline {key}")
+    elif baseline is None:
+        print(f"no baseline for {key}")
+    else:
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions and args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Per-request overhead of MetricsMiddleware and per-query overhead of the
+cursor-execute hooks.
+
+The middleware is measured around a trivial ASGI app called directly (no
+server, no HTTP parsing). The hooks are measured on `SELECT 1` against an
+in-memory SQLite engine, with and without instrument_engine().
+
+Run with:
+    python -m benchmarks.bench_metrics [--requests 200000] [--queries 50000]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import MetricsMiddleware, QueryStats, current_query_stats, instrument_engine
+
+
+class Route:
+    path_format = "/api/logs/{log_id}"
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = Route
+    scope["path_params"] = {"log_id": "7"}
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/api/logs/7", "headers": []}
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def time_queries(engine, queries: int) -> float:
+    with engine.connect() as conn:
+        statement = text("SELECT 1")
+        start = time.perf_counter()
+        for _ in range(queries):
+            conn.execute(statement)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=50_000)
+    args = parser.parse_args()
+
+    async def run():
+        await drive(MetricsMiddleware(endpoint), 1000)
+        return await drive(endpoint, args.requests), await drive(MetricsMiddleware(endpoint), args.requests)
+
+    baseline, with_metrics = asyncio.run(run())
+    print(f"requests:           {args.requests}")
+    print(f"bare endpoint:      {baseline / args.requests * 1e6:.2f} us/request")
+    print(f"with metrics:       {with_metrics / args.requests * 1e6:.2f} us/request")
+    print(f"middleware overhead:{(with_metrics - baseline) / args.requests * 1e6:6.2f} us/request")
+
+    plain = create_engine("sqlite://")
+    instrumented = create_engine("sqlite://")
+    instrument_engine(instrumented)
+    current_query_stats.set(QueryStats())
+    time_queries(plain, 1000)
+    time_queries(instrumented, 1000)
+    bare = time_queries(plain, args.queries)
+    hooked = time_queries(instrumented, args.queries)
+    print(f"queries:            {args.queries}")
+    print(f"bare query:         {bare / args.queries * 1e6:.2f} us/query")
+    print(f"with hooks:         {hooked / args.queries * 1e6:.2f} us/query")
+    print(f"hook overhead:      {(hooked - bare) / args.queries * 1e6:.2f} us/query")
+
+
+if __name__ == "__main__":
+    main()
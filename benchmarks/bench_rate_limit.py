@@ -0,0 +1,71 @@
+"""
+Per-request overhead of RateLimitMiddleware.
+
+Calls a trivial ASGI app directly (no server, no HTTP parsing) with and
+without the limiter in front, for an authenticated request on a limited
+route, and reports the difference per request.
+
+Run with:
+    python -m benchmarks.bench_rate_limit [--requests 200000]
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.rate_limit import InMemoryBucketStore, RateLimitMiddleware, RateLimitRule
+from app.core.security import create_access_token
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, scope, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "42"})
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/logs/",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 50000),
+    }
+    # Generous bucket so every request is allowed and takes the full path
+    rule = RateLimitRule("log_writes", frozenset({"POST"}), "/api/logs", rate=1e9, capacity=10**9)
+    limited = RateLimitMiddleware(endpoint, [rule], InMemoryBucketStore())
+
+    async def run():
+        await drive(limited, scope, 1000)  # warm the token cache
+        baseline = await drive(endpoint, scope, args.requests)
+        with_limiter = await drive(limited, scope, args.requests)
+        return baseline, with_limiter
+
+    baseline, with_limiter = asyncio.run(run())
+    overhead_us = (with_limiter - baseline) / args.requests * 1e6
+    print(f"requests:           {args.requests}")
+    print(f"bare endpoint:      {baseline / args.requests * 1e6:.2f} us/request")
+    print(f"with rate limiter:  {with_limiter / args.requests * 1e6:.2f} us/request")
+    print(f"limiter overhead:   {overhead_us:.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
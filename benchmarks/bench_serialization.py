@@ -0,0 +1,165 @@
+"""
+Cost of turning a 100-item log page into a response, old way versus new.
+
+Serialization: each variant is an endpoint returning the same preloaded page,
+called directly as ASGI (no server, no database):
+
+    orm, no response_model      ORM entities through jsonable_encoder (the old
+                                /api/dashboard/activities)
+    orm + response_model        ORM entities validated into the response model
+                                (the old /api/logs/)
+    rows + response_model       column Row objects validated into the model
+    dicts + response_model      column rows as plain dicts (as_dicts), validated
+                                and dumped to JSON bytes by pydantic-core (now)
+    dicts + ORJSONResponse      the same with orjson as the response class, if
+                                installed; a custom class turns off FastAPI's
+                                direct-to-bytes path, so it is not the default
+
+Loading: selecting the page from an in-memory SQLite database as ORM
+entities, as column rows, and as column rows converted with as_dicts.
+
+Run with:
+    python -m benchmarks.bench_serialization [--items 100] [--requests 5000]
+"""
+import argparse
+import asyncio
+import time
+import warnings
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+import app.database  # noqa: F401 - registers every model
+from app.core.database import Base, as_dicts
+from app.models.log import ActivityType, EcoLog as EcoLogModel
+from app.models.user import User
+from app.schemas.log import EcoLog
+
+LOG_COLUMNS = tuple(getattr(EcoLogModel, field) for field in EcoLog.model_fields)
+
+
+def load_page(items: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    types = list(ActivityType)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "email": "b@example.com", "username": "b", "hashed_password": "x"}])
+        conn.execute(insert(EcoLogModel), [
+            {"user_id": 1, "activity_type": types[i % len(types)], "description": f"benchmark entry {i}",
+             "emissions_saved": 0.25 * i, "points_earned": i % 8, "activity_date": now - timedelta(hours=i),
+             "created_at": now - timedelta(hours=i)}
+            for i in range(items)
+        ])
+    return engine
+
+
+def time_loading(engine, repeats: int):
+    entity_query = select(EcoLogModel).where(EcoLogModel.user_id == 1)
+    column_query = select(*LOG_COLUMNS).where(EcoLogModel.user_id == 1)
+    timings = {}
+    for label, run in (
+        ("orm entities", lambda session: session.scalars(entity_query).all()),
+        ("column rows", lambda session: session.execute(column_query).all()),
+        ("column rows as dicts", lambda session: as_dicts(session.execute(column_query))),
+    ):
+        with Session(engine) as session:
+            run(session)
+            started = time.perf_counter()
+            for _ in range(repeats):
+                run(session)
+                session.expunge_all()
+            timings[label] = (time.perf_counter() - started) / repeats
+    with Session(engine) as session:
+        entities = session.scalars(entity_query).all()
+        session.expunge_all()
+        rows = session.execute(column_query).all()
+    return timings, entities, rows
+
+
+def _page_app(page, response_class=None, **route_options):
+    app = FastAPI() if response_class is None else FastAPI(default_response_class=response_class)
+
+    async def get_page():
+        return page
+
+    app.get("/page", **route_options)(get_page)
+    return app
+
+
+def build_apps(entities, rows):
+    dicts = [row._asdict() for row in rows]
+    apps = {
+        "orm, no response_model": _page_app(entities),
+        "orm + response_model": _page_app(entities, response_model=List[EcoLog]),
+        "rows + response_model": _page_app(rows, response_model=List[EcoLog]),
+        "dicts + response_model": _page_app(dicts, response_model=List[EcoLog]),
+    }
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        from fastapi.responses import ORJSONResponse
+        warnings.filterwarnings("ignore", message="ORJSONResponse is deprecated")
+        apps["dicts + ORJSONResponse"] = _page_app(
+            dicts, response_model=List[EcoLog], response_class=ORJSONResponse
+        )
+    return apps
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def drive(app, requests: int):
+    body_size = 0
+
+    async def send(message):
+        nonlocal body_size
+        if message["type"] == "http.response.body":
+            body_size = len(message.get("body", b""))
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        scope = {
+            "type": "http", "method": "GET", "path": "/page", "raw_path": b"/page", "root_path": "",
+            "query_string": b"", "headers": [], "scheme": "http", "server": ("bench", 80),
+            "http_version": "1.1",
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests, body_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = load_page(args.items)
+    loading, entities, rows = time_loading(engine, max(1, args.requests // 5))
+    print(f"{args.items}-item page")
+    print("loading:")
+    for label, seconds in loading.items():
+        print(f"  {label:<26}{seconds * 1e6:9.1f} us")
+
+    async def run():
+        results = {}
+        for label, app in build_apps(entities, rows).items():
+            await drive(app, 50)
+            results[label] = await drive(app, args.requests)
+        return results
+
+    print("serialization (whole ASGI request):")
+    results = asyncio.run(run())
+    slowest = max(seconds for seconds, _ in results.values())
+    for label, (seconds, size) in results.items():
+        print(f"  {label:<26}{seconds * 1e6:9.1f} us  {slowest / seconds:5.2f}x  {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
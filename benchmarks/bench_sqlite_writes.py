@@ -0,0 +1,119 @@
+"""
+Concurrent write throughput on SQLite with and without SQLITE_PRODUCTION_MODE.
+
+Seeds a scratch database with users, then for each mode and concurrency level
+starts a fresh process that imports the app and drives authenticated
+POST /api/logs/ requests through it in process. Failed requests (such as
+"database is locked") are counted rather than retried.
+
+Run with:
+    python -m benchmarks.bench_sqlite_writes [--users 200]
+        [--concurrency 1,8,32,128] [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def seed(database_url: str, users: int):
+    from sqlalchemy import create_engine, insert
+    from app.core.database import Base
+    from app.models.user import User
+    import app.models.badge  # noqa: F401
+    import app.models.log  # noqa: F401
+    import app.models.forecast  # noqa: F401
+    import app.models.savings  # noqa: F401
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"bench{i}@example.com", "username": f"bench{i}",
+             "hashed_password": "x", "eco_score": 0.0, "total_emissions_saved": 0.0}
+            for i in range(1, users + 1)
+        ])
+    engine.dispose()
+
+
+async def drive(users: int, concurrency: int, requests: int) -> dict:
+    import httpx
+    from app.main import app
+    from app.core.security import create_access_token
+
+    tokens = [create_access_token({"sub": str(i)}) for i in range(1, users + 1)]
+    types = ["transport", "energy", "waste", "food", "water"]
+    errors = 0
+    queue = asyncio.Queue()
+    for n in range(requests):
+        queue.put_nowait(n)
+
+    async def worker(client):
+        nonlocal errors
+        rng = random.Random()
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            headers = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+            body = {"activity_type": rng.choice(types), "description": "benchmark entry"}
+            try:
+                response = await client.post("/api/logs/", json=body, headers=headers)
+                if response.status_code != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {"throughput": (requests - errors) / elapsed, "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,8,32,128")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(drive(args.users, int(args.concurrency), args.requests))
+        print(json.dumps(result))
+        return
+
+    print(f"{args.requests} POST /api/logs/ per run, {args.users} users")
+    for mode in ("false", "true"):
+        label = "production" if mode == "true" else "default"
+        for concurrency in args.concurrency.split(","):
+            # A fresh database per run so every run starts from the same size
+            with tempfile.TemporaryDirectory() as tmp:
+                database_url = f"sqlite:///{tmp}/bench.db"
+                seed(database_url, args.users)
+                env = dict(
+                    os.environ, DATABASE_URL=database_url, SQLITE_PRODUCTION_MODE=mode,
+                    RATE_LIMIT_ENABLED="false",
+                )
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_sqlite_writes", "--child",
+                     "--users", str(args.users), "--concurrency", concurrency,
+                     "--requests", str(args.requests)],
+                    env=env, capture_output=True, text=True, check=True,
+                ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{label:>10} c={concurrency:>4}: {result['throughput']:8.1f} writes/s  "
+                  f"{result['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
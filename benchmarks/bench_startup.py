@@ -0,0 +1,86 @@
+"""
+Cold-start cost: wall time of `import app.main` in a fresh interpreter.
+
+Each run starts a new Python process, so nothing is cached in sys.modules;
+the OS file cache is warm after the first run, as it is on a sleeping
+instance that wakes up. Reports the median and best of --runs, optionally
+the slowest imports from `python -X importtime`, and exits non-zero when the
+median is over --budget-ms, so CI can fail the build on a startup regression.
+
+Run with:
+    python -m benchmarks.bench_startup [--runs 7] [--budget-ms 1500] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_BUDGET_MS = 1500.0
+
+_MEASURE = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+_SCRATCH_DATABASE = os.path.join(tempfile.mkdtemp(prefix="bench_startup_"), "startup.db")
+
+
+def _env():
+    # Quiet, and no outbound connections or writes beyond a scratch SQLite file
+    return dict(
+        os.environ, DATABASE_URL=f"sqlite:///{_SCRATCH_DATABASE}", LOG_LEVEL="WARNING", RATE_LIMIT_ENABLED="false",
+    )
+
+
+def measure_import_ms(runs: int) -> list:
+    times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _MEASURE], env=_env(), capture_output=True, text=True, check=True,
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return times
+
+
+def slowest_imports(top: int) -> list:
+    """(cumulative ms, module) of the slowest imports, nested ones included, from -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative) / 1000, name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports")
+    args = parser.parse_args()
+
+    times = measure_import_ms(args.runs)
+    median = statistics.median(times)
+    print(f"import app.main: median {median:.0f} ms, best {min(times):.0f} ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    if args.top:
+        for cumulative_ms, name in slowest_imports(args.top):
+            print(f"{cumulative_ms:8.1f} ms  {name}")
+
+    if median > args.budget_ms:
+        print(f"OVER BUDGET by {median - args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Server throughput by worker count: `python -m app.server` over real sockets.
+
+Seeds a scratch database with bench_load's skewed dataset, then for each
+--workers value starts the production server, waits for /health and drives
+the read part of bench_load's mix at it for --seconds from --clients
+load-generator processes, each keeping --concurrency connections alive.
+Reports requests/s, p50/p99 latency and errors, plus the server's memory:
+the summed proportional set size (PSS) of master and workers, which counts
+pages the workers still share with the preloaded master once. Run again
+with --no-preload to see what preloading saves.
+
+The load generators compete with the server for CPUs on the same machine,
+so throughput stops scaling before the worker count reaches the CPU count;
+for larger servers, run the clients elsewhere or pin both with taskset.
+
+Run with:
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--users 500]
+        [--logs 50000] [--clients 2] [--concurrency 32] [--seconds 10]
+        [--no-preload]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_load import MIX, build_derived, seed, summarize, zipf_weights
+
+# Reads only, so every worker count sees the same data
+READ_MIX = [(weight, route) for weight, method, route in MIX if method == "GET"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_healthy(base_url: str, process, timeout: float = 60.0):
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+
+def pss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def server_pss_mib(master_pid: int) -> float:
+    """Summed PSS of the master and its workers."""
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        pids = [master_pid, *map(int, f.read().split())]
+    return sum(pss_kib(pid) for pid in pids) / 1024
+
+
+async def drive(base_url: str, user_ids, exponent: float, concurrency: int, seconds: float) -> dict:
+    import httpx
+    from app.core.security import create_access_token
+
+    tokens = {user_id: create_access_token({"sub": str(user_id)}) for user_id in user_ids}
+    user_weights = zipf_weights(len(user_ids), exponent).tolist()
+    weights = [weight for weight, _ in READ_MIX]
+    routes = [route for _, route in READ_MIX]
+    latencies, errors = [], {}
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client):
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, weights)[0]
+            user_id = rng.choices(user_ids, user_weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await client.get(route, headers={"Authorization": f"Bearer {tokens[user_id]}"})
+                status = response.status_code
+            except httpx.TransportError as exc:
+                status = type(exc).__name__
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors[f"{route} {status}"] = errors.get(f"{route} {status}", 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def run_server(workers: int, args, database_url: str, user_ids, tmp: str) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ, DATABASE_URL=database_url, RATE_LIMIT_ENABLED="false",
+        LOG_LEVEL="WARNING", METRICS_ENABLED="false",
+    )
+    command = [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+    if not args.preload:
+        command.append("--no-preload")
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_healthy(base_url, server)
+        users_file = Path(tmp) / "users.json"
+        users_file.write_text(json.dumps(user_ids))
+        clients = [
+            subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.bench_workers", "--child", str(users_file),
+                 "--base-url", base_url, "--zipf", str(args.zipf), "--concurrency", str(args.concurrency),
+                 "--seconds", str(args.seconds), "--result", str(Path(tmp) / f"client{index}.json")],
+                env=env,
+            )
+            for index in range(args.clients)
+        ]
+        for client in clients:
+            if client.wait() != 0:
+                raise RuntimeError("load generator failed")
+        memory = server_pss_mib(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies, errors = [], {}
+    for index in range(args.clients):
+        result = json.loads((Path(tmp) / f"client{index}.json").read_text())
+        latencies += result["latencies"]
+        for key, count in result["errors"].items():
+            errors[key] = errors.get(key, 0) + count
+    return dict(summarize(latencies), throughput=len(latencies) / args.seconds, pss_mib=memory, errors=errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts to compare")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--logs", type=int, default=50_000)
+    parser.add_argument("--zipf", type=float, default=1.2, help="skew of activity across users")
+    parser.add_argument("--clients", type=int, default=2, help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per load generator")
+    parser.add_argument("--seconds", type=float, default=10.0, help="load duration per worker count")
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="start the server with --no-preload")
+    parser.add_argument("--database-url", help="benchmark this database instead of a seeded scratch SQLite file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        user_ids = json.loads(Path(args.child).read_text())
+        result = asyncio.run(drive(args.base_url, user_ids, args.zipf, args.concurrency, args.seconds))
+        Path(args.result).write_text(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        if args.database_url:
+            user_ids = list(range(1, args.users + 1))
+        else:
+            started = time.perf_counter()
+            user_ids = seed(database_url, args.users, args.logs, args.zipf, days=365)
+            build_derived(database_url)
+            print(f"seeded {args.users} users, {args.logs} logs in {time.perf_counter() - started:.1f} s")
+
+        print(f"{args.clients} clients x {args.concurrency} connections, {args.seconds:g} s each, "
+              f"preload {'on' if args.preload else 'off'}")
+        print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'PSS MiB':>8}  errors")
+        for workers in (int(count) for count in args.workers.split(",")):
+            result = run_server(workers, args, database_url, user_ids, tmp)
+            print(f"{workers:>7} {result['throughput']:>9.0f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                  f"{result['pss_mib']:>8.1f}  {sum(result['errors'].values()) or '-'}")
+            for key, count in sorted(result["errors"].items()):
+                print(f"{'':>7} {count} x {key}")
+
+
+if __name__ == "__main__":
+    main()